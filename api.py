@@ -1,12 +1,26 @@
+import logging
+import os
+import shutil
+import tempfile
+from importlib import import_module
+from io import TextIOWrapper
+from itertools import chain
 from typing import Optional
 
-from fastapi import FastAPI, File, UploadFile, HTTPException
+from fastapi import FastAPI, File, HTTPException, Query, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
 
+from config import SERVER_TIMING
+from helpers.instrumentation import StageMetrics, add_listener, recording, server_timing, stage
+from helpers.jobs import DONE, EXPIRED, FAILED, JobStore
+from helpers.report_cache import TRANSACTION_SIZE_ESTIMATE, ReportCache, cache_key, upload_digest
+from helpers.report_pool import PoolSaturated, ReportPool
 from processor import create_tax_report
-from readers.CsvReader import read_csv_stream
-from writers.PdfWriter import build_pdf_zip_bytes
+from readers.CsvReader import iter_csv_file
+from writers import EXPORTS, get_export
+
+logger = logging.getLogger(__name__)
 
 app = FastAPI(title="coinmotion-transaction-helper")
 
@@ -18,52 +32,364 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+report_pool = ReportPool()
+report_cache = ReportCache()
+job_store = JobStore()
+stage_metrics = StageMetrics()
+add_listener(stage_metrics)
+
+
+@app.on_event("shutdown")
+def _shutdown_report_pool():
+    report_pool.shutdown()
+
 
 @app.post("/report/pdf-zip")
 async def report_pdf_zip(file: UploadFile = File(...), year: Optional[int] = None):
+    return await _export_report(file, year, "pdf", "pdf-zip")
+
+
+@app.post("/report/export")
+async def report_export(
+    file: UploadFile = File(...),
+    year: Optional[int] = None,
+    output_format: str = Query("jsonl", alias="format"),
+):
+    """
+    Returns the report in a machine-readable format: "jsonl", "csv" (a zip
+    of transactions.csv and years.csv), "columnar" or "pdf".
+    """
+    if output_format not in EXPORTS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown format {output_format!r}, expected one of {EXPORTS.names()}",
+        )
+    cache_kind = "pdf-zip" if output_format == "pdf" else f"{output_format}-export"
+    return await _export_report(file, year, output_format, cache_kind)
+
+
+async def _export_report(file, year, export_name, cache_kind):
+    _check_csv_upload(file)
+    slot = _reserve_slot()
+
+    # Hashing, parsing and FIFO matching are CPU-bound, so they run on a
+    # report worker to keep the event loop free for other requests.
+    try:
+        export = get_export(export_name)
+        (digest, export_key, export_bytes), timings = await slot.run(
+            _profiled, _cached_export, file.file, cache_kind, year
+        )
+        if export_bytes is not None:
+            slot.release()
+            return _export_response(export, iter([export_bytes]), timings)
+        report, report_timings = await slot.run(_profiled, _build_report, file.file, year, digest)
+        timings += report_timings
+    except BaseException:
+        slot.release(failed=True)
+        raise
+
+    # The output is produced chunk by chunk on the same worker slot (PDFs one
+    # currency at a time) and each chunk is sent right away, so the file is
+    # never held in memory beyond what the cache keeps. Their timings only
+    # reach /metrics, since the headers are sent before the first chunk.
+    # The first chunk is produced before the headers, so a writer that fails
+    # early still gets an error status instead of a truncated 200.
+    chunks = _cache_chunks(export.iter_chunks(report), export_key)
+    try:
+        first = await slot.run(next, chunks, None)
+    except Exception as exc:
+        slot.release(failed=True)
+        raise HTTPException(status_code=400, detail=str(exc))
+    except BaseException:
+        slot.release(failed=True)
+        raise
+
+    chunks = chain(() if first is None else (first,), _log_stream_failure(chunks, export_name))
+    return _export_response(export, slot.stream(chunks), timings, slot)
+
+
+@app.post("/jobs", status_code=202)
+async def submit_report_job(file: UploadFile = File(...), year: Optional[int] = None):
+    """Queues a PDF zip report and returns the job id to poll."""
+    _check_csv_upload(file)
+    slot = _reserve_slot()
+
+    # The upload is closed when this request ends, so the job works on a copy.
+    try:
+        upload_path = await slot.run(_spool_upload, file.file)
+    except BaseException:
+        slot.release(failed=True)
+        raise
+
+    job = job_store.create(year)
+    try:
+        slot.submit(_run_report_job, job, upload_path)
+    except RuntimeError:
+        # The pool is shutting down; submit() has released the slot.
+        job_store.delete(job.id)
+        os.remove(upload_path)
+        raise HTTPException(status_code=503, detail="The server is shutting down, try again shortly.")
+    return _job_status(job)
+
+
+@app.get("/jobs/{job_id}")
+def report_job_status(job_id: str):
+    return _job_status(_get_job(job_id))
+
+
+@app.get("/jobs/{job_id}/result")
+def report_job_result(job_id: str):
+    job = _get_job(job_id)
+    if job.status == FAILED:
+        raise HTTPException(status_code=400, detail=job.error)
+    if job.status == EXPIRED:
+        raise HTTPException(status_code=410, detail="The job result is no longer available.")
+    result = job.result
+    if job.status != DONE or result is None:
+        raise HTTPException(status_code=409, detail="The job has not finished yet.")
+    return Response(
+        content=result,
+        media_type="application/zip",
+        headers={"Content-Disposition": "attachment; filename=pdf_reports.zip"},
+    )
+
+
+@app.delete("/jobs/{job_id}", status_code=204)
+def delete_report_job(job_id: str):
+    """Forgets a job and its result. A running job still finishes, but its result is dropped."""
+    if job_store.delete(job_id) is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    return Response(status_code=204)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def prometheus_metrics():
+    """Pool, cache and pipeline stage metrics in the Prometheus text format."""
+    lines = []
+    pool = report_pool.metrics()
+    for name, kind, key in (
+        ("report_pool_workers", "gauge", "workers"),
+        ("report_pool_in_flight", "gauge", "inFlight"),
+        ("report_pool_running", "gauge", "running"),
+        ("report_pool_queued", "gauge", "queued"),
+        ("report_pool_completed_total", "counter", "completed"),
+        ("report_pool_failed_total", "counter", "failed"),
+        ("report_pool_rejected_total", "counter", "rejected"),
+        ("report_pool_latency_seconds_total", "counter", "latencySecondsTotal"),
+        ("report_pool_queue_wait_seconds_total", "counter", "queueWaitSecondsTotal"),
+    ):
+        lines.append(f"# TYPE coinmotion_{name} {kind}")
+        lines.append(f"coinmotion_{name} {pool[key]}")
+
+    cache = report_cache.metrics()
+    for name, kind, key in (
+        ("report_cache_entries", "gauge", "entries"),
+        ("report_cache_bytes", "gauge", "bytes"),
+        ("report_cache_hits_total", "counter", "hits"),
+        ("report_cache_disk_hits_total", "counter", "diskHits"),
+        ("report_cache_misses_total", "counter", "misses"),
+    ):
+        lines.append(f"# TYPE coinmotion_{name} {kind}")
+        lines.append(f"coinmotion_{name} {cache[key]}")
+
+    lines.extend(stage_metrics.prometheus())
+    return "\n".join(lines) + "\n"
+
+
+@app.get("/metrics/report-pool")
+def report_pool_metrics():
+    return report_pool.metrics()
+
+
+@app.get("/metrics/report-cache")
+def report_cache_metrics():
+    return report_cache.metrics()
+
+
+def _check_csv_upload(file):
     if file.filename is None or not file.filename.lower().endswith(".csv"):
         raise HTTPException(status_code=400, detail="Upload a .csv file")
 
-    content = await file.read()
+
+def _reserve_slot():
     try:
-        csv_text = content.decode("utf-8")
-    except UnicodeDecodeError:
-        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
+        return report_pool.reserve()
+    except PoolSaturated:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many reports are being generated, try again shortly.",
+            headers={"Retry-After": "5"},
+        )
+
+
+def _get_job(job_id):
+    job = job_store.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Unknown job.")
+    return job
+
+
+def _job_status(job):
+    status = job.to_dict()
+    status["statusUrl"] = f"/jobs/{job.id}"
+    status["resultUrl"] = f"/jobs/{job.id}/result"
+    return status
+
+
+def _spool_upload(raw_file):
+    with tempfile.NamedTemporaryFile(prefix="report-upload-", suffix=".csv", delete=False) as handle:
+        shutil.copyfileobj(raw_file, handle)
+    return handle.name
+
+
+def _run_report_job(job, upload_path):
+    job_store.start(job)
+    try:
+        with open(upload_path, "rb") as raw_file:
+            digest = upload_digest(raw_file)
+            zip_key = cache_key("pdf-zip", digest, job.year)
+            zip_bytes = report_cache.get(zip_key)
+            if zip_bytes is None:
+                report = _build_report(raw_file, job.year, digest, job)
+                zip_bytes = _pdf_writer().build_pdf_zip_bytes(report, progress=_progress_setter(job, "pdfs_rendered", "pdfs_total"))
+                report_cache.put(zip_key, zip_bytes, len(zip_bytes))
+    except HTTPException as exc:
+        job_store.fail(job, exc.detail)
+    except Exception as exc:
+        job_store.fail(job, str(exc))
+    else:
+        job_store.finish(job, zip_bytes)
+    finally:
+        os.remove(upload_path)
+
+
+def _profiled(fn, *args):
+    """Runs fn(*args) and returns its result with the stages it recorded."""
+    with recording() as profile:
+        return fn(*args), profile.records
+
+
+def _cached_export(raw_file, cache_kind, year):
+    # The cache may read a large file from disk, so this runs on a worker too.
+    with stage("upload_digest"):
+        digest = upload_digest(raw_file)
+    export_key = cache_key(cache_kind, digest, year)
+    return digest, export_key, report_cache.get(export_key)
+
+
+def _progress_setter(job, done_field, total_field):
+    def progress(done, total):
+        setattr(job, total_field, total)
+        setattr(job, done_field, done)
+
+    return progress
+
 
+def _export_response(export, chunks, timings=None, slot=None):
+    headers = {"Content-Disposition": f"attachment; filename={export.filename}"}
+    if SERVER_TIMING and timings:
+        headers["Server-Timing"] = server_timing(timings)
+    if slot is None:
+        return StreamingResponse(chunks, media_type=export.media_type, headers=headers)
+    return _SlotStreamingResponse(slot, chunks, media_type=export.media_type, headers=headers)
+
+
+class _SlotStreamingResponse(StreamingResponse):
+    """
+    Releases its report slot when the response ends, however it ends. The
+    stream releases it too, but only once the body is iterated: a client
+    that disconnects or a send that fails before then would leak the slot.
+    """
+
+    def __init__(self, slot, content, **kwargs):
+        super().__init__(content, **kwargs)
+        self.slot = slot
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            self.slot.release(failed=True)
+
+
+def _log_stream_failure(chunks, export_name):
+    # Once the headers are sent the client only sees a cut-off body.
     try:
-        transactions = read_csv_stream(csv_text)
-        report = create_tax_report(transactions)
-        if year is not None:
-            report = _filter_report_by_year(report, str(year))
-            if not report:
-                raise HTTPException(
-                    status_code=400,
-                    detail=f"No report data found for year {year}.",
-                )
-        zip_bytes = build_pdf_zip_bytes(report)
+        yield from chunks
+    except Exception:
+        logger.exception("The %s export failed after its response had started", export_name)
+        raise
+
+
+def _cache_chunks(chunks, key):
+    # Keeps a copy of the streamed zip for the cache until it grows past
+    # what the cache would accept anyway.
+    collected = []
+    size = 0
+    for chunk in chunks:
+        if collected is not None:
+            collected.append(chunk)
+            size += len(chunk)
+            if size > report_cache.max_bytes:
+                collected = None
+        yield chunk
+    if collected is not None:
+        report_cache.put(key, b"".join(collected), size)
+
+
+def _pdf_writer():
+    # ReportLab is imported by the first report instead of at startup.
+    return import_module("writers.PdfWriter")
+
+
+def _build_report(raw_file, year, digest, job=None):
+    report_key = cache_key("report", digest, year)
+    report = report_cache.get(report_key)
+    if report is not None:
+        return report
+
+    try:
+        transactions = _read_transactions(raw_file, digest, job)
+        progress = _progress_setter(job, "transactions_matched", "transactions_total") if job is not None else None
+        if not transactions:
+            raise HTTPException(status_code=400, detail="No transactions found in the CSV file.")
+        report = create_tax_report(transactions, progress=progress, year=year)
+        if not report:
+            raise HTTPException(
+                status_code=400,
+                detail=f"No report data found for year {year}.",
+            )
     except HTTPException:
         raise
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="CSV must be UTF-8 encoded")
     except Exception as exc:
         raise HTTPException(status_code=400, detail=str(exc))
 
-    return StreamingResponse(
-        iter([zip_bytes]),
-        media_type="application/zip",
-        headers={"Content-Disposition": "attachment; filename=pdf_reports.zip"},
-    )
+    size = sum(len(data["transactions"]) for data in report.values()) * TRANSACTION_SIZE_ESTIMATE
+    report_cache.put(report_key, report, size)
+    return report
 
 
-def _filter_report_by_year(report, year):
-    filtered = {}
-    for currency, data in report.items():
-        years = data.get("years", {})
-        if year not in years:
-            continue
+def _read_transactions(raw_file, digest, job=None):
+    transactions_key = cache_key("transactions", digest)
+    transactions = report_cache.get(transactions_key)
+    if transactions is not None:
+        if job is not None:
+            job.rows_parsed = len(transactions)
+        return transactions
 
-        filtered[currency] = {
-            **data,
-            "years": {year: years[year]},
-            "transactions": data.get("transactions", []),
-        }
+    # The upload is spooled by the server; parse it straight from the file
+    # instead of reading and decoding the whole body first.
+    csv_file = TextIOWrapper(raw_file, encoding="utf-8", newline="")
+    try:
+        transactions = []
+        for transaction in iter_csv_file(csv_file):
+            transactions.append(transaction)
+            if job is not None:
+                job.rows_parsed += 1
+    finally:
+        csv_file.detach()
 
-    return filtered
+    report_cache.put(transactions_key, transactions, len(transactions) * TRANSACTION_SIZE_ESTIMATE)
+    return transactions
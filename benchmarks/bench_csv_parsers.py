@@ -0,0 +1,55 @@
+"""Compares the row CSV reader with the NumPy columnar reader.
+
+Generates a synthetic export (1M rows by default), checks that both readers
+return the same transactions and prints the best of three timings.
+
+Run from the project root:
+
+    python benchmarks/bench_csv_parsers.py [rows]
+"""
+import os
+import sys
+import tempfile
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic import write_csv
+from readers.ColumnarCsvReader import np, read_csv_columnar
+from readers.CsvReader import read_csv
+
+
+def best_of(fn, path, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = fn(path)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    if np is None:
+        print("NumPy is not installed; read_csv_columnar falls back to read_csv.")
+
+    with tempfile.TemporaryDirectory() as folder:
+        path = write_csv(os.path.join(folder, "export.csv"), rows)
+        row_seconds, row_result = best_of(read_csv, path)
+        columnar_seconds, columnar_result = best_of(read_csv_columnar, path)
+
+    if row_result != columnar_result:
+        raise SystemExit("Readers returned different transactions")
+
+    print(f"rows: {rows}, transactions: {len(row_result)}")
+    print(f"{'read_csv':<20} {row_seconds:>8.3f} s")
+    print(f"{'read_csv_columnar':<20} {columnar_seconds:>8.3f} s")
+    print(f"speedup: {row_seconds / columnar_seconds:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Stress benchmark for helpers.fifo.FIFO.
+
+Adds N small lots and then performs N sells through ``calculate_cogs`` while
+reading ``remaining_quantity()`` after every sell, the way
+``processor._handle_sell_transaction`` does. With O(1) inventory totals the
+time per operation stays flat as N grows.
+
+Run from the project root:
+
+    python benchmarks/bench_fifo.py
+"""
+import os
+import sys
+import time
+from datetime import datetime, timedelta, timezone
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from helpers.fifo import FIFO
+
+
+SIZES = [25_000, 50_000, 100_000]
+
+
+def run(lots):
+    fifo = FIFO()
+    start_time = datetime(2020, 1, 1, tzinfo=timezone.utc)
+
+    started = time.perf_counter()
+    for index in range(lots):
+        fifo.add_purchase(0.001, 20000.0 + index, start_time + timedelta(minutes=index))
+
+    sold_time = start_time + timedelta(minutes=lots)
+    for _ in range(lots):
+        fifo.calculate_cogs(0.001, sold_time, 25.0)
+        fifo.remaining_quantity()
+    return time.perf_counter() - started
+
+
+def main():
+    print(f"{'lots':>10} {'sells':>10} {'seconds':>10} {'us/op':>10}")
+    for size in SIZES:
+        elapsed = run(size)
+        per_op = elapsed / (2 * size) * 1e6
+        print(f"{size:>10} {size:>10} {elapsed:>10.3f} {per_op:>10.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Compares float and fixed-point FIFO matching in create_tax_report.
+
+Builds a synthetic export (200k rows by default), runs create_tax_report
+with float arithmetic and with fixed_point=True, and prints the best of
+three timings and the largest difference between the yearly totals of the
+two modes.
+
+Run from the project root:
+
+    python benchmarks/bench_fixed_point.py [rows]
+"""
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic import generate_csv
+from processor import create_tax_report
+from readers.CsvReader import read_csv_stream
+
+
+def best_of(objects, fixed_point, repeat=3):
+    best = None
+    result = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = create_tax_report(objects, fixed_point=fixed_point)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    objects = list(read_csv_stream(generate_csv(rows)))
+
+    float_seconds, float_report = best_of(objects, False)
+    fixed_seconds, fixed_report = best_of(objects, True)
+
+    difference = 0.0
+    for currency, data in float_report.items():
+        for year, totals in data["years"].items():
+            difference = max(difference, abs(totals["total"] - fixed_report[currency]["years"][year]["total"]))
+
+    print(f"rows: {len(objects)}")
+    print(f"{'float':<12} {float_seconds:>8.3f} s")
+    print(f"{'fixed point':<12} {fixed_seconds:>8.3f} s  ({fixed_seconds / float_seconds:.2f}x)")
+    print(f"largest yearly total difference: {difference:.2f} EUR")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,47 @@
+"""Import-time benchmark for the CLI and API entry points.
+
+Imports each module in a fresh interpreter several times and prints the
+best and median wall time, next to a bare interpreter start for reference.
+The import cost of a module is roughly its time minus the baseline.
+
+Run from the project root:
+
+    python benchmarks/bench_imports.py [repeat]
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+TARGETS = [
+    ("(interpreter)", "pass"),
+    ("main", "import main"),
+    ("api", "import api"),
+    ("processor", "import processor"),
+    ("pdf writer", "import writers.PdfWriter"),
+    ("xlsx writer", "import writers.XlsWriter"),
+]
+
+
+def time_import(code, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], cwd=PROJECT_ROOT, check=True)
+        timings.append(time.perf_counter() - started)
+    return min(timings), statistics.median(timings)
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 5
+    print(f"{'module':<16} {'best ms':>9} {'median ms':>10}")
+    for label, code in TARGETS:
+        best, median = time_import(code, repeat)
+        print(f"{label:<16} {best * 1000:>9.1f} {median * 1000:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
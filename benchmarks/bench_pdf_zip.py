@@ -0,0 +1,41 @@
+"""Benchmark for writers.PdfWriter.build_pdf_zip_bytes.
+
+Builds a report for many currencies with large transaction tables and
+renders the PDF zip serially and with a process pool.
+
+Run from the project root:
+
+    python benchmarks/bench_pdf_zip.py [currencies] [rows per currency] [workers]
+"""
+import os
+import sys
+import time
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic import generate_csv
+from processor import create_tax_report
+from readers.CsvReader import read_csv_stream
+from writers.PdfWriter import build_pdf_zip_bytes
+
+
+def main():
+    currencies = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    rows_per_currency = int(sys.argv[2]) if len(sys.argv) > 2 else 2000
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+
+    names = [f"C{index:03d}" for index in range(currencies)]
+    report = create_tax_report(read_csv_stream(generate_csv(currencies * rows_per_currency, currencies=names)))
+
+    print(f"currencies: {currencies}, rows per currency: ~{rows_per_currency}, cpus: {os.cpu_count()}")
+    for label, worker_count in (("serial", 1), (f"{workers} workers", workers)):
+        started = time.perf_counter()
+        zip_bytes = build_pdf_zip_bytes(report, workers=worker_count)
+        elapsed = time.perf_counter() - started
+        print(f"{label:<12} {elapsed:>8.2f} s  {len(zip_bytes) / 1e6:>8.2f} MB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+"""Compares the single-pass and grouped matching in create_tax_report.
+
+Builds a synthetic export (200k rows by default) and runs create_tax_report
+serially (one pass, rows go straight to each currency's FIFO), serially
+with a sink that only counts rows, and with executor="thread" and one
+worker, which still groups the transactions into per-currency lists first.
+Prints the best of three timings and the peak traced memory of each.
+
+Run from the project root:
+
+    python benchmarks/bench_single_pass.py [rows]
+"""
+import os
+import sys
+import time
+import tracemalloc
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic import generate_csv
+from processor import create_tax_report
+from readers.CsvReader import read_csv_stream
+
+
+def count_rows(currency, row):
+    pass
+
+
+MODES = [
+    ("single pass", {}),
+    ("sink", {"sink": count_rows}),
+    ("grouped", {"executor": "thread", "max_workers": 1}),
+]
+
+
+def best_of(objects, options, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        create_tax_report(objects, **options)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def peak_memory(objects, options):
+    tracemalloc.start()
+    create_tax_report(objects, **options)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return peak
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    objects = list(read_csv_stream(generate_csv(rows)))
+
+    print(f"rows: {len(objects)}")
+    print(f"{'mode':<12} {'best s':>8} {'peak MB':>9}")
+    for label, options in MODES:
+        seconds = best_of(objects, options)
+        peak = peak_memory(objects, options)
+        print(f"{label:<12} {seconds:>8.3f} {peak / 1e6:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+"""Memory cost of the per-lot split rows of a sell.
+
+Builds a dollar-cost-averaging history (daily buys of one currency, 20k
+by default) followed by a single sell of everything, so the report holds
+one split row per lot. Prints the memory retained by the report per split
+row, measured with tracemalloc, for float and fixed-point matching, next
+to the best of three timings.
+
+Run from the project root:
+
+    python benchmarks/bench_split_rows.py [lots]
+"""
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timedelta, timezone
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic import transaction_row
+from helpers.transaction import as_transaction
+from processor import create_tax_report
+
+
+def dca_history(lots):
+    start = datetime(2014, 1, 1, 10, tzinfo=timezone(timedelta(hours=2)))
+    rows = [_dca_row(start, day, "EUR", "BTC", 0.001, 25.0 + day % 7) for day in range(lots)]
+    rows.append(_dca_row(start, lots, "BTC", "EUR", 0.001 * lots, 40.0 * lots))
+    return [as_transaction(row) for row in rows]
+
+
+def _dca_row(start, day, from_currency, to_currency, crypto_amount, eur_amount):
+    time = (start + timedelta(days=day)).isoformat()
+    return transaction_row(time, from_currency, to_currency, crypto_amount, eur_amount, fee=round(eur_amount * 0.015, 2))
+
+
+def retained_per_row(objects, fixed_point):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    report = create_tax_report(objects, fixed_point=fixed_point)
+    retained = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    split_rows = sum(1 for row in report["BTC"]["transactions"] if row["type"] == "sell")
+    return retained, split_rows
+
+
+def best_of(objects, fixed_point, repeat=3):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        create_tax_report(objects, fixed_point=fixed_point)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    lots = int(sys.argv[1]) if len(sys.argv) > 1 else 20_000
+    objects = dca_history(lots)
+
+    print(f"lots: {lots}")
+    print(f"{'mode':<12} {'split rows':>10} {'bytes/row':>10} {'best s':>8}")
+    for label, fixed_point in (("float", False), ("fixed point", True)):
+        retained, split_rows = retained_per_row(objects, fixed_point)
+        seconds = best_of(objects, fixed_point)
+        # The report also lists the buys, which are the input records
+        # themselves and cost one list slot each.
+        print(f"{label:<12} {split_rows:>10} {retained / split_rows:>10.0f} {seconds:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
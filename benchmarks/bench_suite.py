@@ -0,0 +1,231 @@
+"""Stage-by-stage benchmark suite with machine-readable results.
+
+Generates deterministic synthetic exports (benchmarks/synthetic.py) and
+times each pipeline stage separately at every size:
+
+    read_csv                  parse, classify and sort the export file
+    create_objects_from_csv   classify and sort already parsed rows
+    create_tax_report         FIFO matching
+    write_xls                 one .xlsx per currency
+    build_pdf_zip_bytes       PDF rendering and zipping
+    api                       POST /report/pdf-zip through the ASGI app
+
+Every stage runs in a fresh process. Inputs for a stage are prepared
+untimed in that process first. Two memory figures are reported:
+
+    peakTracedBytes   peak of Python allocations during one extra, untimed
+                      run of the stage under tracemalloc, measured from
+                      what was allocated when it started. This is the
+                      stage's own memory.
+    peakRssBytes      the process's peak resident memory (getrusage). It
+                      is a lifetime high-water mark, so it includes the
+                      input preparation; prepPeakRssBytes is the same
+                      mark before the stage ran. When the stage's peak is
+                      below the preparation's, the two are equal.
+
+Results are written as JSON so runs can be compared over time.
+
+Run from the project root (Unix only, resident memory comes from getrusage):
+
+    python benchmarks/bench_suite.py [--sizes 1000,100000,1000000]
+        [--stages read_csv,create_tax_report] [--currencies 10]
+        [--repeat 1] [--no-traced-memory] [--output results.json]
+"""
+import argparse
+import csv
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, timezone
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic import currency_names, write_csv
+from config import REPORT_VERSION
+
+DEFAULT_SIZES = [1_000, 100_000, 1_000_000]
+
+
+def read_csv_stage(path):
+    from readers.CsvReader import read_csv
+
+    return lambda: read_csv(path)
+
+
+def create_objects_stage(path):
+    from readers.CsvReader import _parse_csv_reader, create_objects_from_csv
+
+    with open(path, encoding="utf-8", newline="") as handle:
+        rows = _parse_csv_reader(csv.DictReader(handle))
+    return lambda: create_objects_from_csv(rows)
+
+
+def create_tax_report_stage(path):
+    from processor import create_tax_report
+    from readers.CsvReader import read_csv
+
+    objects = read_csv(path)
+    return lambda: create_tax_report(objects)
+
+
+def write_xls_stage(path):
+    from processor import create_tax_report
+    from readers.CsvReader import read_csv
+    from writers.XlsWriter import write_xls
+
+    report = create_tax_report(read_csv(path))
+    folder = tempfile.mkdtemp()
+    return lambda: write_xls(report, folder)
+
+
+def build_pdf_zip_stage(path):
+    from processor import create_tax_report
+    from readers.CsvReader import read_csv
+    from writers.PdfWriter import build_pdf_zip_bytes
+
+    report = create_tax_report(read_csv(path))
+    return lambda: build_pdf_zip_bytes(report)
+
+
+def api_stage(path):
+    from fastapi.testclient import TestClient
+
+    import api
+    from helpers.report_cache import ReportCache
+
+    # Every request must do the full work, not hit the report cache.
+    api.report_cache = ReportCache(max_bytes=0)
+    client = TestClient(api.app)
+
+    def post():
+        with open(path, "rb") as handle:
+            response = client.post("/report/pdf-zip", files={"file": ("export.csv", handle, "text/csv")})
+        if response.status_code != 200:
+            raise RuntimeError(f"API returned {response.status_code}: {response.text[:200]}")
+        return response.content
+
+    return post
+
+
+STAGES = {
+    "read_csv": read_csv_stage,
+    "create_objects_from_csv": create_objects_stage,
+    "create_tax_report": create_tax_report_stage,
+    "write_xls": write_xls_stage,
+    "build_pdf_zip_bytes": build_pdf_zip_stage,
+    "api": api_stage,
+}
+
+
+def run_stage(stage, path, repeat, traced_memory=True):
+    run = STAGES[stage](path)
+    prep_peak = _max_rss()
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        run()
+        timings.append(time.perf_counter() - started)
+    return {
+        "seconds": min(timings),
+        "secondsAll": timings,
+        "peakTracedBytes": _traced_peak(run) if traced_memory else None,
+        "prepPeakRssBytes": prep_peak,
+        "peakRssBytes": _max_rss(),
+    }
+
+
+def _traced_peak(run):
+    # tracemalloc slows allocation-heavy code down several times, so the
+    # memory run is separate from the timed ones.
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        run()
+        return tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+
+
+def _max_rss():
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    scale = 1 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * scale
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(size) for size in DEFAULT_SIZES))
+    parser.add_argument("--stages", default=",".join(STAGES))
+    parser.add_argument("--currencies", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-traced-memory", dest="traced_memory", action="store_false",
+                        help="Skip the extra tracemalloc run of each stage.")
+    parser.add_argument("--output", help="Write JSON results here instead of stdout.")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(",")]
+    stages = args.stages.split(",")
+    unknown = [stage for stage in stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages {unknown}, expected some of {list(STAGES)}")
+
+    results = []
+    with tempfile.TemporaryDirectory() as folder:
+        for rows in sizes:
+            path = write_csv(
+                os.path.join(folder, f"export_{rows}.csv"), rows, args.seed, currency_names(args.currencies)
+            )
+            for stage in stages:
+                with ProcessPoolExecutor(max_workers=1) as pool:
+                    result = pool.submit(run_stage, stage, path, args.repeat, args.traced_memory).result()
+                result = {"stage": stage, "rows": rows, **result}
+                results.append(result)
+                traced = result["peakTracedBytes"]
+                print(
+                    f"{stage:<25} {rows:>9} rows {result['seconds']:>9.3f} s"
+                    f"  traced peak {'-' if traced is None else f'{traced / 1e6:.1f}':>8} MB"
+                    f"  peak RSS {result['peakRssBytes'] / 1e6:>8.1f} MB",
+                    file=sys.stderr,
+                )
+
+    report = {
+        "createdAt": datetime.now(timezone.utc).isoformat(),
+        "gitCommit": _git_commit(),
+        "reportVersion": REPORT_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpuCount": os.cpu_count(),
+        "currencies": args.currencies,
+        "seed": args.seed,
+        "repeat": args.repeat,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+
+
+if __name__ == "__main__":
+    main()
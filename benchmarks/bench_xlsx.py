@@ -0,0 +1,71 @@
+"""Benchmark for writers.XlsWriter.write_xls.
+
+Builds a report with one large currency sheet and writes it twice: with a
+regular in-memory openpyxl workbook ("workbook") and with the project's own
+writers.XlsxStream.XlsxSheetStream, which writes the sheet XML row by row
+into the zip without openpyxl ("streamed"). It prints the time of each and
+the process's peak resident memory before and after writing. Every run
+happens in a fresh process so the peaks do not mix. A report split over
+several currencies is then written serially and with a process pool.
+
+Run from the project root (Unix only, peak memory comes from getrusage):
+
+    python benchmarks/bench_xlsx.py [rows] [currencies] [workers]
+"""
+import os
+import resource
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if PROJECT_ROOT not in sys.path:
+    sys.path.insert(0, PROJECT_ROOT)
+
+from benchmarks.synthetic import generate_csv
+from processor import create_tax_report
+from readers.CsvReader import read_csv_stream
+from writers.XlsWriter import write_xls
+
+
+def run(rows, currencies, workers, streaming):
+    report = create_tax_report(read_csv_stream(generate_csv(rows, currencies=currencies)))
+    before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    with tempfile.TemporaryDirectory() as folder:
+        started = time.perf_counter()
+        write_xls(report, folder, workers=workers, streaming=streaming)
+        elapsed = time.perf_counter() - started
+        size = sum(os.path.getsize(os.path.join(folder, name)) for name in os.listdir(folder))
+    after = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux.
+    return elapsed, before * 1024, after * 1024, size
+
+
+def in_fresh_process(*args):
+    with ProcessPoolExecutor(max_workers=1) as pool:
+        return pool.submit(run, *args).result()
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 200_000
+    currencies = int(sys.argv[2]) if len(sys.argv) > 2 else 8
+    workers = int(sys.argv[3]) if len(sys.argv) > 3 else (os.cpu_count() or 1)
+
+    print(f"one sheet, rows: ~{rows}")
+    for label, streaming in (("workbook", False), ("streamed", True)):
+        elapsed, before, after, size = in_fresh_process(rows, ["BTC"], 1, streaming)
+        print(
+            f"{label:<12} {elapsed:>8.2f} s  peak RSS {before / 1e6:>7.1f} -> {after / 1e6:>7.1f} MB"
+            f"  file {size / 1e6:>6.1f} MB"
+        )
+
+    names = [f"C{index:03d}" for index in range(currencies)]
+    print(f"{currencies} sheets, rows: ~{rows}, cpus: {os.cpu_count()}")
+    for label, worker_count in (("serial", 1), (f"{workers} workers", workers)):
+        elapsed, _, _, _ = in_fresh_process(rows, names, worker_count, True)
+        print(f"{label:<12} {elapsed:>8.2f} s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""Deterministic synthetic Coinmotion CSV exports for benchmarks."""
+import random
+from datetime import datetime, timedelta, timezone
+
+HEADER = ["type", "fromCurrency", "toCurrency", "eurAmount", "cryptoAmount", "rate", "fee", "feeCurrency", "time"]
+
+DEFAULT_CURRENCIES = ["BTC", "ETH", "XRP", "LTC", "ADA", "SOL", "DOT", "LINK", "XLM", "AAVE"]
+
+
+def currency_names(count):
+    """Returns ``count`` currency codes, starting with DEFAULT_CURRENCIES."""
+    names = DEFAULT_CURRENCIES[:count]
+    names += [f"C{index:03d}" for index in range(count - len(names))]
+    return names
+
+
+def transaction_row(time, from_currency, to_currency, crypto_amount, eur_amount, fee=0.0):
+    """Returns a parsed buy (from EUR) or sell (to EUR) row dict, as the CSV readers yield them."""
+    return {
+        "time": time,
+        "type": "buy" if from_currency == "EUR" else "sell",
+        "cryptoAmount": crypto_amount,
+        "rate": eur_amount / crypto_amount,
+        "eurAmount": eur_amount,
+        "source": "Coinmotion",
+        "fromCurrency": from_currency,
+        "toCurrency": to_currency,
+        "fee": fee,
+        "feeCurrency": "EUR",
+    }
+
+
+def generate_rows(count, seed=1, currencies=DEFAULT_CURRENCIES):
+    """Yields ``count`` CSV rows (as lists of strings) in time order."""
+    rnd = random.Random(seed)
+    local_tz = timezone(timedelta(hours=2))
+    time = datetime(2014, 1, 1, tzinfo=local_tz)
+    rates = {currency: rnd.uniform(1, 40000) for currency in currencies}
+    held = {currency: 0.0 for currency in currencies}
+
+    for _ in range(count):
+        time += timedelta(seconds=rnd.choice([1, 60, 3600, 86400]))
+        currency = rnd.choice(currencies)
+        rates[currency] = min(max(rates[currency] * rnd.uniform(0.97, 1.03), 0.5), 100000.0)
+        rate = round(rates[currency], 2)
+        roll = rnd.random()
+        stamp = time.isoformat()
+
+        if roll < 0.03:
+            yield ["deposit", "EUR", "EUR", "100", "", "", "", "EUR", stamp]
+        elif roll < 0.06:
+            quantity = round(rnd.uniform(0.001, 0.5), 8)
+            held[currency] += quantity
+            yield ["account_transfer_in", currency, currency, "", str(quantity), str(rate), "0", currency, stamp]
+        elif roll < 0.7 or held[currency] < 0.0001:
+            eur = round(rnd.choice([10, 25, 50, 100, 500]) * rnd.uniform(0.9, 1.1), 2)
+            quantity = round(eur / rate, 8)
+            held[currency] += quantity
+            yield ["buy", "EUR", currency, str(eur), str(quantity), str(rate), str(round(eur * 0.015, 2)), "EUR", stamp]
+        else:
+            quantity = round(held[currency] * rnd.uniform(0.05, 0.6), 8)
+            held[currency] -= quantity
+            eur = round(quantity * rate, 2)
+            yield ["sell", currency, "EUR", str(eur), str(quantity), str(rate), str(round(eur * 0.015, 2)), "EUR", stamp]
+
+
+def generate_csv(count, seed=1, currencies=DEFAULT_CURRENCIES):
+    """Returns a synthetic export with ``count`` rows as a string."""
+    lines = [",".join(HEADER)]
+    lines.extend(",".join(row) for row in generate_rows(count, seed, currencies))
+    return "\n".join(lines) + "\n"
+
+
+def write_csv(path, count, seed=1, currencies=DEFAULT_CURRENCIES):
+    with open(path, "w", encoding="utf-8", newline="") as handle:
+        handle.write(",".join(HEADER) + "\n")
+        for row in generate_rows(count, seed, currencies):
+            handle.write(",".join(row) + "\n")
+    return path
@@ -1,2 +1,18 @@
 EPSILON = 1e-13
-REPORT_VERSION = "0.1.0"
+# Fixed-point mode: decimals of a crypto unit (satoshi = 8, wei = 18).
+FIXED_POINT_DECIMALS = 8
+CRYPTO_DECIMALS = {"ETH": 18}
+REPORT_VERSION = "0.2.0"
+PDF_WORKERS = 1
+XLS_WORKERS = 1
+# Processes for main.py --batch; None uses one per CPU.
+BATCH_WORKERS = None
+REPORT_WORKERS = 2
+REPORT_QUEUE_DEPTH = 8
+REPORT_CACHE_MAX_BYTES = 256 * 1024 * 1024
+REPORT_CACHE_DIR = None
+REPORT_CACHE_DISK_MAX_BYTES = 1024 * 1024 * 1024
+JOB_RESULTS_MAX_BYTES = 512 * 1024 * 1024
+JOB_RESULT_TTL_SECONDS = 60 * 60
+JOB_MAX_JOBS = 1000
+SERVER_TIMING = False
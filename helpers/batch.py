@@ -0,0 +1,130 @@
+import glob
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from config import BATCH_WORKERS, REPORT_VERSION
+from processor import create_tax_report
+from readers import get_reader
+from writers import WRITERS, get_writer
+
+MANIFEST_NAME = "manifest.json"
+
+
+def find_inputs(source):
+    """Returns the .csv files in a directory, or the files matching a glob pattern, sorted."""
+    if os.path.isdir(source):
+        paths = [os.path.join(source, name) for name in os.listdir(source) if name.endswith(".csv")]
+    else:
+        paths = [path for path in glob.glob(source) if os.path.isfile(path)]
+    if not paths:
+        raise ValueError(f"No .csv files found for {source!r}")
+    return sorted(paths)
+
+
+def run_batch(paths, output_root="./output/", output_formats=("pdf",), reader="csv", workers=BATCH_WORKERS,
+              fixed_point=False, progress=None):
+    """
+    Processes each export into its own subdirectory of output_root and
+    writes a manifest.json there describing every file. output_formats
+    and reader are names from writers.WRITERS and readers.READERS.
+    A failing file is recorded in the manifest with its error and does not
+    stop the others. With more than one worker (None means one per CPU)
+    files are processed in a process pool, so each worker pays the import
+    cost once for all the files it handles. progress(entry) is called as
+    each file finishes. Returns the manifest.
+    """
+    for output_format in output_formats:
+        if output_format not in WRITERS:
+            raise ValueError(f"Unknown output format {output_format!r}, expected one of {WRITERS.names()}")
+    os.makedirs(output_root, exist_ok=True)
+    jobs = list(zip(paths, _output_folders(paths, output_root)))
+    started = time.time()
+    entries = {}
+
+    if workers == 1 or len(jobs) <= 1:
+        for path, output_folder in jobs:
+            entries[path] = process_file(path, output_folder, output_formats, reader, fixed_point)
+            if progress is not None:
+                progress(entries[path])
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {
+                pool.submit(process_file, path, output_folder, output_formats, reader, fixed_point): (path, output_folder)
+                for path, output_folder in jobs
+            }
+            for future in as_completed(futures):
+                path, output_folder = futures[future]
+                try:
+                    entries[path] = future.result()
+                except Exception as error:
+                    # The worker itself died, e.g. BrokenProcessPool.
+                    entries[path] = _failed_entry(path, output_folder, error, 0.0)
+                if progress is not None:
+                    progress(entries[path])
+
+    files = [entries[path] for path, _ in jobs]
+    manifest = {
+        "reportVersion": REPORT_VERSION,
+        "startedAt": started,
+        "finishedAt": time.time(),
+        "succeeded": sum(1 for entry in files if entry["status"] == "ok"),
+        "failed": sum(1 for entry in files if entry["status"] == "failed"),
+        "files": files,
+    }
+    with open(os.path.join(output_root, MANIFEST_NAME), "w", encoding="utf-8") as handle:
+        json.dump(manifest, handle, indent=2)
+    return manifest
+
+
+def process_file(path, output_folder, output_formats=("pdf",), reader="csv", fixed_point=False):
+    """Writes the report of one export into output_folder. Returns its manifest entry; never raises."""
+    started = time.perf_counter()
+    try:
+        result = create_tax_report(get_reader(reader)(path), fixed_point=fixed_point)
+        if not result:
+            raise ValueError("No transactions found in the CSV file.")
+        for output_format in output_formats:
+            get_writer(output_format)(result, output_folder)
+    except Exception as error:
+        return _failed_entry(path, output_folder, error, time.perf_counter() - started)
+
+    return {
+        "input": path,
+        "output": output_folder,
+        "status": "ok",
+        "error": None,
+        "seconds": time.perf_counter() - started,
+        "currencies": list(result),
+        "rows": sum(len(data["transactions"]) for data in result.values()),
+    }
+
+
+def _failed_entry(path, output_folder, error, seconds):
+    return {
+        "input": path,
+        "output": output_folder,
+        "status": "failed",
+        "error": f"{type(error).__name__}: {error}",
+        "seconds": seconds,
+        "currencies": [],
+        "rows": 0,
+    }
+
+
+def _output_folders(paths, output_root):
+    # One subdirectory per export, named after the file; repeated names
+    # (same file name in different directories) get a numeric suffix.
+    folders = []
+    used = set()
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        candidate = name
+        suffix = 2
+        while candidate in used:
+            candidate = f"{name}-{suffix}"
+            suffix += 1
+        used.add(candidate)
+        folders.append(os.path.join(output_root, candidate))
+    return folders
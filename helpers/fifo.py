@@ -1,79 +1,345 @@
-from collections import deque
+from array import array
 from dataclasses import dataclass
-from datetime import datetime, timedelta
+from datetime import datetime
+from typing import NamedTuple
 
-from config import EPSILON
+from config import EPSILON, FIXED_POINT_DECIMALS
 
+LONG_HOLD_SECONDS = 3650 * 24 * 60 * 60
+COMPACT_THRESHOLD = 4096
 
-@dataclass
+
+@dataclass(slots=True)
 class Lot:
     quantity: float
     price: float
-    time: datetime
+    time: float
+
+
+class ConsumedLot(NamedTuple):
+    quantity: float
+    price: float
+    time: float
+
+
+class FixedConsumedLot(NamedTuple):
+    quantity: int
+    cost: int
+    revenue: int
+    assumed_cost: int
+    time: float
+
+
+class LotStore:
+    """
+    Column-oriented lot storage for FIFO.
+    Lots live in parallel arrays (quantity, price, epoch time) and the oldest
+    open lot is addressed by a head index, so consuming lots never shifts or
+    reallocates the columns.
+    """
+
+    __slots__ = ("quantities", "prices", "times", "head")
+
+    def __init__(self):
+        self.quantities = array("d")
+        self.prices = array("d")
+        self.times = array("d")
+        self.head = 0
+
+    def __len__(self):
+        return len(self.quantities) - self.head
+
+    def __getitem__(self, index):
+        size = len(self)
+        if index < 0:
+            index += size
+        if not 0 <= index < size:
+            raise IndexError("lot index out of range")
+        position = self.head + index
+        return Lot(self.quantities[position], self.prices[position], self.times[position])
+
+    def __iter__(self):
+        for position in range(self.head, len(self.quantities)):
+            yield Lot(self.quantities[position], self.prices[position], self.times[position])
+
+    def append(self, quantity, price, time):
+        self.quantities.append(quantity)
+        self.prices.append(price)
+        self.times.append(time)
+
+    def compact(self):
+        """Releases consumed lots once they make up most of the columns."""
+        head = self.head
+        if head == len(self.quantities):
+            del self.quantities[:], self.prices[:], self.times[:]
+            self.head = 0
+        elif head >= COMPACT_THRESHOLD and head * 2 >= len(self.quantities):
+            del self.quantities[:head], self.prices[:head], self.times[:head]
+            self.head = 0
 
 
 class FIFO:
     def __init__(self):
-        self.queue = deque()
+        self.queue = LotStore()
+        # Running totals of the open lots, kept in step with the queue so that
+        # reads are O(1) instead of re-summing every lot.
+        self._open_quantity = 0.0
+        self._open_cost = 0.0
 
     def add_purchase(self, quantity, price, time):
-        """Adds a purchase to the FIFO queue."""
+        """Adds a purchase to the FIFO queue. Time is a datetime or epoch seconds."""
         if quantity <= 0:
             raise ValueError("Purchase quantity must be positive")
         if price < 0:
             raise ValueError("Purchase price cannot be negative")
-        if not isinstance(time, datetime):
-            raise ValueError("Purchase time must be a datetime")
-        self.queue.append(Lot(quantity, price, time))
+        self.queue.append(quantity, price, _to_epoch(time, "Purchase time must be a datetime or epoch seconds"))
+        self._open_quantity += quantity
+        self._open_cost += quantity * price
 
     def calculate_cogs(self, quantity_sold, sold_time, total_revenue):
-        """Calculates cost of goods sold and acquisition cost assumption using FIFO."""
+        """
+        Calculates cost of goods sold and acquisition cost assumption using FIFO.
+        Consumed lots are returned as ConsumedLot tuples with epoch times.
+        """
         if quantity_sold <= 0:
             raise ValueError("Sell quantity must be positive")
-        if not isinstance(sold_time, datetime):
-            raise ValueError("Sell time must be a datetime")
+        sold_epoch = _to_epoch(sold_time, "Sell time must be a datetime or epoch seconds")
         if total_revenue < 0:
             raise ValueError("Total revenue cannot be negative")
 
+        store = self.queue
+        quantities = store.quantities
+        prices = store.prices
+        times = store.times
+        head = store.head
+        end = len(quantities)
+
         cogs = 0.0
         assumed_cost = 0.0
+        consumed_cost = 0.0
         consumed_lots = []
         price_per_unit = total_revenue / quantity_sold if quantity_sold else 0.0
         remaining_to_sell = quantity_sold
 
-        while remaining_to_sell > EPSILON:
-            if not self.queue:
-                if remaining_to_sell <= EPSILON:
-                    break
-                raise ValueError("Not enough inventory to sell")
-
-            lot = self.queue.popleft()
-            sell_qty = min(lot.quantity, remaining_to_sell)
-            lot_held_long = (sold_time - lot.time) >= timedelta(days=3650)
-            assumed_rate = 0.4 if lot_held_long else 0.2
-            proceeds_portion = sell_qty * price_per_unit
-
-            if lot.quantity <= remaining_to_sell + EPSILON:
-                cogs += lot.quantity * lot.price
-                assumed_cost += proceeds_portion * assumed_rate
-                consumed_lots.append({
-                    "quantity": lot.quantity,
-                    "price": lot.price,
-                    "time": lot.time,
-                })
-                remaining_to_sell -= lot.quantity
-            else:
-                cogs += remaining_to_sell * lot.price
-                assumed_cost += proceeds_portion * assumed_rate
-                consumed_lots.append({
-                    "quantity": remaining_to_sell,
-                    "price": lot.price,
-                    "time": lot.time,
-                })
-                self.queue.appendleft(Lot(lot.quantity - remaining_to_sell, lot.price, lot.time))
-                remaining_to_sell = 0.0
+        try:
+            while remaining_to_sell > EPSILON:
+                if head == end:
+                    raise ValueError("Not enough inventory to sell")
+
+                lot_quantity = quantities[head]
+                lot_price = prices[head]
+                lot_time = times[head]
+                lot_held_long = (sold_epoch - lot_time) >= LONG_HOLD_SECONDS
+                assumed_rate = 0.4 if lot_held_long else 0.2
+                assumed_cost += min(lot_quantity, remaining_to_sell) * price_per_unit * assumed_rate
+
+                if lot_quantity <= remaining_to_sell + EPSILON:
+                    cogs += lot_quantity * lot_price
+                    consumed_lots.append(ConsumedLot(lot_quantity, lot_price, lot_time))
+                    self._open_quantity -= lot_quantity
+                    consumed_cost += lot_quantity * lot_price
+                    remaining_to_sell -= lot_quantity
+                    head += 1
+                else:
+                    cogs += remaining_to_sell * lot_price
+                    consumed_lots.append(ConsumedLot(remaining_to_sell, lot_price, lot_time))
+                    quantities[head] = lot_quantity - remaining_to_sell
+                    self._open_quantity -= remaining_to_sell
+                    consumed_cost += remaining_to_sell * lot_price
+                    remaining_to_sell = 0.0
+        finally:
+            store.head = head
+            self._open_cost -= consumed_cost
+            store.compact()
+
+        if not store:
+            # Drop accumulated float drift once the inventory is empty.
+            self._open_quantity = 0.0
+            self._open_cost = 0.0
 
         return cogs, assumed_cost, consumed_lots
 
+    def to_state(self):
+        """Returns the open lots and running totals as plain values."""
+        store = self.queue
+        head = store.head
+        return {
+            "quantities": store.quantities[head:].tobytes(),
+            "prices": store.prices[head:].tobytes(),
+            "times": store.times[head:].tobytes(),
+            "openQuantity": self._open_quantity,
+            "openCost": self._open_cost,
+        }
+
+    @classmethod
+    def from_state(cls, state):
+        """Rebuilds a FIFO from the values returned by to_state."""
+        fifo = cls()
+        store = fifo.queue
+        store.quantities.frombytes(state["quantities"])
+        store.prices.frombytes(state["prices"])
+        store.times.frombytes(state["times"])
+        if not len(store.quantities) == len(store.prices) == len(store.times):
+            raise ValueError("FIFO state columns have different lengths")
+        fifo._open_quantity = state["openQuantity"]
+        fifo._open_cost = state["openCost"]
+        return fifo
+
     def remaining_quantity(self):
-        return sum(lot.quantity for lot in self.queue)
\ No newline at end of file
+        return self._open_quantity
+
+    def remaining_cost(self):
+        """Returns the cost basis of the lots still held, in EUR."""
+        return self._open_cost
+
+
+class FixedPointFIFO:
+    """
+    FIFO in exact integer arithmetic.
+    Quantities are counted in the currency's smallest unit (10 ** -decimals,
+    e.g. satoshis with 8 decimals) and money in euro cents. Every lot keeps
+    the total it cost instead of a unit price; a partial sale takes a rounded
+    share of it and leaves the rest in the lot, so the costs of all sales and
+    open lots always add up to exactly what was paid.
+    """
+
+    def __init__(self, decimals=FIXED_POINT_DECIMALS):
+        self.decimals = decimals
+        self.scale = 10 ** decimals
+        # Plain lists: unit counts can exceed 64 bits (e.g. wei).
+        self.quantities = []
+        self.costs = []
+        self.times = []
+        self.head = 0
+        self._open_quantity = 0
+        self._open_cost = 0
+
+    def __len__(self):
+        return len(self.quantities) - self.head
+
+    def to_units(self, amount):
+        """Converts a crypto amount to an integer count of smallest units."""
+        return to_fixed(amount, self.decimals)
+
+    def add_purchase(self, quantity, cost, time):
+        """Adds a purchase of quantity units that cost `cost` cents in total."""
+        if quantity <= 0:
+            raise ValueError("Purchase quantity must be positive")
+        if cost < 0:
+            raise ValueError("Purchase cost cannot be negative")
+        self.quantities.append(quantity)
+        self.costs.append(cost)
+        self.times.append(_to_epoch(time, "Purchase time must be a datetime or epoch seconds"))
+        self._open_quantity += quantity
+        self._open_cost += cost
+
+    def calculate_cogs(self, quantity_sold, sold_time, total_revenue):
+        """
+        Matches a sale of quantity_sold units for total_revenue cents.
+        Revenue is shared between the consumed lots in proportion to their
+        units, the last lot taking the rounding remainder. Returns cogs and
+        assumed cost in cents and the consumed lots as FixedConsumedLot tuples.
+        """
+        if quantity_sold <= 0:
+            raise ValueError("Sell quantity must be positive")
+        sold_epoch = _to_epoch(sold_time, "Sell time must be a datetime or epoch seconds")
+        if total_revenue < 0:
+            raise ValueError("Total revenue cannot be negative")
+
+        quantities = self.quantities
+        costs = self.costs
+        times = self.times
+        head = self.head
+        end = len(quantities)
+
+        cogs = 0
+        assumed_cost = 0
+        revenue_allocated = 0
+        consumed_lots = []
+        remaining_to_sell = quantity_sold
+
+        try:
+            while remaining_to_sell:
+                if head == end:
+                    raise ValueError("Not enough inventory to sell")
+
+                lot_quantity = quantities[head]
+                lot_cost = costs[head]
+                lot_time = times[head]
+                if lot_quantity <= remaining_to_sell:
+                    quantity = lot_quantity
+                    cost = lot_cost
+                    head += 1
+                else:
+                    quantity = remaining_to_sell
+                    cost = share(lot_cost, quantity, lot_quantity)
+                    quantities[head] = lot_quantity - quantity
+                    costs[head] = lot_cost - cost
+                remaining_to_sell -= quantity
+
+                if remaining_to_sell:
+                    revenue = share(total_revenue, quantity, quantity_sold)
+                else:
+                    revenue = total_revenue - revenue_allocated
+                revenue_allocated += revenue
+                lot_held_long = (sold_epoch - lot_time) >= LONG_HOLD_SECONDS
+                lot_assumed_cost = share(revenue, 4 if lot_held_long else 2, 10)
+
+                cogs += cost
+                assumed_cost += lot_assumed_cost
+                consumed_lots.append(FixedConsumedLot(quantity, cost, revenue, lot_assumed_cost, lot_time))
+                self._open_quantity -= quantity
+                self._open_cost -= cost
+        finally:
+            self.head = head
+            self._compact()
+
+        return cogs, assumed_cost, consumed_lots
+
+    def remaining_quantity(self):
+        """Returns the units still held."""
+        return self._open_quantity
+
+    def remaining_cost(self):
+        """Returns the cost basis of the lots still held, in cents."""
+        return self._open_cost
+
+    def _compact(self):
+        head = self.head
+        if head == len(self.quantities):
+            del self.quantities[:], self.costs[:], self.times[:]
+            self.head = 0
+        elif head >= COMPACT_THRESHOLD and head * 2 >= len(self.quantities):
+            del self.quantities[:head], self.costs[:head], self.times[:head]
+            self.head = 0
+
+
+def to_fixed(amount, decimals):
+    """
+    Converts an amount to an integer count of 10 ** -decimals units.
+    Floats are taken at their shortest decimal representation, so 0.1 is
+    exactly one tenth; digits beyond `decimals` are rounded half to even.
+    """
+    if isinstance(amount, int):
+        return amount * 10 ** decimals
+    text = repr(amount)
+    whole, _, fraction = text.partition(".")
+    if len(fraction) <= decimals and fraction.isdigit():
+        # Fast path: the digits already fit, no rounding needed.
+        return int(whole + fraction.ljust(decimals, "0"))
+    from decimal import ROUND_HALF_EVEN, Decimal
+
+    return int(Decimal(text).scaleb(decimals).to_integral_value(ROUND_HALF_EVEN))
+
+
+def share(total, part, whole):
+    """Returns total * part / whole in integers, rounded half up."""
+    return (2 * total * part + whole) // (2 * whole)
+
+
+def _to_epoch(value, message):
+    if isinstance(value, datetime):
+        return value.timestamp()
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return float(value)
+    raise ValueError(message)
@@ -0,0 +1,228 @@
+import contextvars
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+_profile = contextvars.ContextVar("profile", default=None)
+_listeners = []
+_listeners_lock = threading.Lock()
+
+
+class StageRecord:
+    """Wall time, row count and allocation peak of one pipeline stage run."""
+
+    __slots__ = ("name", "seconds", "rows", "peak_bytes", "labels")
+
+    def __init__(self, name, rows=None, labels=None):
+        self.name = name
+        self.seconds = 0.0
+        self.rows = rows
+        self.peak_bytes = None
+        self.labels = labels or {}
+
+    def to_dict(self):
+        return {
+            "stage": self.name,
+            "seconds": self.seconds,
+            "rows": self.rows,
+            "peakBytes": self.peak_bytes,
+            **self.labels,
+        }
+
+
+class Profile:
+    """
+    Stage records collected by recording().
+    With trace_memory, each stage also records its peak traced allocation
+    above what was allocated when it started. Tracing slows the pipeline
+    down considerably, so timings from such a run are only indicative.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.records = []
+        self._stack = []
+
+    def summary(self):
+        """Aggregates the records per stage name, in the order first seen."""
+        stages = {}
+        for record in self.records:
+            entry = stages.setdefault(
+                record.name, {"stage": record.name, "calls": 0, "seconds": 0.0, "rows": None, "peakBytes": None}
+            )
+            entry["calls"] += 1
+            entry["seconds"] += record.seconds
+            if record.rows is not None:
+                entry["rows"] = (entry["rows"] or 0) + record.rows
+            if record.peak_bytes is not None:
+                entry["peakBytes"] = max(entry["peakBytes"] or 0, record.peak_bytes)
+        return list(stages.values())
+
+    def format_table(self):
+        lines = [f"{'stage':<26} {'calls':>6} {'seconds':>10} {'rows':>10} {'peak MB':>9}"]
+        for entry in self.summary():
+            rows = "" if entry["rows"] is None else entry["rows"]
+            peak = "" if entry["peakBytes"] is None else f"{entry['peakBytes'] / 1e6:.1f}"
+            lines.append(f"{entry['stage']:<26} {entry['calls']:>6} {entry['seconds']:>10.3f} {rows:>10} {peak:>9}")
+        return "\n".join(lines)
+
+
+class StageMetrics:
+    """
+    Listener that keeps running totals per stage for a metrics endpoint.
+    Register it with add_listener(); it is safe to call from any thread.
+    """
+
+    def __init__(self):
+        self._stages = {}
+        self._lock = threading.Lock()
+
+    def __call__(self, record):
+        with self._lock:
+            entry = self._stages.setdefault(record.name, [0, 0.0, 0, 0.0])
+            entry[0] += 1
+            entry[1] += record.seconds
+            entry[2] += record.rows or 0
+            entry[3] = max(entry[3], record.seconds)
+
+    def prometheus(self, prefix="coinmotion"):
+        with self._lock:
+            stages = {name: list(entry) for name, entry in self._stages.items()}
+        metrics = (
+            ("stage_calls_total", "counter", "Completed runs of a pipeline stage.", 0),
+            ("stage_seconds_total", "counter", "Wall time spent in a pipeline stage.", 1),
+            ("stage_rows_total", "counter", "Rows handled by a pipeline stage.", 2),
+            ("stage_seconds_max", "gauge", "Slowest single run of a pipeline stage.", 3),
+        )
+        lines = []
+        for name, kind, help_text, index in metrics:
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} {kind}")
+            for stage_name, entry in stages.items():
+                lines.append(f'{prefix}_{name}{{stage="{stage_name}"}} {entry[index]}')
+        return lines
+
+
+def add_listener(callback):
+    """Calls callback(StageRecord) for every stage finished in any thread."""
+    with _listeners_lock:
+        _listeners.append(callback)
+
+
+def remove_listener(callback):
+    with _listeners_lock:
+        _listeners.remove(callback)
+
+
+def active():
+    """True when stage records would go anywhere."""
+    return _profile.get() is not None or bool(_listeners)
+
+
+@contextmanager
+def recording(trace_memory=False):
+    """Collects the stages run in the current context into a Profile."""
+    profile = Profile(trace_memory)
+    started_tracing = trace_memory and not tracemalloc.is_tracing()
+    if started_tracing:
+        tracemalloc.start()
+    token = _profile.set(profile)
+    try:
+        yield profile
+    finally:
+        _profile.reset(token)
+        if started_tracing:
+            tracemalloc.stop()
+
+
+@contextmanager
+def stage(name, rows=None, **labels):
+    """
+    Times the enclosed block as one run of a stage. The yielded StageRecord
+    can be updated, e.g. with the row count once it is known. Costs next to
+    nothing when no profile is recording and no listener is registered.
+    """
+    record = StageRecord(name, rows, labels)
+    profile = _profile.get()
+    if profile is None and not _listeners:
+        yield record
+        return
+
+    tracing = profile is not None and profile.trace_memory and tracemalloc.is_tracing()
+    if tracing:
+        current, peak = tracemalloc.get_traced_memory()
+        if profile._stack:
+            # Keep the enclosing stage's peak before this stage resets it.
+            profile._stack[-1][1] = max(profile._stack[-1][1], peak)
+        profile._stack.append([current, 0])
+        tracemalloc.reset_peak()
+
+    started = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record.seconds = time.perf_counter() - started
+        if tracing:
+            start_current, child_peak = profile._stack.pop()
+            peak = max(tracemalloc.get_traced_memory()[1], child_peak)
+            record.peak_bytes = peak - start_current
+            if profile._stack:
+                profile._stack[-1][1] = max(profile._stack[-1][1], peak)
+        _emit(record, profile)
+
+
+def record_stage(name, seconds, rows=None, **labels):
+    """Records a stage that was timed elsewhere, e.g. in a worker process."""
+    profile = _profile.get()
+    if profile is None and not _listeners:
+        return
+    record = StageRecord(name, rows, labels)
+    record.seconds = seconds
+    _emit(record, profile)
+
+
+def timed_iter(name, iterable, **labels):
+    """
+    Wraps a lazy iterator and records the time spent producing its items as
+    one stage, with the item count as rows. Returns iterable unchanged when
+    nothing is recording.
+    """
+    if not active():
+        return iterable
+    return _timed_iter(name, iterable, labels)
+
+
+def _timed_iter(name, iterable, labels):
+    iterator = iter(iterable)
+    seconds = 0.0
+    rows = 0
+    perf_counter = time.perf_counter
+    try:
+        while True:
+            started = perf_counter()
+            try:
+                item = next(iterator)
+            except StopIteration:
+                seconds += perf_counter() - started
+                return
+            seconds += perf_counter() - started
+            rows += 1
+            yield item
+    finally:
+        record_stage(name, seconds, rows, **labels)
+
+
+def server_timing(records):
+    """Formats stage records as a Server-Timing header value, summed per stage."""
+    totals = {}
+    for record in records:
+        totals[record.name] = totals.get(record.name, 0.0) + record.seconds
+    return ", ".join(f"{name};dur={seconds * 1000:.1f}" for name, seconds in totals.items())
+
+
+def _emit(record, profile):
+    if profile is not None:
+        profile.records.append(record)
+    for listener in tuple(_listeners):
+        listener(record)
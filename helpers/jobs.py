@@ -0,0 +1,133 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+from config import JOB_MAX_JOBS, JOB_RESULT_TTL_SECONDS, JOB_RESULTS_MAX_BYTES
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+EXPIRED = "expired"
+
+
+class Job:
+    """State of one background report job. Progress fields are updated by the worker."""
+
+    def __init__(self, year=None):
+        self.id = uuid.uuid4().hex
+        self.year = year
+        self.status = QUEUED
+        self.error = None
+        self.result = None
+        self.result_size = 0
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.rows_parsed = 0
+        self.transactions_total = 0
+        self.transactions_matched = 0
+        self.pdfs_total = 0
+        self.pdfs_rendered = 0
+
+    def to_dict(self):
+        return {
+            "id": self.id,
+            "status": self.status,
+            "year": self.year,
+            "error": self.error,
+            "createdAt": self.created_at,
+            "startedAt": self.started_at,
+            "finishedAt": self.finished_at,
+            "resultBytes": self.result_size,
+            "progress": {
+                "rowsParsed": self.rows_parsed,
+                "transactionsTotal": self.transactions_total,
+                "transactionsMatched": self.transactions_matched,
+                "pdfsTotal": self.pdfs_total,
+                "pdfsRendered": self.pdfs_rendered,
+            },
+        }
+
+
+class JobStore:
+    """
+    Keeps jobs and their results under a retention policy.
+    Finished results are dropped oldest first once their total size exceeds
+    max_bytes or they are older than ttl_seconds; the job then reports
+    status "expired". At most max_jobs jobs are remembered.
+    """
+
+    def __init__(self, max_bytes=JOB_RESULTS_MAX_BYTES, ttl_seconds=JOB_RESULT_TTL_SECONDS,
+                 max_jobs=JOB_MAX_JOBS):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.max_jobs = max_jobs
+        self._jobs = OrderedDict()
+        self._result_bytes = 0
+        self._lock = threading.Lock()
+
+    def create(self, year=None):
+        job = Job(year)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._enforce_retention()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            self._enforce_retention()
+            return self._jobs.get(job_id)
+
+    def start(self, job):
+        job.started_at = time.time()
+        job.status = RUNNING
+
+    def finish(self, job, result):
+        with self._lock:
+            if job.id not in self._jobs:
+                # Deleted while it was running; nobody can fetch the result.
+                return
+            job.result = result
+            job.result_size = len(result)
+            job.finished_at = time.time()
+            job.status = DONE
+            self._result_bytes += job.result_size
+            self._enforce_retention()
+
+    def fail(self, job, error):
+        with self._lock:
+            job.error = error
+            job.finished_at = time.time()
+            job.status = FAILED
+            self._enforce_retention()
+
+    def delete(self, job_id):
+        """Forgets a job and drops its result. Returns the job, or None if unknown."""
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is not None:
+                self._expire(job)
+            return job
+
+    def _enforce_retention(self):
+        now = time.time()
+        for job in self._jobs.values():
+            if job.result is not None and (
+                self._result_bytes > self.max_bytes or now - job.finished_at > self.ttl_seconds
+            ):
+                self._expire(job)
+
+        while len(self._jobs) > self.max_jobs:
+            oldest = next(iter(self._jobs.values()))
+            if oldest.status in (QUEUED, RUNNING):
+                break
+            self._expire(oldest)
+            del self._jobs[oldest.id]
+
+    def _expire(self, job):
+        if job.result is not None:
+            self._result_bytes -= job.result_size
+            job.result = None
+        job.status = EXPIRED
@@ -0,0 +1,31 @@
+from importlib import import_module
+
+
+class LazyRegistry:
+    """
+    Maps format names to "package.module:attribute" targets.
+    A target's module is imported the first time its format is requested,
+    so heavy dependencies (ReportLab, openpyxl, NumPy) are only loaded by
+    runs that use them.
+    """
+
+    def __init__(self, kind, targets=None):
+        self.kind = kind
+        self._targets = dict(targets or {})
+
+    def register(self, name, target):
+        self._targets[name] = target
+
+    def names(self):
+        return sorted(self._targets)
+
+    def get(self, name):
+        try:
+            target = self._targets[name]
+        except KeyError:
+            raise ValueError(f"Unknown {self.kind} format {name!r}, expected one of {self.names()}") from None
+        module_name, _, attribute = target.partition(":")
+        return getattr(import_module(module_name), attribute)
+
+    def __contains__(self, name):
+        return name in self._targets
@@ -0,0 +1,152 @@
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from config import REPORT_CACHE_DIR, REPORT_CACHE_DISK_MAX_BYTES, REPORT_CACHE_MAX_BYTES, REPORT_VERSION
+
+# Rough in-memory footprint of one parsed or processed transaction, used to
+# weigh cached reports against rendered zips.
+TRANSACTION_SIZE_ESTIMATE = 600
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+class ReportCache:
+    """
+    Content-addressed LRU cache for report artifacts.
+    Entries are evicted least recently used first once their total size
+    exceeds max_bytes. When a directory is given, byte artifacts (rendered
+    zips) are also kept on disk, bounded by disk_max_bytes, and survive
+    restarts.
+    """
+
+    def __init__(self, max_bytes=REPORT_CACHE_MAX_BYTES, directory=REPORT_CACHE_DIR,
+                 disk_max_bytes=REPORT_CACHE_DISK_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.disk_max_bytes = disk_max_bytes
+        self._entries = OrderedDict()
+        self._size = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._disk_hits = 0
+        self._misses = 0
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self._hits += 1
+                return entry[0]
+
+        value = self._read_disk(key)
+        with self._lock:
+            if value is None:
+                self._misses += 1
+                return None
+            self._disk_hits += 1
+        self._store(key, value, len(value))
+        return value
+
+    def put(self, key, value, size):
+        """Caches value under key. Values larger than max_bytes are skipped."""
+        if size > self.max_bytes:
+            return
+        self._store(key, value, size)
+        if isinstance(value, bytes):
+            self._write_disk(key, value)
+
+    def metrics(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._size,
+                "maxBytes": self.max_bytes,
+                "hits": self._hits,
+                "diskHits": self._disk_hits,
+                "misses": self._misses,
+            }
+
+    def _store(self, key, value, size):
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._size -= previous[1]
+            self._entries[key] = (value, size)
+            self._size += size
+            while self._size > self.max_bytes and self._entries:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._size -= evicted_size
+
+    def _disk_path(self, key):
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".bin")
+
+    def _read_disk(self, key):
+        if not self.directory:
+            return None
+        path = self._disk_path(key)
+        try:
+            with open(path, "rb") as handle:
+                value = handle.read()
+        except OSError:
+            return None
+        # Refresh the modification time so disk eviction is also LRU.
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return value
+
+    def _write_disk(self, key, value):
+        if not self.directory or len(value) > self.disk_max_bytes:
+            return
+        path = self._disk_path(key)
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(temp_path, "wb") as handle:
+                handle.write(value)
+            os.replace(temp_path, path)
+        except OSError:
+            return
+        self._trim_disk()
+
+    def _trim_disk(self):
+        files = []
+        for name in os.listdir(self.directory):
+            if not name.endswith(".bin"):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if total <= self.disk_max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+
+
+def upload_digest(file):
+    """Returns the SHA-256 hex digest of a binary file and rewinds it."""
+    digest = hashlib.sha256()
+    file.seek(0)
+    for block in iter(lambda: file.read(_HASH_CHUNK_SIZE), b""):
+        digest.update(block)
+    file.seek(0)
+    return digest.hexdigest()
+
+
+def cache_key(kind, digest, year=None):
+    """Builds a cache key from the artifact kind, upload digest, REPORT_VERSION and year."""
+    return f"{kind}:{digest}:{REPORT_VERSION}:{'all' if year is None else year}"
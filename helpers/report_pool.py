@@ -0,0 +1,142 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from config import REPORT_QUEUE_DEPTH, REPORT_WORKERS
+
+
+class PoolSaturated(Exception):
+    """Raised when every worker is busy and the job queue is full."""
+
+
+class ReportPool:
+    """
+    Bounded worker pool for report jobs.
+    CSV parsing, FIFO matching and rendering run in worker threads instead of
+    on the event loop. At most `workers` jobs run at once and at most
+    `queue_depth` more wait for a worker; reserve() raises PoolSaturated
+    beyond that so callers can shed load.
+    """
+
+    def __init__(self, workers=REPORT_WORKERS, queue_depth=REPORT_QUEUE_DEPTH):
+        self.workers = workers
+        self.queue_depth = queue_depth
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="report")
+        self._lock = threading.Lock()
+        self._in_flight = 0
+        self._running = 0
+        self._completed = 0
+        self._failed = 0
+        self._rejected = 0
+        self._latency_total = 0.0
+        self._latency_max = 0.0
+        self._wait_total = 0.0
+
+    def reserve(self):
+        """Reserves a job slot, or raises PoolSaturated."""
+        with self._lock:
+            if self._in_flight >= self.workers + self.queue_depth:
+                self._rejected += 1
+                raise PoolSaturated("Report workers are busy")
+            self._in_flight += 1
+        return ReportJob(self)
+
+    def metrics(self):
+        with self._lock:
+            finished = self._completed + self._failed
+            return {
+                "workers": self.workers,
+                "queueDepth": self.queue_depth,
+                "inFlight": self._in_flight,
+                "running": self._running,
+                "queued": max(self._in_flight - self._running, 0),
+                "completed": self._completed,
+                "failed": self._failed,
+                "rejected": self._rejected,
+                "latencySecondsTotal": self._latency_total,
+                "latencySecondsAvg": self._latency_total / finished if finished else 0.0,
+                "latencySecondsMax": self._latency_max,
+                "queueWaitSecondsTotal": self._wait_total,
+            }
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _call(self, submitted, fn, args):
+        started = time.perf_counter()
+        with self._lock:
+            self._running += 1
+            self._wait_total += started - submitted
+        try:
+            return fn(*args)
+        finally:
+            with self._lock:
+                self._running -= 1
+
+    def _finish(self, elapsed, failed):
+        with self._lock:
+            self._in_flight -= 1
+            if failed:
+                self._failed += 1
+            else:
+                self._completed += 1
+            self._latency_total += elapsed
+            self._latency_max = max(self._latency_max, elapsed)
+
+
+class ReportJob:
+    """A reserved slot in a ReportPool. Released exactly once."""
+
+    def __init__(self, pool):
+        self._pool = pool
+        self._started = time.perf_counter()
+        self._released = False
+
+    async def run(self, fn, *args):
+        """Runs fn(*args) on a pool worker and returns its result."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._pool._executor, self._pool._call, time.perf_counter(), fn, args
+        )
+
+    def submit(self, fn, *args):
+        """
+        Runs fn(*args) on a pool worker in the background and releases the
+        slot when it finishes. Returns a concurrent.futures.Future. If the
+        pool has shut down, the slot is released and RuntimeError raised.
+        """
+        try:
+            future = self._pool._executor.submit(self._pool._call, time.perf_counter(), fn, args)
+        except BaseException:
+            self.release(failed=True)
+            raise
+        future.add_done_callback(
+            lambda done: self.release(failed=done.cancelled() or done.exception() is not None)
+        )
+        return future
+
+    async def stream(self, iterator):
+        """
+        Iterates a blocking iterator on pool workers and releases the slot
+        once it is exhausted, fails or the consumer stops early. A consumer
+        that may never start iterating must also call release() itself.
+        """
+        failed = True
+        try:
+            while True:
+                chunk = await self.run(next, iterator, None)
+                if chunk is None:
+                    break
+                yield chunk
+            failed = False
+        finally:
+            self.release(failed=failed)
+
+    def release(self, failed=False):
+        """Frees the slot. Later calls, e.g. from a response that ends, do nothing."""
+        with self._pool._lock:
+            if self._released:
+                return
+            self._released = True
+        self._pool._finish(time.perf_counter() - self._started, failed)
@@ -0,0 +1,87 @@
+import base64
+import gzip
+import json
+import sys
+from array import array
+
+from config import REPORT_VERSION
+from helpers.fifo import FIFO
+
+STATE_FORMAT = 1
+
+_COLUMNS = ("quantities", "prices", "times")
+
+
+class ReportState:
+    """
+    Snapshot of an incremental tax report.
+    Holds each currency's FIFO queue and yearly totals, plus the watermark:
+    the epoch of the newest transaction already applied. create_tax_report
+    skips transactions at or before the watermark and continues from here.
+    """
+
+    def __init__(self, watermark=None, currencies=None):
+        self.watermark = watermark
+        # currency -> {"fifo": FIFO, "years": {...}}
+        self.currencies = currencies if currencies is not None else {}
+
+
+def save_report_state(state, path):
+    """Writes the state as gzip-compressed JSON with binary lot columns."""
+    payload = {
+        "format": STATE_FORMAT,
+        "reportVersion": REPORT_VERSION,
+        "byteorder": sys.byteorder,
+        "watermark": state.watermark,
+        "currencies": {
+            currency: {
+                "years": entry["years"],
+                "fifo": _encode_fifo(entry["fifo"]),
+            }
+            for currency, entry in state.currencies.items()
+        },
+    }
+    with gzip.open(path, "wt", encoding="utf-8") as handle:
+        json.dump(payload, handle, separators=(",", ":"))
+
+
+def load_report_state(path):
+    with gzip.open(path, "rt", encoding="utf-8") as handle:
+        payload = json.load(handle)
+
+    if payload.get("format") != STATE_FORMAT:
+        raise ValueError(f"Unsupported report state format: {payload.get('format')}")
+    if payload.get("reportVersion") != REPORT_VERSION:
+        raise ValueError(
+            f"Report state was written by version {payload.get('reportVersion')}, "
+            f"expected {REPORT_VERSION}. Rebuild it from the full history."
+        )
+
+    swap = payload["byteorder"] != sys.byteorder
+    currencies = {
+        currency: {
+            "years": entry["years"],
+            "fifo": _decode_fifo(entry["fifo"], swap),
+        }
+        for currency, entry in payload["currencies"].items()
+    }
+    return ReportState(payload["watermark"], currencies)
+
+
+def _encode_fifo(fifo):
+    state = fifo.to_state()
+    for column in _COLUMNS:
+        state[column] = base64.b64encode(state[column]).decode("ascii")
+    return state
+
+
+def _decode_fifo(encoded, swap):
+    state = dict(encoded)
+    for column in _COLUMNS:
+        raw = base64.b64decode(state[column])
+        if swap:
+            values = array("d", raw)
+            values.byteswap()
+            raw = values.tobytes()
+        state[column] = raw
+    return FIFO.from_state(state)
@@ -0,0 +1,143 @@
+from dataclasses import dataclass, fields
+from datetime import datetime
+from operator import attrgetter
+
+
+@dataclass(slots=True)
+class Transaction:
+    """
+    A normalized Coinmotion transaction.
+    The timestamp is parsed once when the record is created and carried along
+    as ``parsedTime`` (aware datetime), ``epoch`` (UTC seconds) and ``year``
+    (the calendar year of the original local time), so later stages never
+    parse ``time`` again. Supports ``tx["key"]`` and ``tx.get("key")`` so it
+    can be used wherever the row dicts were used before.
+    """
+
+    fromCurrency: str
+    toCurrency: str
+    type: str
+    eurAmount: float
+    cryptoAmount: float
+    rate: float
+    fee: float
+    feeCurrency: str
+    time: str
+    source: str
+    parsedTime: datetime
+    epoch: int
+    year: str
+
+    def __getitem__(self, key):
+        if key not in FIELD_NAMES:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def get(self, key, default=None):
+        if key not in FIELD_NAMES:
+            return default
+        return getattr(self, key)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in FIELD_NAMES}
+
+    def __reduce__(self):
+        # A plain tuple of values pickles about twice as fast as the default
+        # slots state, which matters when records are sent to worker processes.
+        return Transaction, _field_values(self)
+
+
+FIELD_NAMES = tuple(field.name for field in fields(Transaction))
+_field_values = attrgetter(*FIELD_NAMES)
+
+
+@dataclass(slots=True)
+class SplitTransaction:
+    """
+    The part of a sell that consumed one FIFO lot.
+    Holds only the per-lot values and reads every other field from the
+    sold Transaction, so a sell spanning many lots does not repeat the
+    source fields in each row. Supports ``row["key"]``, ``row.get("key")``
+    and attribute access for the fields of both.
+    """
+
+    parent: Transaction
+    cryptoAmount: float
+    eurAmount: float
+    fee: float
+    remainingQuantity: float
+    costBasis: float
+    assumedCost: float
+    costBasisUsed: float
+    costBasisMethod: str
+    profitLoss: float
+
+    def __getattr__(self, key):
+        # Only called for names that are not slots of the split row.
+        if key in FIELD_NAMES:
+            return getattr(self.parent, key)
+        raise AttributeError(key)
+
+    def __getitem__(self, key):
+        if key in SPLIT_FIELD_NAMES:
+            return getattr(self, key)
+        if key in FIELD_NAMES:
+            return getattr(self.parent, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        if key in SPLIT_FIELD_NAMES:
+            return getattr(self, key)
+        if key in FIELD_NAMES:
+            return getattr(self.parent, key)
+        return default
+
+    def to_dict(self):
+        values = self.parent.to_dict()
+        for name in SPLIT_FIELD_NAMES:
+            values[name] = getattr(self, name)
+        return values
+
+    def __reduce__(self):
+        return SplitTransaction, _split_values(self)
+
+
+SPLIT_FIELD_NAMES = tuple(field.name for field in fields(SplitTransaction))[1:]
+_split_values = attrgetter(*(field.name for field in fields(SplitTransaction)))
+
+
+def parse_time(value):
+    """Parses a Coinmotion timestamp such as ``2024-01-01T10:00:00+02:00``."""
+    parsed = datetime.fromisoformat(value)
+    if parsed.tzinfo is None:
+        raise ValueError(f"time data {value!r} is missing a UTC offset")
+    return parsed
+
+
+def time_fields(value):
+    """Returns ``(parsedTime, epoch, year)`` for a Coinmotion timestamp."""
+    parsed = parse_time(value)
+    return parsed, int(parsed.timestamp()), str(parsed.year)
+
+
+def as_transaction(obj):
+    """Returns ``obj`` as a Transaction, converting a row dict if needed."""
+    if isinstance(obj, Transaction):
+        return obj
+
+    parsed, epoch, year = time_fields(obj["time"])
+    return Transaction(
+        fromCurrency=obj["fromCurrency"],
+        toCurrency=obj["toCurrency"],
+        type=obj["type"],
+        eurAmount=obj["eurAmount"],
+        cryptoAmount=obj["cryptoAmount"],
+        rate=obj.get("rate", 0.0),
+        fee=obj.get("fee", 0.0),
+        feeCurrency=obj.get("feeCurrency", ""),
+        time=obj["time"],
+        source=obj.get("source", ""),
+        parsedTime=parsed,
+        epoch=epoch,
+        year=year,
+    )
@@ -1,10 +1,80 @@
+import argparse
 import os
-from readers.CsvReader import read_csv
-from writers.XlsWriter import write_xls
-from writers.PdfWriter import write_pdf_zip
+import sys
+from contextlib import nullcontext
+from config import BATCH_WORKERS
+from helpers.batch import find_inputs, run_batch
+from helpers.instrumentation import recording
+from helpers.report_state import ReportState, load_report_state, save_report_state
+from readers import READERS, get_reader
+from writers import WRITERS, get_writer
 from processor import create_tax_report
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Create a tax report from a Coinmotion CSV export.")
+    parser.add_argument(
+        "--state",
+        help="Report state file. Only transactions newer than the saved state are processed, "
+             "and the state is updated afterwards. Created on the first run.",
+    )
+    parser.add_argument(
+        "--batch",
+        metavar="SOURCE",
+        help="Process every .csv in a directory, or every file matching a glob pattern, in a process pool. "
+             "Each export gets its own subdirectory of --output and a manifest.json lists the results.",
+    )
+    parser.add_argument(
+        "--format",
+        dest="formats",
+        action="append",
+        choices=WRITERS.names(),
+        help="Output format; repeat for several. Default: pdf.",
+    )
+    parser.add_argument(
+        "--reader",
+        default="csv",
+        choices=READERS.names(),
+        help="Input reader. csv-columnar uses NumPy when it is installed.",
+    )
+    parser.add_argument("--output", default="./output/", help="Output directory.")
+    parser.add_argument("--workers", type=int, help="Worker processes for --batch (default: config.BATCH_WORKERS, or one per CPU if unset).")
+    parser.add_argument(
+        "--fixed-point",
+        action="store_true",
+        help="Match lots in exact integer units and euro cents instead of floats. Cannot be used with --state.",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Print wall time and row counts per pipeline stage.",
+    )
+    parser.add_argument(
+        "--profile-memory",
+        action="store_true",
+        help="With --profile, also trace allocation peaks per stage. Tracing slows the run down considerably.",
+    )
+    args = parser.parse_args()
+    output_formats = args.formats or ["pdf"]
+
+    if args.batch:
+        if args.state:
+            parser.error("--state cannot be used with --batch")
+        paths = find_inputs(args.batch)
+        print(f"Processing {len(paths)} files...")
+        manifest = run_batch(
+            paths,
+            args.output,
+            output_formats,
+            args.reader,
+            workers=BATCH_WORKERS if args.workers is None else args.workers,
+            fixed_point=args.fixed_point,
+            progress=lambda entry: print(
+                f"{entry['status']:<7} {entry['input']}" + (f": {entry['error']}" if entry["error"] else "")
+            ),
+        )
+        print(f"Done. {manifest['succeeded']} succeeded, {manifest['failed']} failed.")
+        sys.exit(1 if manifest["failed"] else 0)
+
     input_folder = './input/'
     file_path = None
 
@@ -22,18 +92,35 @@ if __name__ == "__main__":
         raise ValueError("No .csv file found in the input folder")
     
 
+    profiling = recording(trace_memory=args.profile_memory) if args.profile else nullcontext()
+
     try:
-        print(f"Reading file: {file_path}")
-        objects = read_csv(file_path)
+        with profiling as profile:
+            print(f"Reading file: {file_path}")
+            objects = get_reader(args.reader)(file_path)
+
+            state = None
+            if args.state:
+                state = load_report_state(args.state) if os.path.exists(args.state) else ReportState()
+
+            print("Read successfully. Processing data...")
+            result = create_tax_report(objects, state=state, fixed_point=args.fixed_point)
+
+            print("Processing successful. Writing outputs...")
+
+            for output_format in output_formats:
+                get_writer(output_format)(result, args.output)
 
-        print("Read successfully. Processing data...")
-        result = create_tax_report(objects)
+            # Only once every output exists: a saved watermark skips these
+            # transactions on the next run.
+            if state is not None:
+                save_report_state(state, args.state)
+                print(f"Report state saved to {args.state}")
+            print("Done.")
 
-        print("Processing successful. Writing outputs...")
-        
-        # write_xls(result)
-        write_pdf_zip(result)
-        print("Done.")
+        if profile is not None:
+            # The csv reader is lazy, so its time is also part of create_tax_report.
+            print(profile.format_table())
 
     except Exception as e:
         print(f"Error processing file: {e}")
@@ -1,49 +1,293 @@
-from datetime import datetime
+import copy
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from itertools import repeat
 
-from helpers.fifo import FIFO
+from config import CRYPTO_DECIMALS, FIXED_POINT_DECIMALS
+from helpers.fifo import FIFO, LONG_HOLD_SECONDS, FixedPointFIFO, share, to_fixed
+from helpers.instrumentation import active, record_stage, stage
+from helpers.transaction import SplitTransaction, as_transaction
 
+EXECUTORS = {
+    "process": ProcessPoolExecutor,
+    "thread": ThreadPoolExecutor,
+}
 
-def create_tax_report(objects):
+# How many input transactions a serial run matches between progress calls.
+PROGRESS_ROWS = 10_000
+
+
+def create_tax_report(objects, executor=None, max_workers=None, progress=None, state=None,
+                      year=None, fixed_point=False, sink=None):
     """
     Create a tax report from the given objects.
     This function processes the transactions and returns a structured report.
+
+    The time-ordered input is read in a single pass: each transaction goes
+    straight to the FIFO of its currency (both currencies for crypto-to-
+    crypto trades) and the resulting rows are appended to that currency's
+    report list, so objects can be a lazy iterator. With sink, rows are
+    passed to sink(currency, row) instead and the report only carries the
+    yearly totals. All currencies finish together at the end of the pass,
+    so progress(done, total) counts input transactions: it is called every
+    PROGRESS_ROWS transactions and once at the end, with total None until
+    then if objects has no length.
+
+    Each currency has its own FIFO, so with executor="process" (or "thread")
+    the transactions are grouped first and the currencies are matched in a
+    pool of max_workers workers. Results are merged back in the same
+    currency order as a serial run. Here progress(done, total) counts
+    currencies and is called after each one has been matched.
+
+    With a ReportState from a previous run, only transactions newer than its
+    watermark are applied: FIFO queues and yearly totals continue from the
+    snapshot, the report lists just the new transactions, and the state is
+    updated in place so it can be saved for the next run.
+
+    With year, only that year is reported: earlier transactions just rebuild
+    the FIFO queues, later ones are skipped, and currencies without
+    transactions in that year are left out.
+
+    With fixed_point, lots are matched in exact integer arithmetic: crypto
+    amounts in the smallest unit of each currency (see CRYPTO_DECIMALS) and
+    euros in cents. Report values are converted back to floats at the end.
     """
     if not objects:
         return []
+    if year is not None:
+        if state is not None:
+            raise ValueError("A year-scoped report cannot update a report state.")
+        year = str(year)
+    if fixed_point and state is not None:
+        raise ValueError("A fixed-point report cannot update a report state.")
+    if sink is not None and executor is not None:
+        raise ValueError("A sink can only be used with serial processing.")
+
+    with stage("create_tax_report") as record:
+        if executor is None:
+            results, fifos, watermark, record.rows = _process_single_pass(
+                objects, state, year, fixed_point, sink, progress
+            )
+        else:
+            results, fifos, watermark, record.rows = _process_in_pool(
+                objects, executor, max_workers, progress, state, year, fixed_point
+            )
+
+        if year is not None:
+            results = {currency: data for currency, data in results.items() if year in data["years"]}
+
+        if state is not None:
+            state.watermark = watermark
+            state.currencies = {
+                currency: {"fifo": fifos[currency], "years": copy.deepcopy(data["years"])}
+                for currency, data in results.items()
+            }
+
+        return results
+
+
+def _process_single_pass(objects, state, year, fixed_point, sink, progress=None):
+    currencies = {}
+    watermark = None
+    if state is not None:
+        watermark = state.watermark
+        for currency, entry in state.currencies.items():
+            data = {"years": copy.deepcopy(entry["years"]), "transactions": []}
+            currencies[currency] = _CurrencyMatcher(currency, data, entry["fifo"], year, sink)
+
+    newest = watermark
+    rows = 0
+    read = 0
+    total = len(objects) if hasattr(objects, "__len__") else None
+    # Per-currency timing costs two clock reads per row, so it is only done
+    # when the process_currency stages are recorded somewhere.
+    timed = active()
+    for read, obj in enumerate(objects, start=1):
+        if progress is not None and not read % PROGRESS_ROWS:
+            progress(read, total)
+        obj = as_transaction(obj)
+        if watermark is not None and obj.epoch <= watermark:
+            continue
+        if newest is None or obj.epoch > newest:
+            newest = obj.epoch
+
+        to_currency = obj.toCurrency
+        if to_currency != "EUR":
+            matcher = currencies.get(to_currency)
+            if matcher is None:
+                matcher = currencies[to_currency] = _CurrencyMatcher(
+                    to_currency,
+                    {"years": {}, "transactions": []},
+                    _new_fifo(to_currency, fixed_point),
+                    year,
+                    sink,
+                )
+            if timed:
+                matcher.apply_timed(obj)
+            else:
+                matcher.apply(obj)
+            rows += 1
 
-    results = _group_transactions_by_currency(objects)
-    fifo_by_currency = {}
-
-    for currency, data in results.items():
-        fifo = fifo_by_currency.setdefault(currency, FIFO())
-        processed_transactions = []
-        for tx in data["transactions"]:
-            tx_year = tx["time"].split("-")[0]
-            _ensure_year_entry(data, tx_year)
-
-            if tx["fromCurrency"] == "EUR":
-                _handle_buy_transaction(fifo, tx)
-                processed_transactions.append(tx)
-            elif tx["toCurrency"] == "EUR":
-                processed_transactions.extend(_handle_sell_transaction(fifo, data, tx, tx_year))
+        from_currency = obj.fromCurrency
+        if from_currency != "EUR":
+            matcher = currencies.get(from_currency)
+            if matcher is None:
+                raise ValueError(
+                    f"Currency {from_currency} not found in results, but it should be initialized."
+                )
+            if timed:
+                matcher.apply_timed(obj)
             else:
-                processed_transactions.append(tx)
+                matcher.apply(obj)
+            rows += 1
+
+    results = {}
+    fifos = {}
+    for currency, matcher in currencies.items():
+        matcher.finish()
+        results[currency] = matcher.data
+        fifos[currency] = matcher.fifo
+        if timed:
+            record_stage("process_currency", matcher.seconds, matcher.rows, currency=currency)
+    if progress is not None:
+        progress(read, read)
+    return results, fifos, newest, rows
+
+
+def _process_in_pool(objects, executor, max_workers, progress, state, year, fixed_point):
+    if executor not in EXECUTORS:
+        raise ValueError(f"Unknown executor {executor!r}, expected one of {sorted(EXECUTORS)}")
+
+    results, watermark = _group_transactions_by_currency(objects, state)
+    rows = [len(data["transactions"]) for data in results.values()]
+    if state is not None:
+        fifos = {currency: entry["fifo"] for currency, entry in state.currencies.items()}
+    else:
+        fifos = {currency: _new_fifo(currency, fixed_point) for currency in results}
+    currencies = list(results.keys())
+    total = len(currencies)
+
+    with EXECUTORS[executor](max_workers=max_workers) as pool:
+        processed = pool.map(
+            _timed_process_currency,
+            results.values(),
+            (fifos.get(currency) for currency in currencies),
+            repeat(year),
+        )
+        for done, (currency, (data, fifo, seconds)) in enumerate(zip(currencies, processed), start=1):
+            record_stage("process_currency", seconds, rows[done - 1], currency=currency)
+            results[currency] = data
+            fifos[currency] = fifo
+            if progress is not None:
+                progress(done, total)
+
+    return results, fifos, watermark, sum(rows)
+
+
+def _new_fifo(currency, fixed_point):
+    if fixed_point:
+        return FixedPointFIFO(CRYPTO_DECIMALS.get(currency, FIXED_POINT_DECIMALS))
+    return FIFO()
+
+
+def _timed_process_currency(data, fifo=None, year=None):
+    # Worker processes cannot record into the caller's profile, so the
+    # time is sent back with the result.
+    started = time.perf_counter()
+    data, fifo = _process_currency(data, fifo, year)
+    return data, fifo, time.perf_counter() - started
+
+
+def _process_currency(data, fifo=None, year=None):
+    transactions = data["transactions"]
+    data["transactions"] = []
+    matcher = _CurrencyMatcher(None, data, FIFO() if fifo is None else fifo, year)
+    for tx in transactions:
+        matcher.apply(tx)
+    matcher.finish()
+    return data, matcher.fifo
+
+
+class _CurrencyMatcher:
+    """
+    FIFO matching of one currency's transactions, fed one at a time.
+    Report rows go to data["transactions"], or to sink(currency, row).
+    """
+
+    __slots__ = ("data", "fifo", "year", "fixed_point", "handle_buy", "handle_sell", "emit", "seconds", "rows")
+
+    def __init__(self, currency, data, fifo, year=None, sink=None):
+        self.data = data
+        self.fifo = fifo
+        self.year = year
+        self.fixed_point = isinstance(fifo, FixedPointFIFO)
+        if self.fixed_point:
+            self.handle_buy, self.handle_sell = _handle_fixed_buy_transaction, _handle_fixed_sell_transaction
+        else:
+            self.handle_buy, self.handle_sell = _handle_buy_transaction, _handle_sell_transaction
+        if sink is None:
+            self.emit = data["transactions"].append
+        else:
+            self.emit = partial(sink, currency)
+        self.seconds = 0.0
+        self.rows = 0
+
+    def apply(self, tx):
+        tx_year = tx.year
+        year = self.year
+        if year is not None and tx_year != year:
+            if tx_year < year:
+                _replay_transaction(self.fifo, tx)
+            return
+        _ensure_year_entry(self.data, tx_year)
+
+        if tx.fromCurrency == "EUR":
+            self.handle_buy(self.fifo, tx)
+            self.emit(tx)
+        elif tx.toCurrency == "EUR":
+            for row in self.handle_sell(self.fifo, self.data, tx, tx_year):
+                self.emit(row)
+        else:
+            self.emit(tx)
 
-        data["transactions"] = processed_transactions
+    def apply_timed(self, tx):
+        started = time.perf_counter()
+        self.apply(tx)
+        self.seconds += time.perf_counter() - started
+        self.rows += 1
 
-    return results
+    def finish(self):
+        if self.fixed_point:
+            # Yearly totals were summed in cents.
+            for totals in self.data["years"].values():
+                for key in ("wins", "losses", "total"):
+                    totals[key] /= 100
 
 
-def _group_transactions_by_currency(objects):
+def _group_transactions_by_currency(objects, state=None):
     results = {}
+    watermark = None
+
+    if state is not None:
+        watermark = state.watermark
+        for currency, entry in state.currencies.items():
+            results[currency] = {"years": copy.deepcopy(entry["years"]), "transactions": []}
 
+    newest = watermark
     for obj in objects:
-        to_currency = obj["toCurrency"]
+        obj = as_transaction(obj)
+        if watermark is not None and obj.epoch <= watermark:
+            continue
+        if newest is None or obj.epoch > newest:
+            newest = obj.epoch
+
+        to_currency = obj.toCurrency
         if to_currency != "EUR":
             results.setdefault(to_currency, {"years": {}, "transactions": []})
             results[to_currency]["transactions"].append(obj)
 
-        from_currency = obj["fromCurrency"]
+        from_currency = obj.fromCurrency
         if from_currency != "EUR":
             if from_currency not in results:
                 raise ValueError(
@@ -51,7 +295,24 @@ def _group_transactions_by_currency(objects):
                 )
             results[from_currency]["transactions"].append(obj)
 
-    return results
+    return results, newest
+
+
+def _replay_transaction(fifo, tx):
+    # Only the FIFO queue matters before the reported year; no rows or totals.
+    fixed_point = isinstance(fifo, FixedPointFIFO)
+    if tx.fromCurrency == "EUR":
+        if fixed_point:
+            _handle_fixed_buy_transaction(fifo, tx)
+        else:
+            _handle_buy_transaction(fifo, tx)
+    elif tx.toCurrency == "EUR" and tx.cryptoAmount > 0:
+        if fixed_point:
+            quantity = fifo.to_units(tx.cryptoAmount)
+            if quantity > 0:
+                fifo.calculate_cogs(quantity, tx.epoch, to_fixed(tx.eurAmount, 2))
+        else:
+            fifo.calculate_cogs(tx.cryptoAmount, tx.epoch, tx.eurAmount)
 
 
 def _ensure_year_entry(data, tx_year):
@@ -65,32 +326,32 @@ def _ensure_year_entry(data, tx_year):
 
 
 def _handle_buy_transaction(fifo, tx):
-    if tx["cryptoAmount"] <= 0:
+    if tx.cryptoAmount <= 0:
         return
     fifo.add_purchase(
-        tx["cryptoAmount"],
-        (tx["eurAmount"] / tx["cryptoAmount"]),
-        _parse_time(tx["time"]),
+        tx.cryptoAmount,
+        (tx.eurAmount / tx.cryptoAmount),
+        tx.epoch,
     )
 
 
 def _handle_sell_transaction(fifo, data, tx, tx_year):
-    if tx["cryptoAmount"] <= 0:
+    if tx.cryptoAmount <= 0:
         return []
 
     sold_crypto = {
-        "amount": tx["cryptoAmount"],
-        "total_revenue": tx["eurAmount"],
+        "amount": tx.cryptoAmount,
+        "total_revenue": tx.eurAmount,
     }
 
     fee_eur = 0.0
-    if tx.get("feeCurrency") == "EUR":
-        fee_eur = float(tx.get("fee", 0.0))
+    if tx.feeCurrency == "EUR":
+        fee_eur = float(tx.fee or 0.0)
 
-    sold_time = _parse_time(tx["time"])
+    sold_epoch = tx.epoch
     cost_basis, assumed_cost, consumed_lots = fifo.calculate_cogs(
         sold_crypto["amount"],
-        sold_time,
+        sold_epoch,
         sold_crypto["total_revenue"],
     )
 
@@ -100,10 +361,10 @@ def _handle_sell_transaction(fifo, data, tx, tx_year):
     split_transactions = []
 
     for lot in consumed_lots:
-        lot_quantity = lot["quantity"]
+        lot_quantity = lot.quantity
         lot_revenue = lot_quantity * price_per_unit
-        lot_cost_basis = lot_quantity * lot["price"]
-        lot_held_long = (sold_time - lot["time"]).days >= 3650
+        lot_cost_basis = lot_quantity * lot.price
+        lot_held_long = (sold_epoch - lot.time) >= LONG_HOLD_SECONDS
         lot_assumed_cost = lot_revenue * (0.4 if lot_held_long else 0.2)
         lot_cost_basis_used = max(lot_cost_basis, lot_assumed_cost)
         lot_method = "assumption" if lot_assumed_cost > lot_cost_basis else "fifo"
@@ -117,17 +378,18 @@ def _handle_sell_transaction(fifo, data, tx, tx_year):
         cumulative_sold += lot_quantity
         remaining_after = remaining_before - cumulative_sold
 
-        split_tx = dict(tx)
-        split_tx["cryptoAmount"] = lot_quantity
-        split_tx["eurAmount"] = lot_revenue
-        if fee_eur and tx.get("feeCurrency") == "EUR":
-            split_tx["fee"] = lot_fee
-        split_tx["costBasis"] = lot_cost_basis
-        split_tx["assumedCost"] = lot_assumed_cost
-        split_tx["costBasisUsed"] = lot_cost_basis_used
-        split_tx["costBasisMethod"] = lot_method
-        split_tx["profitLoss"] = lot_profit_loss
-        split_tx["remainingQuantity"] = remaining_after
+        split_tx = SplitTransaction(
+            tx,
+            cryptoAmount=lot_quantity,
+            eurAmount=lot_revenue,
+            fee=lot_fee if fee_eur else tx.fee,
+            remainingQuantity=remaining_after,
+            costBasis=lot_cost_basis,
+            assumedCost=lot_assumed_cost,
+            costBasisUsed=lot_cost_basis_used,
+            costBasisMethod=lot_method,
+            profitLoss=lot_profit_loss,
+        )
 
         if lot_profit_loss > 0:
             data["years"][tx_year]["wins"] += lot_profit_loss
@@ -141,5 +403,67 @@ def _handle_sell_transaction(fifo, data, tx, tx_year):
     return split_transactions
 
 
-def _parse_time(value):
-    return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
+def _handle_fixed_buy_transaction(fifo, tx):
+    quantity = fifo.to_units(tx.cryptoAmount)
+    if quantity <= 0:
+        return
+    fifo.add_purchase(quantity, to_fixed(tx.eurAmount, 2), tx.epoch)
+
+
+def _handle_fixed_sell_transaction(fifo, data, tx, tx_year):
+    # Same split rows as _handle_sell_transaction, computed in units and cents.
+    quantity_sold = fifo.to_units(tx.cryptoAmount)
+    if quantity_sold <= 0:
+        return []
+
+    total_revenue = to_fixed(tx.eurAmount, 2)
+    fee = 0
+    if tx.feeCurrency == "EUR":
+        fee = to_fixed(tx.fee or 0, 2)
+
+    remaining_before = fifo.remaining_quantity()
+    _, _, consumed_lots = fifo.calculate_cogs(quantity_sold, tx.epoch, total_revenue)
+
+    scale = fifo.scale
+    totals = data["years"][tx_year]
+    cumulative_sold = 0
+    fee_allocated = 0
+    split_transactions = []
+
+    for lot in consumed_lots:
+        cumulative_sold += lot.quantity
+        lot_fee = 0
+        if fee and total_revenue > 0:
+            if cumulative_sold == quantity_sold:
+                lot_fee = fee - fee_allocated
+            else:
+                lot_fee = share(fee, lot.revenue, total_revenue)
+            fee_allocated += lot_fee
+
+        lot_cost_basis_used = max(lot.cost, lot.assumed_cost)
+        lot_method = "assumption" if lot.assumed_cost > lot.cost else "fifo"
+        lot_net_revenue = lot.revenue - lot_fee if lot_method == "fifo" else lot.revenue
+        lot_profit_loss = lot_net_revenue - lot_cost_basis_used
+
+        split_tx = SplitTransaction(
+            tx,
+            cryptoAmount=lot.quantity / scale,
+            eurAmount=lot.revenue / 100,
+            fee=lot_fee / 100 if fee else tx.fee,
+            remainingQuantity=(remaining_before - cumulative_sold) / scale,
+            costBasis=lot.cost / 100,
+            assumedCost=lot.assumed_cost / 100,
+            costBasisUsed=lot_cost_basis_used / 100,
+            costBasisMethod=lot_method,
+            profitLoss=lot_profit_loss / 100,
+        )
+
+        if lot_profit_loss > 0:
+            totals["wins"] += lot_profit_loss
+        else:
+            totals["losses"] -= lot_profit_loss
+        totals["total"] += lot_profit_loss
+
+        split_transactions.append(split_tx)
+
+    return split_transactions
@@ -0,0 +1,194 @@
+import csv
+import gc
+import warnings
+from datetime import datetime, timedelta, timezone
+from io import StringIO
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; the row reader is used without it.
+    np = None
+
+from helpers.instrumentation import stage
+from helpers.transaction import Transaction
+from readers.CsvReader import read_csv, read_csv_stream
+
+# Same tie order as create_objects_from_csv: buys, then transfers, then sells.
+_BUY, _TRANSFER, _SELL = 0, 1, 2
+
+_TEXT_COLUMNS = ["type", "fromCurrency", "toCurrency", "feeCurrency", "time"]
+_NUMBER_COLUMNS = ["eurAmount", "cryptoAmount", "rate", "fee"]
+
+
+def read_csv_columnar(file_path: str):
+    """
+    Columnar fast path for read_csv.
+    Loads the export into NumPy arrays in bulk, converts numbers and
+    timestamps vectorized and filters rows with masks. Returns the same
+    transactions as read_csv. Falls back to read_csv when NumPy is missing
+    or the file needs the row reader (unusual timestamps, bad rows), so
+    parse errors are reported the same way.
+    """
+    if np is None:
+        return read_csv(file_path)
+
+    with stage("read_csv_columnar") as record:
+        with open(file_path, mode='r', encoding='utf-8', newline='') as file:
+            transactions = _read_columnar(file)
+        record.rows = None if transactions is None else len(transactions)
+    if transactions is None:
+        return read_csv(file_path)
+    if not transactions:
+        print("No transactions found in the CSV file.")
+    return transactions
+
+
+def read_csv_stream_columnar(content: str):
+    """Columnar fast path for read_csv_stream."""
+    if np is None:
+        return read_csv_stream(content)
+
+    with stage("read_csv_columnar") as record:
+        transactions = _read_columnar(StringIO(content))
+        record.rows = None if transactions is None else len(transactions)
+    if transactions is None:
+        return read_csv_stream(content)
+    return transactions
+
+
+def _read_columnar(file):
+    header = next(csv.reader([file.readline()]), None)
+    if not header:
+        return []
+    try:
+        index = {name: header.index(name) for name in _TEXT_COLUMNS + _NUMBER_COLUMNS}
+    except ValueError:
+        return None
+
+    try:
+        with warnings.catch_warnings():
+            # An export with a header but no rows is not worth a warning.
+            warnings.simplefilter("ignore", UserWarning)
+            table = np.loadtxt(
+                file,
+                delimiter=",",
+                quotechar='"',
+                comments=None,
+                dtype="S",
+                ndmin=2,
+                encoding="utf-8",
+            )
+        if table.shape[0] == 0:
+            return []
+        if table.shape[1] != len(header):
+            return None
+
+        text = {
+            name: np.ascontiguousarray(table[:, index[name]])
+            for name in _TEXT_COLUMNS
+        }
+        numbers = {
+            name: _to_float(table[:, index[name]])
+            for name in _NUMBER_COLUMNS
+        }
+        epochs, offsets = _parse_times(text["time"])
+        times = text["time"].astype("U")
+    except ValueError:
+        return None
+    del table
+
+    type_ = np.char.lower(np.char.strip(text["type"]))
+    from_currency = np.char.upper(np.char.strip(text["fromCurrency"]))
+    to_currency = np.char.upper(np.char.strip(text["toCurrency"]))
+    fee_currency = np.char.upper(np.char.strip(text["feeCurrency"]))
+
+    kind = np.full(len(type_), -1, dtype=np.int8)
+    regular = (type_ != b"deposit") & (type_ != b"withdrawal") & (type_ != b"account_transfer_in")
+    from_eur = from_currency == b"EUR"
+    to_eur = to_currency == b"EUR"
+    kind[regular & to_eur & ~from_eur] = _SELL
+    kind[regular & from_eur & ~to_eur] = _BUY
+    kind[type_ == b"account_transfer_in"] = _TRANSFER
+
+    keep = np.flatnonzero(kind >= 0)
+    keep = keep[np.lexsort((keep, kind[keep], epochs[keep]))]
+
+    is_transfer = kind[keep] == _TRANSFER
+    eur_amount = numbers["eurAmount"][keep].tolist()
+    for position in np.flatnonzero(is_transfer).tolist():
+        eur_amount[position] = 0
+    from_values = np.where(is_transfer, b"EUR", from_currency[keep])
+
+    return _build_transactions(
+        kind[keep].tolist(),
+        from_values.astype("U").tolist(),
+        to_currency[keep].astype("U").tolist(),
+        eur_amount,
+        numbers["cryptoAmount"][keep].tolist(),
+        numbers["rate"][keep].tolist(),
+        numbers["fee"][keep].tolist(),
+        fee_currency[keep].astype("U").tolist(),
+        times[keep].tolist(),
+        epochs[keep].tolist(),
+        offsets[keep].tolist(),
+        times[keep].astype("U4").tolist(),
+    )
+
+
+def _to_float(column):
+    return np.where(column == b"", b"0", column).astype(np.float64)
+
+
+def _parse_times(column):
+    """
+    Parses ``YYYY-MM-DDTHH:MM:SS+HH:MM`` timestamps vectorized.
+    Returns UTC epoch seconds and UTC offsets in seconds. Raises ValueError
+    for any other layout so the caller can use the row reader instead.
+    """
+    if column.dtype.itemsize != 25:
+        raise ValueError("unexpected time layout")
+    codes = column.view(np.uint8).reshape(len(column), 25)
+    sign = codes[:, 19]
+    if not (
+        (codes[:, 10] == ord("T")).all()
+        and ((sign == ord("+")) | (sign == ord("-"))).all()
+        and (codes[:, 22] == ord(":")).all()
+    ):
+        raise ValueError("unexpected time layout")
+
+    digits = codes[:, [20, 21, 23, 24]].astype(np.int64) - ord("0")
+    if ((digits < 0) | (digits > 9)).any():
+        raise ValueError("unexpected time layout")
+    offsets = (digits[:, 0] * 10 + digits[:, 1]) * 3600 + (digits[:, 2] * 10 + digits[:, 3]) * 60
+    offsets = np.where(sign == ord("-"), -offsets, offsets)
+
+    local = column.astype("S19").astype("datetime64[s]").astype(np.int64)
+    return local - offsets, offsets
+
+
+def _build_transactions(kinds, from_currency, to_currency, eur_amount, crypto_amount,
+                        rate, fee, fee_currency, times, epochs, offsets, years):
+    # The only per-row work left: one record and one aware datetime per row.
+    # The records hold no reference cycles, so the cyclic garbage collector
+    # is paused instead of rescanning the growing list on every generation.
+    timezones = {}
+    fromtimestamp = datetime.fromtimestamp
+    transactions = []
+    append = transactions.append
+    gc_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for row in zip(kinds, from_currency, to_currency, eur_amount, crypto_amount,
+                       rate, fee, fee_currency, times, epochs, offsets, years):
+            kind, from_, to, eur, crypto, rate_, fee_, fee_cur, time, epoch, offset, year = row
+            tz = timezones.get(offset)
+            if tz is None:
+                tz = timezones[offset] = timezone(timedelta(seconds=offset))
+            append(Transaction(
+                from_, to, "sell" if kind == _SELL else "buy", eur, crypto, rate_, fee_,
+                fee_cur, time, "Coinmotion Oy", fromtimestamp(epoch, tz), epoch, year,
+            ))
+    finally:
+        if gc_enabled:
+            gc.enable()
+    return transactions
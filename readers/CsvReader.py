@@ -1,96 +1,264 @@
 import csv
+import heapq
+import pickle
+import tempfile
+from dataclasses import replace
+from datetime import datetime, timedelta, timezone
 from io import StringIO
-from datetime import datetime
+from itertools import chain
+from operator import attrgetter, gt, itemgetter, le
+
+from helpers.instrumentation import stage, timed_iter
+from helpers.transaction import Transaction, time_fields
+
+# Rows buffered in memory by the streaming reader before a sorted run is
+# spilled to a temporary file.
+STREAM_CHUNK_SIZE = 100_000
+# Rows per pickle block inside a spilled run; bounds memory while merging.
+SPILL_BLOCK_SIZE = 1024
+
+# Order of rows sharing a timestamp: acquisitions before disposals, so a
+# sell can use a lot bought in the same second.
+_BUY, _TRANSFER, _SELL = 0, 1, 2
+
+_epoch = attrgetter("epoch")
 
 def read_csv(file_path: str):
     transactions = []
-    with open(file_path, mode='r', encoding='utf-8') as file:
-        transactions = _parse_csv_reader(csv.DictReader(file))
-    if not transactions:
-        print("No transactions found in the CSV file.")
-        return []
-    return create_objects_from_csv(transactions)
+    with stage("read_csv") as record:
+        with open(file_path, mode='r', encoding='utf-8') as file:
+            transactions = _parse_csv_reader(csv.DictReader(file))
+        record.rows = len(transactions)
+        if not transactions:
+            print("No transactions found in the CSV file.")
+            return []
+        return create_objects_from_csv(transactions)
 
 
 def read_csv_stream(content: str):
-    transactions = _parse_csv_reader(csv.DictReader(StringIO(content)))
-    if not transactions:
-        return []
-    return create_objects_from_csv(transactions)
+    with stage("read_csv") as record:
+        transactions = _parse_csv_reader(csv.DictReader(StringIO(content)))
+        record.rows = len(transactions)
+        if not transactions:
+            return []
+        return create_objects_from_csv(transactions)
+
+
+def iter_csv(file_path: str, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Lazily yields the transactions of a CSV export in time order.
+    Memory is bounded by chunk_size rows regardless of the file size.
+    """
+    with open(file_path, mode='r', encoding='utf-8', newline='') as file:
+        yield from iter_csv_file(file, chunk_size)
+
+
+def iter_csv_file(file, chunk_size=STREAM_CHUNK_SIZE):
+    """Like iter_csv, but reads from an open text file object."""
+    yield from timed_iter("iter_csv", _iter_time_ordered(
+        _iter_keyed_objects(_iter_csv_reader(csv.DictReader(file))),
+        chunk_size,
+    ))
 
 
 def _parse_csv_reader(reader):
-    transactions = []
+    return list(_iter_csv_reader(reader))
+
+
+def _iter_csv_reader(reader):
     for row in reader:
         try:
-            transactions.append({
-                "fromCurrency": row["fromCurrency"].strip().upper(),
-                "toCurrency": row["toCurrency"].strip().upper(),
-                "type": row["type"],
-                "eurAmount": float(row["eurAmount"]) if row["eurAmount"] else 0.0,
-                "cryptoAmount": float(row["cryptoAmount"]) if row["cryptoAmount"] else 0.0,
-                "rate": float(row["rate"]) if row["rate"] else 0.0,
-                "fee": float(row["fee"]) if row["fee"] else 0.0,
-                "feeCurrency": row["feeCurrency"].strip().upper(),
-                "time": row["time"],
-                "source": "Coinmotion Oy",
-            })
+            parsed_time, epoch, year = time_fields(row["time"])
+            yield Transaction(
+                fromCurrency=row["fromCurrency"].strip().upper(),
+                toCurrency=row["toCurrency"].strip().upper(),
+                type=row["type"],
+                eurAmount=float(row["eurAmount"]) if row["eurAmount"] else 0.0,
+                cryptoAmount=float(row["cryptoAmount"]) if row["cryptoAmount"] else 0.0,
+                rate=float(row["rate"]) if row["rate"] else 0.0,
+                fee=float(row["fee"]) if row["fee"] else 0.0,
+                feeCurrency=row["feeCurrency"].strip().upper(),
+                time=row["time"],
+                source="Coinmotion Oy",
+                parsedTime=parsed_time,
+                epoch=epoch,
+                year=year,
+            )
         except (ValueError, KeyError) as e:
             raise ValueError(f"Error parsing row {reader.line_num}: {e}")
-    return transactions
 
 def create_objects_from_csv(transactions):
-    sells = []
-    buys = []
-    transfers = []
+    with stage("create_objects_from_csv", rows=len(transactions)):
+        buys = []
+        transfers = []
+        sells = []
+        buckets = {_BUY: buys, _TRANSFER: transfers, _SELL: sells}
 
-    for transaction in transactions:
-        from_currency = transaction["fromCurrency"].strip().upper()
-        to_currency = transaction["toCurrency"].strip().upper()
-        type_ = transaction["type"].strip().lower()
-        
-        if type_ in ['deposit', 'withdrawal']:
-            continue
+        for transaction in transactions:
+            classified = _classify_transaction(transaction)
+            if classified is not None:
+                kind, transaction = classified
+                buckets[kind].append(transaction)
+
+        return order_by_time([buys, transfers, sells])
 
-        if type_ == 'account_transfer_in':
-            transfers.append(handleAccount_transfer_in(transaction))
-            continue
+def _classify_transaction(transaction):
+    """Normalizes a parsed row. Returns (kind, transaction) or None to drop it."""
+    from_currency = transaction.fromCurrency
+    to_currency = transaction.toCurrency
+    type_ = transaction.type.strip().lower()
 
-        if from_currency == 'EUR' and to_currency != 'EUR':
-            transaction["type"] = "buy"
-            buys.append(transaction)
-            continue
+    if type_ in ['deposit', 'withdrawal']:
+        return None
 
-        if to_currency == 'EUR' and from_currency != 'EUR':
-            transaction["type"] = "sell"
-            sells.append(transaction)
+    if type_ == 'account_transfer_in':
+        return _TRANSFER, handleAccount_transfer_in(transaction)
 
-    objects = sells + buys + transfers
+    if from_currency == 'EUR' and to_currency != 'EUR':
+        transaction.type = "buy"
+        return _BUY, transaction
 
-    return sort_by_date(objects)
+    if to_currency == 'EUR' and from_currency != 'EUR':
+        transaction.type = "sell"
+        return _SELL, transaction
+
+    return None
 
 def handleAccount_transfer_in(transaction):
     # Process account_transfer_in transactions
     # For now we assume that account transfer is buy
-    return {
-        "fromCurrency": "EUR",
-        "toCurrency": transaction["toCurrency"],
-        "type": "buy",
-        "eurAmount": 0,
-        "cryptoAmount": transaction["cryptoAmount"],
-        "rate": transaction["rate"],
-        "fee": transaction["fee"],
-        "feeCurrency": transaction["feeCurrency"],
-        "time": transaction["time"],
-        "source": transaction["source"]
-    }
-
-
-def sort_by_date(rows):
+    return replace(transaction, fromCurrency="EUR", type="buy", eurAmount=0)
+
+
+def order_by_time(buckets):
+    """
+    Merges lists of transactions into epoch order.
+    Each bucket is in export order, which is chronological, so it is
+    already an ascending (or, for newest-first exports, descending) run and
+    only needs an O(n) check; a bucket that is not gets sorted on its own.
+    The runs are then merged in O(n log k). On equal epochs, earlier buckets
+    come first and rows within a bucket keep their input order.
+    """
+    runs = [_as_run(bucket) for bucket in buckets if bucket]
+    if len(runs) <= 1:
+        return runs[0] if runs else []
+
+    with stage("order_by_time", rows=sum(map(len, runs))):
+        # Timsort finds the runs and merges them with galloping in C, which
+        # measured about twice as fast as heapq.merge over the same runs.
+        return sorted(chain.from_iterable(runs), key=_epoch)
+
+
+def _as_run(bucket):
+    epochs = list(map(_epoch, bucket))
+    if all(map(le, epochs, epochs[1:])):
+        return bucket
+    if all(map(gt, epochs, epochs[1:])):
+        return bucket[::-1]
+    return sorted(bucket, key=_epoch)
+
+
+def _iter_keyed_objects(transactions):
+    for transaction in transactions:
+        classified = _classify_transaction(transaction)
+        if classified is not None:
+            kind, transaction = classified
+            yield _time_key(transaction.epoch, kind), transaction
+
+
+def _time_key(epoch, kind):
+    # One integer per row: orders by epoch, then by kind.
+    return epoch << 2 | kind
+
+
+def _iter_time_ordered(keyed_rows, chunk_size):
+    """
+    Yields rows ordered by key using bounded memory.
+    Ordering is checked while reading: an already ordered export is passed
+    through without sorting. Otherwise every chunk is sorted into a run and
+    the runs are merged (an external merge sort). Ties keep input order.
+    """
+    chunk = []
+    runs = []
+    in_order = True
+    chunk_in_order = True
+    last_key = None
     try:
-        if len(rows) == 0:
-            return rows
+        for key, row in keyed_rows:
+            if last_key is not None and key < last_key:
+                in_order = chunk_in_order = False
+            last_key = key
+            chunk.append((key, row))
+            if len(chunk) >= chunk_size:
+                if not chunk_in_order:
+                    chunk.sort(key=itemgetter(0))
+                runs.append(_spill_run(chunk))
+                chunk = []
+                chunk_in_order = True
+
+        if not chunk_in_order:
+            chunk.sort(key=itemgetter(0))
+
+        if not runs:
+            for _, row in chunk:
+                yield row
+            return
+
+        if chunk:
+            runs.append(_spill_run(chunk))
+            chunk = []
+
+        if in_order:
+            for run in runs:
+                for _, row in _read_run(run):
+                    yield row
         else:
-            return sorted(rows, key=lambda row: datetime.strptime(row['time'], "%Y-%m-%dT%H:%M:%S%z"))
-    except Exception as e:
-        print(f"Error sorting rows by date: {e}")
\ No newline at end of file
+            merged = heapq.merge(*(_read_run(run) for run in runs), key=itemgetter(0))
+            for _, row in merged:
+                yield row
+    finally:
+        for run in runs:
+            run.close()
+
+
+def _spill_run(chunk):
+    run = tempfile.TemporaryFile()
+    for start in range(0, len(chunk), SPILL_BLOCK_SIZE):
+        block = [_pack_row(key, row) for key, row in chunk[start:start + SPILL_BLOCK_SIZE]]
+        pickle.dump(block, run, protocol=pickle.HIGHEST_PROTOCOL)
+    run.seek(0)
+    return run
+
+
+def _read_run(run):
+    timezones = {}
+    while True:
+        try:
+            block = pickle.load(run)
+        except EOFError:
+            return
+        for packed in block:
+            yield _unpack_row(packed, timezones)
+
+
+def _pack_row(key, row):
+    # Plain tuples pickle several times faster than Transaction records with
+    # aware datetimes; parsedTime is rebuilt from epoch and UTC offset.
+    parsed = row.parsedTime
+    return (
+        key & 3, row.fromCurrency, row.toCurrency, row.type, row.eurAmount,
+        row.cryptoAmount, row.rate, row.fee, row.feeCurrency, row.time,
+        row.source, row.epoch, row.year,
+        int(parsed.utcoffset().total_seconds()), parsed.microsecond,
+    )
+
+
+def _unpack_row(packed, timezones):
+    kind, *values, epoch, year, offset, microsecond = packed
+    tz = timezones.get(offset)
+    if tz is None:
+        tz = timezones[offset] = timezone(timedelta(seconds=offset))
+    parsed = datetime.fromtimestamp(epoch, tz)
+    if microsecond:
+        parsed = parsed.replace(microsecond=microsecond)
+    return _time_key(epoch, kind), Transaction(*values, parsed, epoch, year)
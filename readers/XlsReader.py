@@ -1,7 +1,9 @@
-import xlrd
 # Coinmotion uses csv files now. this does not work anymore.
 # This code is kept for reference in case they switch back to xls files. But wont work straight away.
+# xlrd is an optional dependency (pip install xlrd) and is only imported when this is used.
 def read_xls(file_path):
+    import xlrd
+
     try:
         workbook = xlrd.open_workbook(file_path)
         sheet = workbook.sheet_by_index(0)
@@ -0,0 +1,11 @@
+from helpers.registry import LazyRegistry
+
+# Input formats; each maps a file path to transactions in time order.
+READERS = LazyRegistry("input", {
+    "csv": "readers.CsvReader:iter_csv",
+    "csv-columnar": "readers.ColumnarCsvReader:read_csv_columnar",
+})
+
+
+def get_reader(name):
+    return READERS.get(name)
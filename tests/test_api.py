@@ -0,0 +1,258 @@
+import asyncio
+import io
+import logging
+import os
+import time
+import zipfile
+
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from helpers.jobs import JobStore
+from helpers.report_cache import ReportCache
+from helpers.report_pool import ReportPool
+from writers import ExportFormat
+
+CSV = (
+    "type,fromCurrency,toCurrency,eurAmount,cryptoAmount,rate,fee,feeCurrency,time\n"
+    "buy,EUR,BTC,100,1.0,100,1,EUR,2024-01-01T10:00:00+02:00\n"
+    "buy,EUR,ETH,1000,1.0,1000,1,EUR,2024-01-03T10:00:00+02:00\n"
+    "sell,BTC,EUR,60,0.4,150,0.5,EUR,2024-01-04T10:00:00+02:00\n"
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    monkeypatch.setattr(api, "report_pool", ReportPool(workers=1, queue_depth=1))
+    monkeypatch.setattr(api, "report_cache", ReportCache(directory=None))
+    monkeypatch.setattr(api, "job_store", JobStore())
+    with TestClient(api.app) as client:
+        yield client
+
+
+def _upload(content=CSV, name="export.csv"):
+    return {"file": (name, content.encode("utf-8"), "text/csv")}
+
+
+def test_export_releases_slot_and_counts_completed(client):
+    response = client.post("/report/export", params={"format": "jsonl"}, files=_upload())
+
+    assert response.status_code == 200
+    assert response.headers["content-disposition"] == "attachment; filename=report.jsonl"
+    metrics = client.get("/metrics/report-pool").json()
+    assert metrics["inFlight"] == 0
+    assert metrics["completed"] == 1
+    assert metrics["failed"] == 0
+    assert "coinmotion_report_pool_completed_total 1\n" in client.get("/metrics").text
+
+
+def test_export_is_rejected_when_pool_is_saturated(client):
+    held = [api.report_pool.reserve(), api.report_pool.reserve()]
+
+    response = client.post("/report/export", files=_upload())
+
+    assert response.status_code == 429
+    assert response.headers["retry-after"] == "5"
+    metrics = client.get("/metrics/report-pool").json()
+    assert metrics["rejected"] == 1
+    assert metrics["inFlight"] == 2
+    for slot in held:
+        slot.release()
+    assert client.get("/metrics/report-pool").json()["inFlight"] == 0
+
+
+def test_export_slot_is_released_when_the_response_is_aborted(client):
+    request = httpx.Request("POST", "http://testserver/report/export?format=csv", files=_upload())
+    body = request.read()
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/report/export",
+        "raw_path": b"/report/export",
+        "query_string": b"format=csv",
+        "root_path": "",
+        "headers": [(key.lower().encode(), value.encode()) for key, value in request.headers.items()],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+
+    async def abort(slots):
+        for _ in range(slots):
+            messages = [{"type": "http.request", "body": body, "more_body": False}]
+
+            async def receive():
+                if messages:
+                    return messages.pop()
+                await asyncio.Event().wait()
+
+            async def send(message):
+                if message["type"] == "http.response.start":
+                    raise OSError("client went away")
+
+            with pytest.raises(OSError):
+                await api.app(scope, receive, send)
+
+    # More aborted requests than the pool has slots.
+    asyncio.run(abort(3))
+
+    metrics = client.get("/metrics/report-pool").json()
+    assert metrics["inFlight"] == 0
+    assert metrics["failed"] == 3
+    assert client.post("/report/export", files=_upload()).status_code == 200
+
+
+def test_pdf_zip_endpoint_streams_a_valid_zip(client):
+    with client.stream("POST", "/report/pdf-zip", files=_upload()) as response:
+        assert response.status_code == 200
+        assert "content-length" not in response.headers
+        body = b"".join(response.iter_bytes())
+
+    with zipfile.ZipFile(io.BytesIO(body)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["BTC.pdf", "ETH.pdf"]
+        assert archive.read("BTC.pdf").startswith(b"%PDF")
+
+
+def test_export_writer_failing_before_first_chunk_returns_400(client, monkeypatch):
+    def failing_chunks(report):
+        raise ValueError("cannot render")
+        yield b""
+
+    monkeypatch.setattr(api, "get_export", lambda name: ExportFormat("x.bin", "application/octet-stream", failing_chunks))
+
+    response = client.post("/report/export", files=_upload())
+
+    assert response.status_code == 400
+    assert response.json()["detail"] == "cannot render"
+    metrics = client.get("/metrics/report-pool").json()
+    assert (metrics["inFlight"], metrics["failed"]) == (0, 1)
+    assert api.job_store._jobs == {}
+
+
+def test_export_failing_mid_stream_is_logged(client, monkeypatch, caplog):
+    def failing_chunks(report):
+        yield b"first"
+        raise ValueError("cannot render")
+
+    monkeypatch.setattr(api, "get_export", lambda name: ExportFormat("x.bin", "application/octet-stream", failing_chunks))
+
+    with caplog.at_level(logging.ERROR, logger="api"), pytest.raises(ValueError):
+        client.post("/report/export", files=_upload())
+
+    assert "export failed after its response had started" in caplog.text
+    assert client.get("/metrics/report-pool").json()["inFlight"] == 0
+
+
+@pytest.fixture
+def spooled(monkeypatch):
+    paths = []
+    spool_upload = api._spool_upload
+
+    def recording_spool(raw_file):
+        paths.append(spool_upload(raw_file))
+        return paths[-1]
+
+    monkeypatch.setattr(api, "_spool_upload", recording_spool)
+    return paths
+
+
+def _wait_for_job(client, job_id):
+    for _ in range(200):
+        status = client.get(f"/jobs/{job_id}").json()
+        if status["status"] not in ("queued", "running"):
+            return status
+        time.sleep(0.05)
+    raise AssertionError("the job did not finish")
+
+
+def test_job_runs_and_result_is_downloaded(client, spooled):
+    response = client.post("/jobs", files=_upload())
+
+    assert response.status_code == 202
+    job_id = response.json()["id"]
+    assert response.json()["resultUrl"] == f"/jobs/{job_id}/result"
+    status = _wait_for_job(client, job_id)
+    assert status["status"] == "done"
+    assert status["progress"]["rowsParsed"] == 3
+    assert status["progress"]["transactionsMatched"] == status["progress"]["transactionsTotal"] == 3
+    assert status["progress"]["pdfsRendered"] == status["progress"]["pdfsTotal"] == 2
+
+    result = client.get(f"/jobs/{job_id}/result")
+    assert result.status_code == 200
+    with zipfile.ZipFile(io.BytesIO(result.content)) as archive:
+        assert archive.namelist() == ["BTC.pdf", "ETH.pdf"]
+    assert not os.path.exists(spooled[0])
+
+    assert client.delete(f"/jobs/{job_id}").status_code == 204
+    assert client.get(f"/jobs/{job_id}").status_code == 404
+    assert client.get(f"/jobs/{job_id}/result").status_code == 404
+    assert client.delete(f"/jobs/{job_id}").status_code == 404
+
+
+def test_job_failure_and_unfinished_result(client, spooled):
+    failed_id = client.post("/jobs", files=_upload(CSV.splitlines()[0] + "\n")).json()["id"]
+
+    assert _wait_for_job(client, failed_id)["status"] == "failed"
+    failed = client.get(f"/jobs/{failed_id}/result")
+    assert failed.status_code == 400
+    assert failed.json()["detail"] == "No transactions found in the CSV file."
+    assert not os.path.exists(spooled[0])
+
+    queued = api.job_store.create()
+    assert client.get(f"/jobs/{queued.id}/result").status_code == 409
+    assert client.get("/jobs/unknown").status_code == 404
+    assert client.get("/jobs/unknown/result").status_code == 404
+
+
+def test_job_submitted_during_shutdown_releases_slot_and_upload(client, spooled, monkeypatch):
+    spool_upload = api._spool_upload
+
+    def spool_then_shut_down(raw_file):
+        path = spool_upload(raw_file)
+        api.report_pool.shutdown()
+        return path
+
+    monkeypatch.setattr(api, "_spool_upload", spool_then_shut_down)
+
+    response = client.post("/jobs", files=_upload())
+
+    assert response.status_code == 503
+    assert not os.path.exists(spooled[0])
+    metrics = client.get("/metrics/report-pool").json()
+    assert (metrics["inFlight"], metrics["failed"]) == (0, 1)
+    assert api.job_store._jobs == {}
+
+
+def test_repeated_upload_is_served_from_cache(client, monkeypatch):
+    counts = {"parsed": 0, "matched": 0, "rendered": 0}
+
+    def counting(name, fn):
+        def wrapper(*args, **kwargs):
+            counts[name] += 1
+            return fn(*args, **kwargs)
+
+        return wrapper
+
+    monkeypatch.setattr(api, "iter_csv_file", counting("parsed", api.iter_csv_file))
+    monkeypatch.setattr(api, "create_tax_report", counting("matched", api.create_tax_report))
+    pdf_writer = api._pdf_writer()
+    monkeypatch.setattr(pdf_writer, "_render_pdf", counting("rendered", pdf_writer._render_pdf))
+
+    first = client.post("/report/pdf-zip", files=_upload())
+    again = client.post("/report/pdf-zip", files=_upload())
+
+    assert first.status_code == again.status_code == 200
+    assert again.content == first.content
+    assert counts == {"parsed": 1, "matched": 1, "rendered": 2}
+
+    # Another year reuses the parsed transactions but is matched and rendered again.
+    scoped = client.post("/report/pdf-zip", params={"year": 2024}, files=_upload())
+
+    assert scoped.status_code == 200
+    assert counts == {"parsed": 1, "matched": 2, "rendered": 4}
+    assert api.report_cache.metrics()["hits"] >= 2
@@ -0,0 +1,51 @@
+import json
+import os
+import zipfile
+
+import pytest
+
+from helpers.batch import find_inputs, run_batch
+
+
+EXPORT = (
+    "type,fromCurrency,toCurrency,eurAmount,cryptoAmount,rate,fee,feeCurrency,time\n"
+    "buy,EUR,BTC,100,1.0,100,1,EUR,2024-01-01T10:00:00+02:00\n"
+    "sell,BTC,EUR,60,0.4,150,0.5,EUR,2024-01-03T10:00:00+02:00\n"
+)
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_run_batch_isolates_failing_files(tmp_path, workers):
+    inputs = tmp_path / "input"
+    inputs.mkdir()
+    (inputs / "alice.csv").write_text(EXPORT, encoding="utf-8")
+    (inputs / "broken.csv").write_text("type,time\nbuy,not a time\n", encoding="utf-8")
+    (inputs / "bob.csv").write_text(EXPORT, encoding="utf-8")
+    (inputs / "notes.txt").write_text("skipped", encoding="utf-8")
+    output = tmp_path / "output"
+
+    manifest = run_batch(find_inputs(str(inputs)), str(output), workers=workers)
+
+    assert [os.path.basename(entry["input"]) for entry in manifest["files"]] == ["alice.csv", "bob.csv", "broken.csv"]
+    assert [entry["status"] for entry in manifest["files"]] == ["ok", "ok", "failed"]
+    assert manifest["succeeded"] == 2
+    assert manifest["failed"] == 1
+    assert manifest["files"][2]["error"]
+    assert manifest["files"][0]["currencies"] == ["BTC"]
+    for name in ("alice", "bob"):
+        with zipfile.ZipFile(output / name / "pdf_reports.zip") as archive:
+            assert archive.namelist() == ["BTC.pdf"]
+    assert json.loads((output / "manifest.json").read_text(encoding="utf-8")) == manifest
+
+
+def test_run_batch_separates_exports_with_the_same_name(tmp_path):
+    for folder in ("2023", "2024"):
+        (tmp_path / folder).mkdir()
+        (tmp_path / folder / "export.csv").write_text(EXPORT, encoding="utf-8")
+
+    paths = find_inputs(str(tmp_path / "*" / "*.csv"))
+    manifest = run_batch(paths, str(tmp_path / "output"), workers=1)
+
+    assert [os.path.basename(entry["output"]) for entry in manifest["files"]] == ["export", "export-2"]
+    with pytest.raises(ValueError):
+        find_inputs(str(tmp_path / "missing"))
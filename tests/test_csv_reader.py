@@ -0,0 +1,74 @@
+from io import StringIO
+
+from readers.ColumnarCsvReader import read_csv_stream_columnar
+from readers.CsvReader import iter_csv_file, read_csv_stream
+
+
+HEADER = "type,fromCurrency,toCurrency,eurAmount,cryptoAmount,rate,fee,feeCurrency,time\n"
+
+ROWS = [
+    "buy,EUR,BTC,100,1.0,100,1,EUR,2024-01-01T10:00:00+02:00\n",
+    "deposit,EUR,EUR,500,,,,EUR,2024-01-01T09:00:00+02:00\n",
+    "sell,BTC,EUR,60,0.4,150,0.5,EUR,2024-01-03T10:00:00+02:00\n",
+    "account_transfer_in,ETH,ETH,,2.0,1000,0,ETH,2024-01-02T10:00:00+02:00\n",
+    "buy,EUR,ETH,1000,1.0,1000,1,EUR,2024-01-03T10:00:00+02:00\n",
+    "sell,ETH,EUR,1500,1.0,1500,1,EUR,2024-01-04T10:00:00+02:00\n",
+    "withdrawal,EUR,EUR,50,,,,EUR,2024-01-05T10:00:00+02:00\n",
+    "buy,EUR,BTC,200,1.0,200,1,EUR,2023-12-31T10:00:00+02:00\n",
+]
+
+
+def test_iter_csv_file_matches_in_memory_reader():
+    content = HEADER + "".join(ROWS)
+    expected = read_csv_stream(content)
+
+    for chunk_size in (1, 2, 3, 100):
+        streamed = list(iter_csv_file(StringIO(content), chunk_size=chunk_size))
+        assert streamed == expected
+
+
+def test_iter_csv_file_passes_ordered_export_through():
+    ordered = sorted(ROWS, key=lambda row: row.rsplit(",", 1)[1])
+    content = HEADER + "".join(ordered)
+
+    streamed = list(iter_csv_file(StringIO(content), chunk_size=2))
+
+    assert [tx.time for tx in streamed] == sorted(tx.time for tx in streamed)
+    assert [tx.type for tx in streamed] == ["buy", "buy", "buy", "buy", "sell", "sell"]
+    assert streamed[2].fromCurrency == "EUR"
+    assert streamed[2].eurAmount == 0
+
+
+def test_read_csv_stream_orders_buys_before_sells_at_the_same_time():
+    newest_first = [
+        "sell,BTC,EUR,150,1.0,150,0,EUR,2024-01-02T10:00:00+02:00\n",
+        "buy,EUR,BTC,100,1.0,100,0,EUR,2024-01-02T10:00:00+02:00\n",
+        "sell,BTC,EUR,60,0.4,150,0,EUR,2024-01-01T12:00:00+02:00\n",
+        "buy,EUR,BTC,50,0.5,100,0,EUR,2024-01-01T10:00:00+02:00\n",
+    ]
+
+    transactions = read_csv_stream(HEADER + "".join(newest_first))
+    streamed = list(iter_csv_file(StringIO(HEADER + "".join(newest_first)), chunk_size=2))
+
+    assert [(tx.time[:10], tx.type) for tx in transactions] == [
+        ("2024-01-01", "buy"),
+        ("2024-01-01", "sell"),
+        ("2024-01-02", "buy"),
+        ("2024-01-02", "sell"),
+    ]
+    assert streamed == transactions
+
+
+def test_columnar_reader_matches_row_reader():
+    content = HEADER + "".join(ROWS)
+
+    assert read_csv_stream_columnar(content) == read_csv_stream(content)
+
+
+def test_columnar_reader_falls_back_for_other_time_layouts():
+    content = HEADER + "buy,EUR,BTC,100,1.0,100,1,EUR,2024-01-01T10:00:00Z\n"
+
+    transactions = read_csv_stream_columnar(content)
+
+    assert transactions == read_csv_stream(content)
+    assert transactions[0].epoch == 1704103200
@@ -0,0 +1,90 @@
+import csv
+import io
+import json
+import zipfile
+
+from benchmarks.synthetic import transaction_row
+from processor import create_tax_report
+from writers import get_export
+from writers.ColumnarWriter import COLUMNAR_FILENAME, iter_columnar_chunks, read_columnar, write_columnar
+from writers.CsvWriter import iter_csv_zip_chunks, write_csv
+from writers.JsonlWriter import JSONL_FILENAME, write_jsonl
+from writers.ReportRecords import TRANSACTION_FIELDS, YEAR_FIELDS
+
+
+def _report():
+    rows = []
+    for currency, rate in (("BTC", 10000.0), ("ETH", 1000.0)):
+        rows.append(transaction_row("2023-01-01T10:00:00+02:00", "EUR", currency, 1.0, rate))
+        rows.append(transaction_row("2024-01-01T10:00:00+02:00", "EUR", currency, 1.0, rate * 2))
+        rows.append(transaction_row("2024-02-01T10:00:00+02:00", currency, "EUR", 1.5, rate * 4))
+    return create_tax_report(rows)
+
+
+def test_write_csv(tmp_path):
+    report = _report()
+    write_csv(report, tmp_path)
+
+    with open(tmp_path / "transactions.csv", encoding="utf-8", newline="") as handle:
+        transactions = list(csv.DictReader(handle))
+    with open(tmp_path / "years.csv", encoding="utf-8", newline="") as handle:
+        years = list(csv.DictReader(handle))
+
+    assert list(transactions[0]) == TRANSACTION_FIELDS
+    assert [row["currency"] for row in transactions] == ["BTC"] * 4 + ["ETH"] * 4
+    sells = [row for row in transactions if row["type"] == "sell"]
+    assert [float(row["costBasis"]) for row in sells[:2]] == [10000.0, 10000.0]
+    assert transactions[0]["costBasis"] == ""
+    assert [(row["currency"], row["year"], float(row["total"])) for row in years] == [
+        ("BTC", "2023", 0.0),
+        ("BTC", "2024", report["BTC"]["years"]["2024"]["total"]),
+        ("ETH", "2023", 0.0),
+        ("ETH", "2024", report["ETH"]["years"]["2024"]["total"]),
+    ]
+
+    with zipfile.ZipFile(io.BytesIO(b"".join(iter_csv_zip_chunks(report)))) as archive:
+        assert archive.read("transactions.csv") == (tmp_path / "transactions.csv").read_bytes()
+        assert archive.read("years.csv") == (tmp_path / "years.csv").read_bytes()
+
+
+def test_write_jsonl(tmp_path):
+    report = _report()
+    write_jsonl(report, tmp_path)
+
+    records = [json.loads(line) for line in (tmp_path / JSONL_FILENAME).read_text(encoding="utf-8").splitlines()]
+
+    assert [record["record"] for record in records] == ["year"] * 4 + ["transaction"] * 8
+    assert list(records[0]) == ["record", *YEAR_FIELDS]
+    assert list(records[4]) == ["record", *TRANSACTION_FIELDS]
+    assert records[4]["costBasis"] is None
+    assert records[6]["profitLoss"] == report["BTC"]["transactions"][2]["profitLoss"]
+
+
+def test_columnar_round_trip(tmp_path):
+    report = _report()
+    write_columnar(report, tmp_path)
+
+    data = (tmp_path / COLUMNAR_FILENAME).read_bytes()
+    tables = read_columnar(data)
+
+    assert data == b"".join(iter_columnar_chunks(report))
+    transactions = tables["transactions"]
+    assert list(transactions) == TRANSACTION_FIELDS
+    assert transactions["currency"] == ["BTC"] * 4 + ["ETH"] * 4
+    assert transactions["time"][0] == "2023-01-01T10:00:00+02:00"
+    assert transactions["costBasis"][0] is None
+    assert transactions["profitLoss"][2] == report["BTC"]["transactions"][2]["profitLoss"]
+    assert transactions["epoch"][0] == report["BTC"]["transactions"][0].epoch
+    assert tables["years"]["year"] == ["2023", "2024", "2023", "2024"]
+    assert tables["years"]["total"] == [
+        0.0,
+        report["BTC"]["years"]["2024"]["total"],
+        0.0,
+        report["ETH"]["years"]["2024"]["total"],
+    ]
+
+
+def test_exports_are_registered():
+    assert get_export("jsonl").filename == JSONL_FILENAME
+    assert get_export("columnar").media_type == "application/octet-stream"
+    assert get_export("pdf").filename == "pdf_reports.zip"
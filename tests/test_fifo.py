@@ -1,6 +1,6 @@
 from datetime import datetime
 
-from helpers.fifo import FIFO
+from helpers.fifo import FIFO, FixedPointFIFO, to_fixed
 import pytest
 from config import EPSILON
 
@@ -54,6 +54,45 @@ def test_fifo_partial_sell():
     assert fifo.queue[0].price == 12000.0
 
 
+def test_fifo_tracks_open_quantity_and_cost():
+    fifo = FIFO()
+    fifo.add_purchase(1.0, 10000.0, _ts("2024-01-01T10:00:00+02:00"))
+    fifo.add_purchase(0.5, 12000.0, _ts("2024-01-10T10:00:00+02:00"))
+
+    assert pytest.approx(fifo.remaining_quantity(), rel=EPSILON) == 1.5
+    assert pytest.approx(fifo.remaining_cost(), rel=EPSILON) == 16000.0
+
+    fifo.calculate_cogs(1.2, _ts("2024-02-01T10:00:00+02:00"), 1.2 * 15000.0)
+
+    assert pytest.approx(fifo.remaining_quantity(), rel=EPSILON) == 0.3
+    assert pytest.approx(fifo.remaining_cost(), rel=EPSILON) == 0.3 * 12000.0
+
+    fifo.calculate_cogs(0.3, _ts("2024-03-01T10:00:00+02:00"), 0.3 * 15000.0)
+
+    assert fifo.remaining_quantity() == 0.0
+    assert fifo.remaining_cost() == 0.0
+
+
+def test_fifo_consumes_lots_in_order_across_compaction():
+    fifo = FIFO()
+    for index in range(5000):
+        fifo.add_purchase(1.0, float(index), _ts("2024-01-01T10:00:00+02:00"))
+
+    for _ in range(4999):
+        _, _, consumed = fifo.calculate_cogs(1.0, _ts("2024-02-01T10:00:00+02:00"), 1.0)
+        assert len(consumed) == 1
+
+    assert len(fifo.queue) == 1
+    assert fifo.queue[0].price == 4999.0
+
+    _, _, consumed = fifo.calculate_cogs(0.25, _ts("2024-02-01T10:00:00+02:00"), 1.0)
+
+    assert consumed[0].quantity == 0.25
+    assert consumed[0].price == 4999.0
+    assert consumed[0].time == _ts("2024-01-01T10:00:00+02:00").timestamp()
+    assert fifo.queue[0].quantity == 0.75
+
+
 def test_fifo_insufficient_inventory():
     fifo = FIFO()
     fifo.add_purchase(0.1, 10000.0, _ts("2024-01-01T10:00:00+02:00"))
@@ -81,5 +120,54 @@ def test_fifo_rejects_invalid_inputs():
         fifo.calculate_cogs(-0.5, _ts("2024-02-01T10:00:00+02:00"), 0.0)
 
 
+def test_fixed_point_fifo_splits_lot_cost_exactly():
+    fifo = FixedPointFIFO(decimals=8)
+    fifo.add_purchase(3, 100, _ts("2024-01-01T10:00:00+02:00"))
+
+    for _ in range(3):
+        cogs, assumed_cost, consumed = fifo.calculate_cogs(1, _ts("2024-02-01T10:00:00+02:00"), 50)
+        assert consumed[0].quantity == 1
+        assert consumed[0].revenue == 50
+        assert assumed_cost == 10
+
+    # 33 + 34 + 33: the rounded shares still add up to the price paid.
+    assert fifo.remaining_quantity() == 0
+    assert fifo.remaining_cost() == 0
+    assert len(fifo) == 0
+
+
+def test_fixed_point_fifo_allocates_revenue_across_lots():
+    fifo = FixedPointFIFO(decimals=8)
+    fifo.add_purchase(1, 100, _ts("2010-06-01T10:00:00+02:00"))
+    fifo.add_purchase(2, 50, _ts("2024-01-01T10:00:00+02:00"))
+
+    cogs, assumed_cost, consumed = fifo.calculate_cogs(3, _ts("2024-12-01T10:00:00+02:00"), 1000)
+
+    assert cogs == 150
+    assert [lot.revenue for lot in consumed] == [333, 667]
+    assert [lot.assumed_cost for lot in consumed] == [133, 133]
+    assert assumed_cost == 266
+
+
+def test_fixed_point_fifo_has_no_drift():
+    fifo = FixedPointFIFO(decimals=8)
+    for day in range(1, 29):
+        fifo.add_purchase(to_fixed(0.1, 8), to_fixed(123.45, 2), _ts(f"2024-01-{day:02d}T10:00:00+02:00"))
+
+    fifo.calculate_cogs(to_fixed(2.8, 8), _ts("2024-03-01T10:00:00+02:00"), to_fixed(5000.0, 2))
+
+    assert fifo.remaining_quantity() == 0
+    assert len(fifo) == 0
+    with pytest.raises(ValueError):
+        fifo.calculate_cogs(1, _ts("2024-03-02T10:00:00+02:00"), 0)
+
+
+def test_to_fixed_uses_decimal_representation():
+    assert to_fixed(0.1, 8) == 10_000_000
+    assert to_fixed(1.23456789, 18) == 1_234_567_890_000_000_000
+    assert to_fixed(10.005, 2) == 1000
+    assert to_fixed(3, 2) == 300
+
+
 def _ts(value):
     return datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
@@ -0,0 +1,78 @@
+from helpers.instrumentation import (
+    StageMetrics,
+    add_listener,
+    recording,
+    remove_listener,
+    server_timing,
+    stage,
+    timed_iter,
+)
+from processor import create_tax_report
+from readers.CsvReader import read_csv_stream
+
+CSV = (
+    "type,fromCurrency,toCurrency,eurAmount,cryptoAmount,rate,fee,feeCurrency,time\n"
+    "buy,EUR,BTC,100,0.01,10000,1,EUR,2024-01-01T10:00:00+02:00\n"
+    "sell,BTC,EUR,60,0.005,12000,1,EUR,2024-02-01T10:00:00+02:00\n"
+)
+
+
+def test_recording_collects_pipeline_stages():
+    with recording() as profile:
+        read_csv_stream(CSV)
+
+    names = [record.name for record in profile.records]
+    assert names == ["order_by_time", "create_objects_from_csv", "read_csv"]
+    assert {record.rows for record in profile.records} == {2}
+
+
+def test_serial_report_records_stage_per_currency():
+    objects = read_csv_stream(CSV + "buy,EUR,ETH,100,0.1,1000,1,EUR,2024-03-01T10:00:00+02:00\n")
+
+    with recording() as profile:
+        create_tax_report(objects)
+
+    currencies = [record for record in profile.records if record.name == "process_currency"]
+    assert [(record.labels["currency"], record.rows) for record in currencies] == [("BTC", 2), ("ETH", 1)]
+    assert all(record.seconds > 0 for record in currencies)
+    assert profile.records[-1].name == "create_tax_report"
+
+
+def test_nested_stage_peaks_include_inner_allocations():
+    with recording(trace_memory=True) as profile:
+        with stage("outer"):
+            with stage("inner"):
+                data = bytearray(2_000_000)
+            del data
+
+    peaks = {record.name: record.peak_bytes for record in profile.records}
+    assert peaks["inner"] >= 2_000_000
+    assert peaks["outer"] >= peaks["inner"]
+
+
+def test_listeners_and_timed_iter_without_profile(monkeypatch):
+    # Importing api registers its own listener; start from none.
+    monkeypatch.setattr("helpers.instrumentation._listeners", [])
+    metrics = StageMetrics()
+    add_listener(metrics)
+    try:
+        assert list(timed_iter("rows", range(5))) == [0, 1, 2, 3, 4]
+    finally:
+        remove_listener(metrics)
+
+    lines = metrics.prometheus()
+    assert 'coinmotion_stage_calls_total{stage="rows"} 1' in lines
+    assert 'coinmotion_stage_rows_total{stage="rows"} 5' in lines
+    # Nothing is wrapped once nothing is listening.
+    items = [1, 2]
+    assert timed_iter("rows", items) is items
+
+
+def test_server_timing_sums_per_stage():
+    with recording() as profile:
+        for _ in range(2):
+            with stage("render_pdf"):
+                pass
+    header = server_timing(profile.records)
+    assert header.startswith("render_pdf;dur=")
+    assert header.count("render_pdf") == 1
@@ -0,0 +1,53 @@
+from helpers.jobs import DONE, EXPIRED, JobStore
+
+
+def test_job_store_expires_oldest_results_over_size_limit():
+    store = JobStore(max_bytes=10, ttl_seconds=3600, max_jobs=10)
+    first = store.create()
+    second = store.create()
+
+    store.finish(first, b"123456")
+    store.finish(second, b"abcdef")
+
+    assert store.get(first.id).status == EXPIRED
+    assert store.get(first.id).result is None
+    assert store.get(second.id).status == DONE
+    assert store.get(second.id).result == b"abcdef"
+
+
+def test_job_store_expires_results_after_ttl():
+    store = JobStore(max_bytes=100, ttl_seconds=0, max_jobs=10)
+    job = store.create(2024)
+    store.finish(job, b"zip")
+    job.finished_at -= 1
+
+    assert store.get(job.id).status == EXPIRED
+
+
+def test_job_store_forgets_oldest_finished_jobs():
+    store = JobStore(max_bytes=100, ttl_seconds=3600, max_jobs=2)
+    failed = store.create()
+    store.fail(failed, "bad row")
+    running = store.create()
+    store.start(running)
+    store.create()
+
+    assert store.get(failed.id) is None
+    assert store.get(running.id).status == "running"
+    assert failed.status == EXPIRED
+
+
+def test_job_store_delete_drops_the_result():
+    store = JobStore(max_bytes=100, ttl_seconds=3600, max_jobs=10)
+    done = store.create()
+    store.finish(done, b"zip")
+    running = store.create()
+
+    assert store.delete(done.id) is done
+    assert store.delete(done.id) is None
+    store.delete(running.id)
+    store.finish(running, b"late")
+
+    assert store.get(done.id) is None
+    assert running.result is None
+    assert store._result_bytes == 0
@@ -0,0 +1,57 @@
+import os
+import runpy
+
+import pytest
+
+from helpers.report_state import load_report_state
+
+MAIN = os.path.join(os.path.dirname(__file__), "..", "main.py")
+
+EXPORT = (
+    "type,fromCurrency,toCurrency,eurAmount,cryptoAmount,rate,fee,feeCurrency,time\n"
+    "buy,EUR,BTC,100,1.0,100,1,EUR,2024-01-01T10:00:00+02:00\n"
+    "sell,BTC,EUR,60,0.4,150,0.5,EUR,2024-01-03T10:00:00+02:00\n"
+)
+
+
+def _run_main(monkeypatch, *args):
+    monkeypatch.setattr("sys.argv", ["main.py", *args])
+    runpy.run_path(MAIN, run_name="__main__")
+
+
+def test_state_is_saved_only_after_every_output_is_written(tmp_path, monkeypatch):
+    (tmp_path / "input").mkdir()
+    (tmp_path / "input" / "export.csv").write_text(EXPORT, encoding="utf-8")
+    monkeypatch.chdir(tmp_path)
+
+    def failing_writer(objects, output_folder):
+        raise OSError("disk full")
+
+    monkeypatch.setattr("writers.get_writer", lambda name: failing_writer)
+    with pytest.raises(OSError):
+        _run_main(monkeypatch, "--state", "state.json.gz", "--format", "csv")
+    assert not (tmp_path / "state.json.gz").exists()
+
+    monkeypatch.undo()
+    monkeypatch.chdir(tmp_path)
+    _run_main(monkeypatch, "--state", "state.json.gz", "--format", "csv")
+    assert (tmp_path / "output" / "transactions.csv").exists()
+    assert load_report_state(str(tmp_path / "state.json.gz")).watermark is not None
+
+
+@pytest.mark.parametrize("args, expected", [([], 3), (["--workers", "1"], 1)])
+def test_batch_workers_default_to_config(tmp_path, monkeypatch, args, expected):
+    (tmp_path / "export.csv").write_text(EXPORT, encoding="utf-8")
+    calls = []
+
+    def fake_run_batch(paths, *args, **kwargs):
+        calls.append(kwargs["workers"])
+        return {"succeeded": len(paths), "failed": 0}
+
+    monkeypatch.setattr("config.BATCH_WORKERS", 3)
+    monkeypatch.setattr("helpers.batch.run_batch", fake_run_batch)
+    with pytest.raises(SystemExit) as exit_info:
+        _run_main(monkeypatch, "--batch", str(tmp_path), "--output", str(tmp_path / "output"), *args)
+
+    assert exit_info.value.code == 0
+    assert calls == [expected]
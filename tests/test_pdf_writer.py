@@ -0,0 +1,126 @@
+import io
+import re
+import zipfile
+
+from writers.PdfWriter import (
+    OUTPUT_HEADERS,
+    _PagedTable,
+    _build_pdf_bytes,
+    build_pdf_zip_bytes,
+    iter_pdf_zip_chunks,
+)
+
+
+def test_paged_table_repeats_header_and_keeps_every_row():
+    header = list(OUTPUT_HEADERS)
+    rows = [header] + [[str(index)] * len(header) for index in range(500)]
+    table = _PagedTable(rows, col_widths=[50] * len(header))
+
+    pages = []
+    remainder = table
+    while True:
+        _, height = remainder.wrap(800, 500)
+        if height <= 500:
+            pages.append(remainder._table(len(rows))._cellvalues)
+            break
+        first, *rest = remainder.split(800, 500)
+        _, first_height = first.wrap(800, 500)
+        assert first_height <= 500
+        pages.append(first._cellvalues)
+        remainder = rest[0]
+
+    assert len(pages) > 1
+    assert all(page[0] == header for page in pages)
+    assert [row for page in pages for row in page[1:]] == rows[1:]
+
+
+def test_build_pdf_bytes_renders_long_transaction_table():
+    data = {"years": {}, "transactions": [_item("BTC")] * 300}
+
+    assert _build_pdf_bytes("BTC", data).startswith(b"%PDF")
+
+
+def test_pdf_zips_render_repeatedly_in_one_thread():
+    # No flowable may be carried from one document into the next: the
+    # static pages are split differently per document.
+    objects = {
+        currency: {"years": {}, "transactions": [_item(currency)] * rows}
+        for currency, rows in (("BTC", 0), ("ETH", 1), ("XRP", 40), ("ADA", 300))
+    }
+
+    page_counts = []
+    for _ in range(2):
+        with zipfile.ZipFile(io.BytesIO(build_pdf_zip_bytes(objects, workers=1))) as archive:
+            assert archive.testzip() is None
+            assert archive.namelist() == ["BTC.pdf", "ETH.pdf", "XRP.pdf", "ADA.pdf"]
+            pdfs = [archive.read(name) for name in archive.namelist()]
+        assert all(pdf.startswith(b"%PDF") and pdf.rstrip().endswith(b"%%EOF") for pdf in pdfs)
+        page_counts.append([_page_count(pdf) for pdf in pdfs])
+
+    assert page_counts[0] == page_counts[1]
+    assert page_counts[0][-1] > page_counts[0][0] > 1
+
+
+def test_iter_pdf_zip_chunks_yields_a_valid_zip():
+    objects = {currency: {"years": {}, "transactions": [_item(currency)] * 5} for currency in ("BTC", "ETH")}
+
+    chunks = list(iter_pdf_zip_chunks(objects, workers=1))
+
+    assert len(chunks) > 1
+    with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == ["BTC.pdf", "ETH.pdf"]
+        assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+
+
+CURRENCIES = ["XRP", "BTC", "ETH", "ADA", "SOL", "DOT", "LINK", "AAVE"]
+
+
+def test_pdf_zip_from_process_pool_keeps_report_order():
+    # More currencies than workers, so each worker renders several PDFs.
+    objects = {
+        currency: {"years": {}, "transactions": [_item(currency)] * rows}
+        for currency, rows in zip(CURRENCIES, [0, 1, 40, 300] * 2)
+    }
+    progress = []
+
+    zip_bytes = build_pdf_zip_bytes(objects, workers=2, progress=lambda done, total: progress.append((done, total)))
+
+    with zipfile.ZipFile(io.BytesIO(zip_bytes)) as archive:
+        assert archive.testzip() is None
+        assert archive.namelist() == [f"{currency}.pdf" for currency in CURRENCIES]
+        assert all(archive.read(name).startswith(b"%PDF") for name in archive.namelist())
+    assert progress == [(done, 8) for done in range(1, 9)]
+
+
+def test_pdf_zip_renders_serially_without_a_pool(monkeypatch):
+    def no_pool(*args, **kwargs):
+        raise AssertionError("a process pool was started")
+
+    monkeypatch.setattr("writers.PdfWriter.ProcessPoolExecutor", no_pool)
+    objects = {currency: {"years": {}, "transactions": [_item(currency)]} for currency in ("BTC", "ETH")}
+
+    with zipfile.ZipFile(io.BytesIO(build_pdf_zip_bytes(objects, workers=1))) as archive:
+        assert archive.namelist() == ["BTC.pdf", "ETH.pdf"]
+    # A single currency is rendered in this process whatever the worker count.
+    with zipfile.ZipFile(io.BytesIO(build_pdf_zip_bytes({"BTC": objects["BTC"]}, workers=4))) as archive:
+        assert archive.namelist() == ["BTC.pdf"]
+
+
+def _page_count(pdf):
+    return len(re.findall(rb"/Type /Page\b(?!s)", pdf))
+
+
+def _item(currency):
+    return {
+        "time": "2024-01-01T10:00:00+02:00",
+        "type": "buy",
+        "cryptoAmount": 1.0,
+        "rate": 100.0,
+        "eurAmount": 100.0,
+        "source": "Coinmotion",
+        "fromCurrency": "EUR",
+        "toCurrency": currency,
+        "fee": 0.0,
+        "feeCurrency": "EUR",
+    }
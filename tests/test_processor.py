@@ -1,3 +1,7 @@
+import pytest
+
+from benchmarks.synthetic import transaction_row
+from helpers.report_state import ReportState
 from processor import create_tax_report
 
 
@@ -184,3 +188,162 @@ def test_split_sell_uses_assumption_then_fifo():
     assert sell_tx_2["costBasisMethod"] == "fifo"
     assert sell_tx_2["costBasisUsed"] == 4.0
     assert sell_tx_2["time"] == "2024-12-01T10:00:00+02:00"
+
+
+def test_create_tax_report_uses_parsed_time_fields():
+    objects = [
+        {
+            "time": "2023-12-31T23:30:00+02:00",
+            "type": "buy",
+            "cryptoAmount": 1.0,
+            "rate": 100.0,
+            "eurAmount": 100.0,
+            "source": "Coinmotion",
+            "fromCurrency": "EUR",
+            "toCurrency": "BTC",
+            "fee": 0.0,
+            "feeCurrency": "EUR",
+        },
+        {
+            "time": "2024-01-01T00:30:00+02:00",
+            "type": "sell",
+            "cryptoAmount": 1.0,
+            "rate": 150.0,
+            "eurAmount": 150.0,
+            "source": "Coinmotion",
+            "fromCurrency": "BTC",
+            "toCurrency": "EUR",
+            "fee": 0.0,
+            "feeCurrency": "EUR",
+        },
+    ]
+
+    results = create_tax_report(objects)
+
+    assert sorted(results["BTC"]["years"]) == ["2023", "2024"]
+    assert results["BTC"]["years"]["2024"]["total"] == 50.0
+
+    buy_tx, sell_tx = results["BTC"]["transactions"]
+    assert buy_tx["year"] == "2023"
+    assert sell_tx["year"] == "2024"
+    assert sell_tx["parsedTime"].strftime("%d.%m.%Y %H:%M") == "01.01.2024 00:30"
+
+
+def test_create_tax_report_parallel_matches_serial():
+    objects = []
+    for month in range(1, 13):
+        for currency, rate in (("BTC", 10000.0), ("ETH", 1000.0), ("XRP", 1.0)):
+            objects.append(transaction_row(f"2024-{month:02d}-01T10:00:00+02:00", "EUR", currency, 1.0, rate * month))
+            objects.append(transaction_row(f"2024-{month:02d}-15T10:00:00+02:00", currency, "EUR", 0.5, rate * month * 0.6))
+
+    serial = create_tax_report(objects)
+
+    for executor in ("thread", "process"):
+        parallel = create_tax_report(objects, executor=executor, max_workers=2)
+        assert list(parallel) == list(serial)
+        for currency in serial:
+            assert parallel[currency]["years"] == serial[currency]["years"]
+            assert parallel[currency]["transactions"] == serial[currency]["transactions"]
+
+
+def test_create_tax_report_scoped_to_year():
+    objects = [
+        transaction_row("2023-01-01T10:00:00+02:00", "EUR", "BTC", 1.0, 10000.0),
+        transaction_row("2023-02-01T10:00:00+02:00", "EUR", "ETH", 1.0, 1000.0),
+        transaction_row("2023-06-01T10:00:00+02:00", "BTC", "EUR", 0.5, 8000.0),
+        transaction_row("2023-07-01T10:00:00+02:00", "ETH", "EUR", 1.0, 1500.0),
+        transaction_row("2024-01-01T10:00:00+02:00", "EUR", "BTC", 1.0, 20000.0),
+        transaction_row("2024-02-01T10:00:00+02:00", "BTC", "EUR", 1.0, 30000.0),
+        transaction_row("2025-01-01T10:00:00+02:00", "BTC", "EUR", 0.5, 20000.0),
+    ]
+
+    full = create_tax_report(objects)
+    scoped = create_tax_report(objects, year=2024)
+
+    # ETH has nothing in 2024, and only 2024 rows and totals are kept.
+    assert list(scoped) == ["BTC"]
+    assert scoped["BTC"]["years"] == {"2024": full["BTC"]["years"]["2024"]}
+    assert {tx["year"] for tx in scoped["BTC"]["transactions"]} == {"2024"}
+    assert [tx["costBasis"] for tx in scoped["BTC"]["transactions"] if tx["type"] == "sell"] == [
+        5000.0,
+        10000.0,
+    ]
+
+
+def test_create_tax_report_fixed_point():
+    objects = [transaction_row(f"2024-01-{day:02d}T10:00:00+02:00", "EUR", "BTC", 0.1, 100.0) for day in range(1, 11)]
+    objects.append(transaction_row("2024-02-01T10:00:00+02:00", "BTC", "EUR", 1.0, 1500.01))
+    objects.append(transaction_row("2024-03-01T10:00:00+02:00", "EUR", "ETH", 0.123456789012345678, 300.0))
+    objects.append(transaction_row("2024-04-01T10:00:00+02:00", "ETH", "EUR", 0.1, 250.0))
+
+    results = create_tax_report(objects, fixed_point=True)
+
+    sells = [tx for tx in results["BTC"]["transactions"] if tx["type"] == "sell"]
+    assert len(sells) == 10
+    assert sum(tx["costBasis"] for tx in sells) == pytest.approx(1000.0)
+    assert sells[-1]["remainingQuantity"] == 0
+    assert results["BTC"]["years"]["2024"] == {
+        "fromTime": "1.1.2024-31.12.2024",
+        "wins": 500.01,
+        "losses": 0.0,
+        "total": 500.01,
+    }
+    eth_sell = results["ETH"]["transactions"][-1]
+    assert eth_sell["costBasis"] == 243.0
+    assert eth_sell["remainingQuantity"] == pytest.approx(0.023456789012345678)
+
+    with pytest.raises(ValueError):
+        create_tax_report(objects, fixed_point=True, state=ReportState())
+
+
+def test_create_tax_report_streams_rows_to_sink():
+    objects = [
+        transaction_row("2024-01-01T10:00:00+02:00", "EUR", "BTC", 1.0, 10000.0),
+        transaction_row("2024-01-02T10:00:00+02:00", "EUR", "ETH", 2.0, 2000.0),
+        transaction_row("2024-02-01T10:00:00+02:00", "BTC", "EUR", 0.5, 6000.0),
+        transaction_row("2024-03-01T10:00:00+02:00", "ETH", "EUR", 1.0, 1500.0),
+    ]
+    expected = create_tax_report(objects, executor="thread", max_workers=2)
+    received = []
+
+    results = create_tax_report(iter(objects), sink=lambda currency, row: received.append((currency, row)))
+
+    assert list(results) == list(expected)
+    for currency, data in expected.items():
+        assert [row for name, row in received if name == currency] == data["transactions"]
+        assert results[currency]["transactions"] == []
+        assert results[currency]["years"] == data["years"]
+    assert [name for name, _ in received] == ["BTC", "ETH", "BTC", "ETH"]
+
+    with pytest.raises(ValueError):
+        create_tax_report(objects, executor="thread", sink=received.append)
+
+
+def test_split_rows_reference_the_sold_transaction():
+    objects = [
+        transaction_row("2024-01-01T10:00:00+02:00", "EUR", "BTC", 1.0, 10000.0),
+        transaction_row("2024-01-02T10:00:00+02:00", "EUR", "BTC", 1.0, 12000.0),
+        transaction_row("2024-02-01T10:00:00+02:00", "BTC", "EUR", 1.5, 30000.0, fee=30.0),
+    ]
+
+    for fixed_point in (False, True):
+        first, second = create_tax_report(objects, fixed_point=fixed_point)["BTC"]["transactions"][2:]
+
+        assert first.parent is second.parent
+        assert first["time"] == second.time == "2024-02-01T10:00:00+02:00"
+        assert (first["cryptoAmount"], second["cryptoAmount"]) == (1.0, 0.5)
+        assert first["fee"] + second.get("fee") == pytest.approx(30.0)
+        assert first.get("missing", "-") == "-"
+        assert first.to_dict()["costBasis"] == first.costBasis == 10000.0
+        assert first.to_dict()["rate"] == 20000.0
+
+
+def test_create_tax_report_reports_progress_while_matching(monkeypatch):
+    monkeypatch.setattr("processor.PROGRESS_ROWS", 2)
+    objects = [transaction_row(f"2024-01-{day:02d}T10:00:00+02:00", "EUR", "BTC", 0.1, 100.0) for day in range(1, 6)]
+    calls = []
+
+    create_tax_report(objects, progress=lambda done, total: calls.append((done, total)))
+    create_tax_report(iter(objects), progress=lambda done, total: calls.append((done, total)))
+
+    assert calls == [(2, 5), (4, 5), (5, 5), (2, None), (4, None), (5, 5)]
@@ -0,0 +1,34 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from readers import READERS, get_reader
+from readers.CsvReader import iter_csv
+from writers import WRITERS, get_writer
+from writers.PdfWriter import write_pdf_zip
+
+PROJECT_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def test_registries_resolve_formats():
+    assert get_reader("csv") is iter_csv
+    assert get_writer("pdf") is write_pdf_zip
+    assert "xlsx" in WRITERS
+    assert READERS.names() == ["csv", "csv-columnar"]
+
+    with pytest.raises(ValueError):
+        get_writer("docx")
+
+
+def test_entry_points_do_not_import_output_libraries():
+    code = (
+        "import sys, main, api\n"
+        "print(sorted(name for name in ('reportlab', 'openpyxl', 'numpy', 'xlrd') if name in sys.modules))"
+    )
+    output = subprocess.run(
+        [sys.executable, "-c", code], cwd=PROJECT_ROOT, capture_output=True, text=True, check=True
+    ).stdout
+
+    assert output.strip() == "[]"
@@ -0,0 +1,35 @@
+from io import BytesIO
+
+from helpers.report_cache import ReportCache, cache_key, upload_digest
+
+
+def test_report_cache_evicts_least_recently_used_by_size():
+    cache = ReportCache(max_bytes=10, directory=None)
+    cache.put("a", b"aaaa", 4)
+    cache.put("b", b"bbbb", 4)
+    assert cache.get("a") == b"aaaa"
+
+    cache.put("c", b"cccc", 4)
+
+    assert cache.get("b") is None
+    assert cache.get("a") == b"aaaa"
+    assert cache.get("c") == b"cccc"
+    assert cache.metrics()["bytes"] == 8
+
+
+def test_report_cache_reads_back_from_disk(tmp_path):
+    ReportCache(max_bytes=100, directory=str(tmp_path)).put("zip", b"archive", 7)
+
+    cache = ReportCache(max_bytes=100, directory=str(tmp_path))
+
+    assert cache.get("zip") == b"archive"
+    assert cache.metrics()["diskHits"] == 1
+
+
+def test_cache_key_depends_on_content_and_year():
+    first = upload_digest(BytesIO(b"type,time\n"))
+    second = upload_digest(BytesIO(b"type,time\n\n"))
+
+    assert first != second
+    assert cache_key("pdf-zip", first, 2024) != cache_key("pdf-zip", first, 2023)
+    assert cache_key("pdf-zip", first, None) == cache_key("pdf-zip", first, None)
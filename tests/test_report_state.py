@@ -0,0 +1,57 @@
+from benchmarks.synthetic import transaction_row
+from helpers.report_state import ReportState, load_report_state, save_report_state
+from processor import create_tax_report
+
+
+def _as_dicts(transactions):
+    # Buys are Transaction records and sells SplitTransaction records; both flatten with to_dict().
+    return [tx.to_dict() for tx in transactions]
+
+
+HISTORY = [
+    transaction_row("2023-01-01T10:00:00+02:00", "EUR", "BTC", 1.0, 10000.0),
+    transaction_row("2023-03-01T10:00:00+02:00", "EUR", "BTC", 1.0, 20000.0),
+    transaction_row("2023-06-01T10:00:00+02:00", "BTC", "EUR", 0.5, 8000.0),
+]
+NEW = [
+    transaction_row("2024-01-01T10:00:00+02:00", "EUR", "ETH", 2.0, 4000.0),
+    transaction_row("2024-02-01T10:00:00+02:00", "BTC", "EUR", 1.0, 30000.0),
+    transaction_row("2024-03-01T10:00:00+02:00", "ETH", "EUR", 1.0, 3000.0),
+]
+
+
+def test_incremental_report_matches_full_run(tmp_path):
+    full = create_tax_report(HISTORY + NEW)
+
+    path = tmp_path / "state.json.gz"
+    state = ReportState()
+    create_tax_report(HISTORY, state=state)
+    save_report_state(state, path)
+
+    state = load_report_state(path)
+    # Already applied rows are skipped when the whole export is read again.
+    incremental = create_tax_report(HISTORY + NEW, state=state)
+
+    assert list(incremental) == list(full)
+    for currency, data in full.items():
+        assert incremental[currency]["years"] == data["years"]
+        new_rows = _as_dicts(incremental[currency]["transactions"])
+        full_rows = _as_dicts(data["transactions"])
+        assert new_rows == full_rows[len(full_rows) - len(new_rows):]
+
+    # The 2024 BTC sell consumes both remaining lots, one split row per lot.
+    assert {tx["time"] for tx in incremental["BTC"]["transactions"]} == {"2024-02-01T10:00:00+02:00"}
+    assert state.watermark == incremental["ETH"]["transactions"][-1]["epoch"]
+
+
+def test_report_state_rejects_other_report_versions(tmp_path, monkeypatch):
+    path = tmp_path / "state.json.gz"
+    save_report_state(ReportState(), path)
+
+    monkeypatch.setattr("helpers.report_state.REPORT_VERSION", "0.0.0")
+    try:
+        load_report_state(path)
+    except ValueError as e:
+        assert "Rebuild it from the full history" in str(e)
+    else:
+        raise AssertionError("expected ValueError")
@@ -0,0 +1,54 @@
+import openpyxl
+
+from processor import create_tax_report
+from writers.XlsWriter import OUTPUT_HEADERS, write_xls
+
+
+def _report():
+    return create_tax_report([
+        {
+            "time": "2024-01-01T10:00:00+02:00",
+            "type": "buy",
+            "cryptoAmount": 1.0,
+            "rate": 10000.0,
+            "eurAmount": 10000.0,
+            "source": "Coinmotion",
+            "fromCurrency": "EUR",
+            "toCurrency": "BTC",
+            "fee": 0.0,
+            "feeCurrency": "EUR",
+        },
+        {
+            "time": "2024-02-01T10:00:00+02:00",
+            "type": "sell",
+            "cryptoAmount": 0.4,
+            "rate": 15000.0,
+            "eurAmount": 6000.0,
+            "source": "Coinmotion",
+            "fromCurrency": "BTC",
+            "toCurrency": "EUR",
+            "fee": 1.0,
+            "feeCurrency": "EUR",
+        },
+    ])
+
+
+def _sheet_rows(path):
+    sheet = openpyxl.load_workbook(path).worksheets[0]
+    return [
+        tuple(value for value in row if value is not None)
+        for row in sheet.iter_rows(values_only=True)
+    ]
+
+
+def test_streamed_sheet_matches_regular_workbook(tmp_path):
+    report = _report()
+    write_xls(report, str(tmp_path / "regular"), streaming=False)
+    write_xls(report, str(tmp_path / "streamed"), streaming=True)
+
+    regular = _sheet_rows(tmp_path / "regular" / "BTC.xlsx")
+    streamed = _sheet_rows(tmp_path / "streamed" / "BTC.xlsx")
+
+    assert streamed == regular
+    assert tuple(OUTPUT_HEADERS) in streamed
+    assert streamed[-1][:2] == ("01.02.2024 10:00:00", "sell")
@@ -0,0 +1,17 @@
+class ChunkSink:
+    """Unseekable write target, e.g. for zipfile, that hands out what was written."""
+
+    def __init__(self):
+        self._chunks = []
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
@@ -0,0 +1,226 @@
+import json
+import math
+import os
+import struct
+import sys
+from array import array
+
+from config import REPORT_VERSION
+from helpers.instrumentation import stage
+from writers import ExportFormat
+from writers.ReportRecords import TRANSACTION_COLUMNS, YEAR_COLUMNS, iter_transaction_rows, iter_year_rows
+
+# Layout of a .cmcol file:
+#
+#   MAGIC, header length (uint32, little-endian), header (UTF-8 JSON),
+#   then the column buffers, each starting on an 8-byte boundary.
+#
+# The header lists the "transactions" and "years" tables with their row
+# count and columns. Each column has a name, a type and "buffers", the
+# [offset, length] of its data relative to the end of the header:
+#
+#   f64   one buffer of float64 values, NaN where a value is missing
+#   i64   one buffer of int64 values
+#   str   uint64 end offsets of each value, then the UTF-8 text
+#   dict  one buffer of uint32 codes into the column's "values" list
+#
+# All numbers are little-endian, so the buffers can be read directly,
+# e.g. with numpy.frombuffer.
+MAGIC = b"CMCOLS01"
+COLUMNAR_FILENAME = "report.cmcol"
+_ALIGNMENT = 8
+_LITTLE_ENDIAN = sys.byteorder == "little"
+
+
+def write_columnar(objects, output_folder="./output/"):
+    """Writes the split transactions and yearly summaries as report.cmcol."""
+    if not objects:
+        print("No objects to write")
+        return
+
+    os.makedirs(output_folder, exist_ok=True)
+    rows = sum(len(data.get("transactions", [])) for data in objects.values())
+    with stage("write_columnar", rows=rows):
+        with open(os.path.join(output_folder, COLUMNAR_FILENAME), "wb") as handle:
+            for chunk in iter_columnar_chunks(objects):
+                handle.write(chunk)
+
+
+def iter_columnar_chunks(objects):
+    """Yields the file as its header followed by one chunk per column buffer."""
+    tables = {
+        "transactions": _build_table(TRANSACTION_COLUMNS, iter_transaction_rows(objects)),
+        "years": _build_table(YEAR_COLUMNS, iter_year_rows(objects)),
+    }
+
+    header = {"reportVersion": REPORT_VERSION, "tables": {}}
+    buffers = []
+    offset = 0
+    for table_name, (row_count, columns) in tables.items():
+        described = []
+        for (name, kind), column in columns:
+            entry = {"name": name, "type": kind, "buffers": []}
+            for buffer in column.buffers():
+                entry["buffers"].append([offset, len(buffer)])
+                padding = -len(buffer) % _ALIGNMENT
+                buffers.append((buffer, padding))
+                offset += len(buffer) + padding
+            entry.update(column.describe())
+            described.append(entry)
+        header["tables"][table_name] = {"rows": row_count, "columns": described}
+
+    encoded = json.dumps(header, separators=(",", ":")).encode("utf-8")
+    # Pad the header too, so buffer offsets are aligned in the whole file.
+    encoded += b" " * (-(len(MAGIC) + 4 + len(encoded)) % _ALIGNMENT)
+    yield MAGIC + struct.pack("<I", len(encoded)) + encoded
+    for buffer, padding in buffers:
+        yield bytes(buffer) + b"\0" * padding
+
+
+def read_columnar(data):
+    """
+    Reads a .cmcol file's bytes back into plain values:
+    {"transactions": {column: [values]}, "years": {...}}. Missing numbers
+    come back as None.
+    """
+    data = memoryview(data)
+    if bytes(data[:len(MAGIC)]) != MAGIC:
+        raise ValueError("Not a columnar report file")
+    header_start = len(MAGIC) + 4
+    (header_length,) = struct.unpack("<I", data[len(MAGIC):header_start])
+    header = json.loads(bytes(data[header_start:header_start + header_length]))
+    body = data[header_start + header_length:]
+
+    tables = {}
+    for table_name, table in header["tables"].items():
+        values = {}
+        for column in table["columns"]:
+            parts = [body[offset:offset + length] for offset, length in column["buffers"]]
+            values[column["name"]] = _READERS[column["type"]](parts, column)
+        tables[table_name] = values
+    return tables
+
+
+COLUMNAR_EXPORT = ExportFormat(COLUMNAR_FILENAME, "application/octet-stream", iter_columnar_chunks)
+
+
+class _F64Column:
+    def __init__(self):
+        self.values = array("d")
+
+    def append(self, value):
+        self.values.append(math.nan if value is None or value == "" else float(value))
+
+    def buffers(self):
+        return [_little_endian(self.values)]
+
+    def describe(self):
+        return {}
+
+
+class _I64Column:
+    def __init__(self):
+        self.values = array("q")
+
+    def append(self, value):
+        self.values.append(0 if value is None else int(value))
+
+    def buffers(self):
+        return [_little_endian(self.values)]
+
+    def describe(self):
+        return {}
+
+
+class _StrColumn:
+    def __init__(self):
+        self.ends = array("Q")
+        self.text = bytearray()
+
+    def append(self, value):
+        if value is not None:
+            self.text += str(value).encode("utf-8")
+        self.ends.append(len(self.text))
+
+    def buffers(self):
+        return [_little_endian(self.ends), self.text]
+
+    def describe(self):
+        return {}
+
+
+class _DictColumn:
+    def __init__(self):
+        self.codes = array("I")
+        self.values = []
+        self.index = {}
+
+    def append(self, value):
+        code = self.index.get(value)
+        if code is None:
+            code = self.index[value] = len(self.values)
+            self.values.append(value)
+        self.codes.append(code)
+
+    def buffers(self):
+        return [_little_endian(self.codes)]
+
+    def describe(self):
+        return {"values": self.values}
+
+
+_COLUMNS = {"f64": _F64Column, "i64": _I64Column, "str": _StrColumn, "dict": _DictColumn}
+
+
+def _build_table(columns, rows):
+    builders = [_COLUMNS[kind]() for _, kind in columns]
+    appends = [builder.append for builder in builders]
+    row_count = 0
+    for row in rows:
+        for append, value in zip(appends, row):
+            append(value)
+        row_count += 1
+    return row_count, list(zip(columns, builders))
+
+
+def _little_endian(values):
+    if _LITTLE_ENDIAN:
+        return values.tobytes()
+    swapped = array(values.typecode, values)
+    swapped.byteswap()
+    return swapped.tobytes()
+
+
+def _read_array(typecode, buffer):
+    values = array(typecode)
+    values.frombytes(buffer)
+    if not _LITTLE_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def _read_f64(parts, column):
+    return [None if math.isnan(value) else value for value in _read_array("d", parts[0])]
+
+
+def _read_i64(parts, column):
+    return _read_array("q", parts[0]).tolist()
+
+
+def _read_str(parts, column):
+    ends = _read_array("Q", parts[0])
+    text = bytes(parts[1])
+    values = []
+    start = 0
+    for end in ends:
+        values.append(text[start:end].decode("utf-8"))
+        start = end
+    return values
+
+
+def _read_dict(parts, column):
+    lookup = column["values"]
+    return [lookup[code] for code in _read_array("I", parts[0])]
+
+
+_READERS = {"f64": _read_f64, "i64": _read_i64, "str": _read_str, "dict": _read_dict}
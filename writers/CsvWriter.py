@@ -0,0 +1,70 @@
+import csv
+import io
+import os
+import zipfile
+from itertools import islice
+
+from helpers.instrumentation import stage
+from writers import ExportFormat
+from writers.ChunkSink import ChunkSink
+from writers.ReportRecords import TRANSACTION_FIELDS, YEAR_FIELDS, iter_transaction_rows, iter_year_rows
+
+TRANSACTIONS_FILENAME = "transactions.csv"
+YEARS_FILENAME = "years.csv"
+# Rows are written in batches; each batch is one chunk of a streamed zip.
+BATCH_ROWS = 5000
+
+
+def write_csv(objects, output_folder="./output/"):
+    """
+    Writes the report as two CSV files: transactions.csv with the split
+    transactions of every currency and years.csv with the yearly summaries.
+    Values are written unrounded; fields a row does not have are empty.
+    """
+    if not objects:
+        print("No objects to write")
+        return
+
+    os.makedirs(output_folder, exist_ok=True)
+    with stage("write_csv", rows=_row_count(objects)):
+        for filename, header, rows in _tables(objects):
+            with open(os.path.join(output_folder, filename), "w", encoding="utf-8", newline="") as handle:
+                writer = csv.writer(handle)
+                writer.writerow(header)
+                writer.writerows(rows)
+
+
+def iter_csv_zip_chunks(objects):
+    """Yields a zip of transactions.csv and years.csv in chunks as the rows are written."""
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename, header, rows in _tables(objects):
+            with archive.open(filename, "w", force_zip64=True) as entry:
+                text = io.TextIOWrapper(entry, encoding="utf-8", newline="")
+                writer = csv.writer(text)
+                writer.writerow(header)
+                while True:
+                    batch = list(islice(rows, BATCH_ROWS))
+                    if not batch:
+                        break
+                    writer.writerows(batch)
+                    text.flush()
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+                text.flush()
+                text.detach()
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+CSV_ZIP_EXPORT = ExportFormat("report_csv.zip", "application/zip", iter_csv_zip_chunks)
+
+
+def _tables(objects):
+    yield TRANSACTIONS_FILENAME, TRANSACTION_FIELDS, iter_transaction_rows(objects)
+    yield YEARS_FILENAME, YEAR_FIELDS, iter_year_rows(objects)
+
+
+def _row_count(objects):
+    return sum(len(data.get("transactions", [])) for data in objects.values())
@@ -0,0 +1,55 @@
+import json
+import os
+from itertools import islice
+
+from helpers.instrumentation import stage
+from writers import ExportFormat
+from writers.ReportRecords import TRANSACTION_FIELDS, YEAR_FIELDS, iter_transaction_rows, iter_year_rows
+
+JSONL_FILENAME = "report.jsonl"
+# Lines are encoded in batches; each batch is one chunk.
+BATCH_LINES = 5000
+
+_encode = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+
+def write_jsonl(objects, output_folder="./output/"):
+    """
+    Writes the report as report.jsonl: one JSON object per line, first the
+    yearly summaries ("record": "year") and then the split transactions
+    ("record": "transaction"). Values are unrounded; missing fields are null.
+    """
+    if not objects:
+        print("No objects to write")
+        return
+
+    os.makedirs(output_folder, exist_ok=True)
+    rows = sum(len(data.get("transactions", [])) for data in objects.values())
+    with stage("write_jsonl", rows=rows):
+        with open(os.path.join(output_folder, JSONL_FILENAME), "wb") as handle:
+            for chunk in iter_jsonl_chunks(objects):
+                handle.write(chunk)
+
+
+def iter_jsonl_chunks(objects):
+    """Yields report.jsonl in chunks of BATCH_LINES lines."""
+    lines = iter_jsonl_lines(objects)
+    while True:
+        batch = list(islice(lines, BATCH_LINES))
+        if not batch:
+            break
+        yield "".join(batch).encode("utf-8")
+
+
+def iter_jsonl_lines(objects):
+    for fields, record, rows in (
+        (YEAR_FIELDS, "year", iter_year_rows(objects)),
+        (TRANSACTION_FIELDS, "transaction", iter_transaction_rows(objects)),
+    ):
+        for row in rows:
+            values = {"record": record}
+            values.update(zip(fields, row))
+            yield _encode(values) + "\n"
+
+
+JSONL_EXPORT = ExportFormat(JSONL_FILENAME, "application/x-ndjson", iter_jsonl_chunks)
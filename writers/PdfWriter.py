@@ -1,4 +1,5 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
 from io import BytesIO
 import zipfile
@@ -6,9 +7,12 @@ import zipfile
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import A4, landscape
 from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
+from reportlab.platypus import Flowable, SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 
-from config import REPORT_VERSION
+from config import PDF_WORKERS, REPORT_VERSION
+from helpers.instrumentation import stage
+from writers import ExportFormat
+from writers.ChunkSink import ChunkSink
 
 
 OUTPUT_HEADERS = [
@@ -38,7 +42,7 @@ YEAR_HEADERS = [
 ]
 
 
-def write_pdf_zip(objects, output_folder="./output/", zip_name="pdf_reports.zip"):
+def write_pdf_zip(objects, output_folder="./output/", zip_name="pdf_reports.zip", workers=None, progress=None):
     if not objects:
         print("No objects to write")
         return
@@ -46,23 +50,77 @@ def write_pdf_zip(objects, output_folder="./output/", zip_name="pdf_reports.zip"
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
 
-    zip_bytes = build_pdf_zip_bytes(objects)
+    zip_bytes = build_pdf_zip_bytes(objects, workers=workers, progress=progress)
     zip_path = os.path.join(output_folder, zip_name)
     with open(zip_path, "wb") as handle:
         handle.write(zip_bytes)
 
 
-def build_pdf_zip_bytes(objects):
+def build_pdf_zip_bytes(objects, workers=None, progress=None):
     buffer = BytesIO()
-    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
-        for currency, data in objects.items():
-            pdf_bytes = _build_pdf_bytes(currency, data)
-            filename = f"{_sanitize_filename(currency)}.pdf"
-            archive.writestr(filename, pdf_bytes)
+    rows = sum(len(data.get("transactions", [])) for data in objects.values())
+    with stage("build_pdf_zip_bytes", rows=rows):
+        with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for filename, pdf_bytes in _render_pdfs(objects, workers, progress):
+                archive.writestr(filename, pdf_bytes)
     return buffer.getvalue()
 
 
+def iter_pdf_zip_chunks(objects, workers=None, progress=None):
+    """
+    Yields the PDF zip archive in chunks as each currency is rendered.
+    Only one rendered PDF is held at a time; the archive is written in
+    streaming form (data descriptors) so no seeking is needed.
+    """
+    sink = ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for filename, pdf_bytes in _render_pdfs(objects, workers, progress):
+            archive.writestr(filename, pdf_bytes)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    chunk = sink.drain()
+    if chunk:
+        yield chunk
+
+
+PDF_ZIP_EXPORT = ExportFormat("pdf_reports.zip", "application/zip", iter_pdf_zip_chunks)
+
+
+def _render_pdfs(objects, workers=None, progress=None):
+    """
+    Yields (filename, pdf bytes) for each currency in report order.
+    With more than one worker (default config.PDF_WORKERS) the PDFs are
+    rendered in a process pool; otherwise they are rendered one at a time.
+    progress(done, total) is called after each PDF has been rendered.
+    """
+    workers = PDF_WORKERS if workers is None else workers
+    currencies = list(objects.keys())
+    total = len(currencies)
+
+    if workers <= 1 or total <= 1:
+        rendered = (_build_pdf_bytes(currency, objects[currency]) for currency in currencies)
+        yield from _named_pdfs(currencies, rendered, total, progress)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, total)) as pool:
+        rendered = pool.map(_build_pdf_bytes, currencies, (objects[currency] for currency in currencies))
+        yield from _named_pdfs(currencies, rendered, total, progress)
+
+
+def _named_pdfs(currencies, rendered, total, progress):
+    for done, (currency, pdf_bytes) in enumerate(zip(currencies, rendered), start=1):
+        if progress is not None:
+            progress(done, total)
+        yield f"{_sanitize_filename(currency)}.pdf", pdf_bytes
+
+
 def _build_pdf_bytes(currency, data):
+    with stage("render_pdf", rows=len(data.get("transactions", [])), currency=currency):
+        return _render_pdf(currency, data)
+
+
+def _render_pdf(currency, data):
     buffer = BytesIO()
     doc = SimpleDocTemplate(
         buffer,
@@ -72,52 +130,14 @@ def _build_pdf_bytes(currency, data):
         topMargin=20,
         bottomMargin=20,
     )
-    styles = getSampleStyleSheet()
-    disclaimer_style = ParagraphStyle(
-        "Disclaimer",
-        parent=styles["Normal"],
-        fontSize=8,
-        leading=10,
-        textColor=colors.black,
-        spaceBefore=4,
-        spaceAfter=8,
-    )
+    boilerplate = _PdfBoilerplate(REPORT_VERSION)
+    styles = boilerplate.styles
 
     elements = [Paragraph(f"Tax Report - {currency}", styles["Title"]), Spacer(1, 6)]
-    elements.append(Paragraph(f"Version {REPORT_VERSION}", disclaimer_style))
-    elements.append(Paragraph(f"Generated on {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}", disclaimer_style))
-    elements.append(Paragraph("Tämä raportti on automaattisesti muodostettu Coinmotionin toimittamien transaktiotietojen sekä käyttäjän antamien lähtötietojen perusteella. / This report has been automatically generated based on transaction data provided by Coinmotion and information supplied by the user.", disclaimer_style))
-
-    elements.append(Paragraph("Dictionary", styles["Heading2"]))
-    dictionary_rows = [
-        ["Key", "Description"],
-        ["Year", "Vuosi"],
-        ["From Time", "Laskentajakso"],
-        ["Wins €", "Voitot yhteensä euroina"],
-        ["Losses €", "Tappiot yhteensä euroina"],
-        ["Total €", "Nettovoitto/-tappio euroina"],
-        ["Time", "Tapahtuma-aika"],
-        ["type", "Tapahtumatyyppi"],
-        ["buy", "Ostotapahtuma"],
-        ["sell", "Myyntitapahtuma"],
-        ["Crypto Amount", "Kryptovaluutan määrä"],
-        ["Amount €", "Euro määrä"],
-        ["Rate", "Kryptovaluutan kurssi euroissa"],
-        ["From Currency", "Mistä valuutasta"],
-        ["To Currency", "Mihin valuuttaan"],
-        ["Remaining Quantity", "Jäljellä oleva määrä"],
-        ["Cost Basis €", "Hankintameno"],
-        ["Assumed Cost €", "Hankintameno-olettama 20% tai 40% omistusajan mukaan"],
-        ["Cost Basis Used", "Käytetty hankintameno"],
-        ["Cost Basis Method", "Hankintamenomenetelmä"],
-        ["Profit/Loss €", "Myyntivoitto/-tappio"],
-        ["fifo", "First In First Out -menetelmä (hankintameno)"],
-        ["assumption", "Hankintameno-olettama"],
-    ]
-    elements.append(_make_table(dictionary_rows, col_widths=[100, 400]))
-    elements.append(Spacer(1, 36))
+    elements.append(boilerplate.version())
+    elements.append(Paragraph(f"Generated on {datetime.now().strftime('%d.%m.%Y %H:%M:%S')}", boilerplate.disclaimer_style))
+    elements.extend(boilerplate.introduction())
 
-    elements.append(Paragraph("Yearly Summary *", styles["Heading2"]))
     year_rows = [YEAR_HEADERS]
     for year in sorted(data.get("years", {}).keys()):
         summary = data["years"][year]
@@ -131,17 +151,13 @@ def _build_pdf_bytes(currency, data):
             ]
         )
     elements.append(_make_table(year_rows, col_widths=_year_col_widths(doc.width)))
-    elements.append(Paragraph("* Luvuista on vähennetty mahdolliset osto- ja myyntikulut. / The figures have been reduced by possible purchase and sale fees.", disclaimer_style))
-    elements.append(Spacer(1, 16))
+    elements.extend(boilerplate.transactions_heading())
 
-    elements.append(Paragraph("Transactions **", styles["Heading2"]))
-    elements.append(Spacer(1, 16))
-
-    tx_rows = [[_header_cell(text, styles) for text in OUTPUT_HEADERS]]
+    tx_rows = [boilerplate.transaction_header()]
     for item in data.get("transactions", []):
         tx_rows.append(
             [
-                _format_time(item["time"]),
+                _format_time(item.get("parsedTime", item["time"])),
                 item["type"],
                 _format_crypto(item["cryptoAmount"]),
                 item["rate"],
@@ -158,58 +174,126 @@ def _build_pdf_bytes(currency, data):
                 _format_eur(item.get("profitLoss", "")),
             ]
         )
-    elements.append(
-        _make_table(
-            tx_rows,
-            repeat_header=True,
-            col_widths=_transaction_col_widths(doc.width),
-        )
-    )
-    elements.append(Paragraph("** Voitto/tappio on laskettu Amount € - Cost Basis Used - Selling fee €. / Profit/loss is calculated as Amount € - Cost Basis Used - Selling fee €.", disclaimer_style)) 
-
-    elements.append(Spacer(1, 12))
-    elements.append(Paragraph("Disclaimer", styles["Heading2"]))
-    elements.append(
-        Paragraph(
-            """Tämä raportti on automaattisesti muodostettu Coinmotionin toimittamien transaktiotietojen sekä käyttäjän antamien lähtötietojen perusteella.<br/><br/>
-            Raportti on suuntaa-antava eikä ole veroneuvontaa. Palvelu ei takaa raportin tietojen täydellisyyttä, oikeellisuutta tai soveltuvuutta käyttäjän yksittäiseen verotustilanteeseen. Käyttäjä vastaa itse tietojen oikeellisuudesta ja veroilmoitukselle ilmoitettavista luvuista.<br/><br/>
-            Raportti ei välttämättä huomioi oikein tai kattavasti kaikkia seuraavia tapahtumia:<br/>
-            • lompakkojen välisiä siirtoja<br/>
-            • ulkopuolisista pörsseistä tai palveluista tehtyjä transaktioita<br/>
-            • staking-, lending- tai muita tuottotapahtumia<br/>
-            • DeFi-tapahtumia<br/>
-            • airdroppeja ja hard fork -tapahtumia<br/>
-            • NFT-kauppaa<br/><br/>
-            Raportissa esitetyt laskelmat (esim. todellinen hankintahinta tai hankintameno-olettama) ovat laskennallisia. Hankintameno-olettaman käyttö ja lopullinen verotuksellinen valinta on aina käyttäjän vastuulla.<br/><br/>
-            Palvelun tarjoaja ei vastaa mahdollisista veroseuraamuksista, veronkorotuksista tai muista vahingoista, jotka aiheutuvat raportin käytöstä.<br/><br/>
-            Ajantasaiset ja sitovat ohjeet löytyvät Verohallinnon verkkosivuilta. Epäselvissä tilanteissa suositellaan ottamaan yhteyttä veroasiantuntijaan.""",
-            disclaimer_style,
-        )
-    )
-    elements.append(Spacer(1, 8))
-    elements.append(
-        Paragraph(
-            """This report has been automatically generated based on transaction data provided by Coinmotion and information supplied by the user.<br/><br/>
-            This report is for informational purposes only and does not constitute tax advice. The service does not guarantee the completeness, accuracy, or suitability of the report for the user’s individual tax situation. The user is solely responsible for verifying the correctness of the information and the figures reported to the tax authorities.<br/><br/>
-            The report may not fully or correctly account for the following events:<br/>
-            • transfers between wallets<br/>
-            • transactions from external exchanges or services<br/>
-            • staking, lending, or yield-related income<br/>
-            • DeFi transactions<br/>
-            • airdrops and hard forks<br/>
-            • NFT transactions<br/><br/>
-            Any calculations presented in the report (e.g. actual acquisition cost or deemed acquisition cost) are estimates. The choice and applicability of the deemed acquisition cost method is always the responsibility of the user.<br/><br/>
-            The service provider shall not be held liable for any tax consequences, penalties, or damages arising from the use of this report.<br/><br/>
-            For official and binding guidance, please refer to the Finnish Tax Administration or consult a qualified tax professional.""",
-            disclaimer_style,
-        )
-    )
+    elements.append(_PagedTable(tx_rows, col_widths=_transaction_col_widths(doc.width)))
+    elements.extend(boilerplate.closing())
 
-    
     doc.build(elements)
     return buffer.getvalue()
 
 
+# Static content of every PDF. Platypus flowables are mutated while a
+# document is laid out and split, so they are built anew for each document
+# from these constants.
+DICTIONARY_ROWS = [
+    ["Key", "Description"],
+    ["Year", "Vuosi"],
+    ["From Time", "Laskentajakso"],
+    ["Wins €", "Voitot yhteensä euroina"],
+    ["Losses €", "Tappiot yhteensä euroina"],
+    ["Total €", "Nettovoitto/-tappio euroina"],
+    ["Time", "Tapahtuma-aika"],
+    ["type", "Tapahtumatyyppi"],
+    ["buy", "Ostotapahtuma"],
+    ["sell", "Myyntitapahtuma"],
+    ["Crypto Amount", "Kryptovaluutan määrä"],
+    ["Amount €", "Euro määrä"],
+    ["Rate", "Kryptovaluutan kurssi euroissa"],
+    ["From Currency", "Mistä valuutasta"],
+    ["To Currency", "Mihin valuuttaan"],
+    ["Remaining Quantity", "Jäljellä oleva määrä"],
+    ["Cost Basis €", "Hankintameno"],
+    ["Assumed Cost €", "Hankintameno-olettama 20% tai 40% omistusajan mukaan"],
+    ["Cost Basis Used", "Käytetty hankintameno"],
+    ["Cost Basis Method", "Hankintamenomenetelmä"],
+    ["Profit/Loss €", "Myyntivoitto/-tappio"],
+    ["fifo", "First In First Out -menetelmä (hankintameno)"],
+    ["assumption", "Hankintameno-olettama"],
+]
+
+INTRODUCTION_TEXT = "Tämä raportti on automaattisesti muodostettu Coinmotionin toimittamien transaktiotietojen sekä käyttäjän antamien lähtötietojen perusteella. / This report has been automatically generated based on transaction data provided by Coinmotion and information supplied by the user."
+
+FEES_NOTE_TEXT = "* Luvuista on vähennetty mahdolliset osto- ja myyntikulut. / The figures have been reduced by possible purchase and sale fees."
+
+PROFIT_NOTE_TEXT = "** Voitto/tappio on laskettu Amount € - Cost Basis Used - Selling fee €. / Profit/loss is calculated as Amount € - Cost Basis Used - Selling fee €."
+
+DISCLAIMER_FI_TEXT = """Tämä raportti on automaattisesti muodostettu Coinmotionin toimittamien transaktiotietojen sekä käyttäjän antamien lähtötietojen perusteella.<br/><br/>
+Raportti on suuntaa-antava eikä ole veroneuvontaa. Palvelu ei takaa raportin tietojen täydellisyyttä, oikeellisuutta tai soveltuvuutta käyttäjän yksittäiseen verotustilanteeseen. Käyttäjä vastaa itse tietojen oikeellisuudesta ja veroilmoitukselle ilmoitettavista luvuista.<br/><br/>
+Raportti ei välttämättä huomioi oikein tai kattavasti kaikkia seuraavia tapahtumia:<br/>
+• lompakkojen välisiä siirtoja<br/>
+• ulkopuolisista pörsseistä tai palveluista tehtyjä transaktioita<br/>
+• staking-, lending- tai muita tuottotapahtumia<br/>
+• DeFi-tapahtumia<br/>
+• airdroppeja ja hard fork -tapahtumia<br/>
+• NFT-kauppaa<br/><br/>
+Raportissa esitetyt laskelmat (esim. todellinen hankintahinta tai hankintameno-olettama) ovat laskennallisia. Hankintameno-olettaman käyttö ja lopullinen verotuksellinen valinta on aina käyttäjän vastuulla.<br/><br/>
+Palvelun tarjoaja ei vastaa mahdollisista veroseuraamuksista, veronkorotuksista tai muista vahingoista, jotka aiheutuvat raportin käytöstä.<br/><br/>
+Ajantasaiset ja sitovat ohjeet löytyvät Verohallinnon verkkosivuilta. Epäselvissä tilanteissa suositellaan ottamaan yhteyttä veroasiantuntijaan."""
+
+DISCLAIMER_EN_TEXT = """This report has been automatically generated based on transaction data provided by Coinmotion and information supplied by the user.<br/><br/>
+This report is for informational purposes only and does not constitute tax advice. The service does not guarantee the completeness, accuracy, or suitability of the report for the user’s individual tax situation. The user is solely responsible for verifying the correctness of the information and the figures reported to the tax authorities.<br/><br/>
+The report may not fully or correctly account for the following events:<br/>
+• transfers between wallets<br/>
+• transactions from external exchanges or services<br/>
+• staking, lending, or yield-related income<br/>
+• DeFi transactions<br/>
+• airdrops and hard forks<br/>
+• NFT transactions<br/><br/>
+Any calculations presented in the report (e.g. actual acquisition cost or deemed acquisition cost) are estimates. The choice and applicability of the deemed acquisition cost method is always the responsibility of the user.<br/><br/>
+The service provider shall not be held liable for any tax consequences, penalties, or damages arising from the use of this report.<br/><br/>
+For official and binding guidance, please refer to the Finnish Tax Administration or consult a qualified tax professional."""
+
+
+class _PdfBoilerplate:
+    """Styles and static flowables of one document."""
+
+    def __init__(self, report_version):
+        self.report_version = report_version
+        self.styles = styles = getSampleStyleSheet()
+        self.disclaimer_style = ParagraphStyle(
+            "Disclaimer",
+            parent=styles["Normal"],
+            fontSize=8,
+            leading=10,
+            textColor=colors.black,
+            spaceBefore=4,
+            spaceAfter=8,
+        )
+
+    def version(self):
+        return Paragraph(f"Version {self.report_version}", self.disclaimer_style)
+
+    def introduction(self):
+        heading = self.styles["Heading2"]
+        return [
+            Paragraph(INTRODUCTION_TEXT, self.disclaimer_style),
+            Paragraph("Dictionary", heading),
+            _make_table(DICTIONARY_ROWS, col_widths=[100, 400]),
+            Spacer(1, 36),
+            Paragraph("Yearly Summary *", heading),
+        ]
+
+    def transactions_heading(self):
+        return [
+            Paragraph(FEES_NOTE_TEXT, self.disclaimer_style),
+            Spacer(1, 16),
+            Paragraph("Transactions **", self.styles["Heading2"]),
+            Spacer(1, 16),
+        ]
+
+    def transaction_header(self):
+        return [_header_cell(text, self.styles) for text in OUTPUT_HEADERS]
+
+    def closing(self):
+        return [
+            Paragraph(PROFIT_NOTE_TEXT, self.disclaimer_style),
+            Spacer(1, 12),
+            Paragraph("Disclaimer", self.styles["Heading2"]),
+            Paragraph(DISCLAIMER_FI_TEXT, self.disclaimer_style),
+            Spacer(1, 8),
+            Paragraph(DISCLAIMER_EN_TEXT, self.disclaimer_style),
+        ]
+
+
 def _make_table(rows, repeat_header=False, col_widths=None):
     table = Table(rows, repeatRows=1 if repeat_header else 0, colWidths=col_widths)
     table.setStyle(
@@ -228,6 +312,65 @@ def _make_table(rows, repeat_header=False, col_widths=None):
     return table
 
 
+class _PagedTable(Flowable):
+    """
+    A table with a repeated header row that is cut into one Table per page.
+    Splitting a single large Table re-measures every remaining row on each
+    page, which is quadratic in the row count. Here every page only builds
+    and measures the rows it shows, and the pages look the same as with
+    _make_table(rows, repeat_header=True).
+    """
+
+    def __init__(self, rows, col_widths, start=1):
+        super().__init__()
+        self.rows = rows
+        self.col_widths = col_widths
+        self.start = start
+        self.hAlign = "CENTER"
+        self._row_height = None
+
+    def wrap(self, availWidth, availHeight):
+        header_height, row_height = self._measure()
+        self.width = sum(self.col_widths)
+        self.height = header_height + row_height * (len(self.rows) - self.start)
+        return self.width, self.height
+
+    def split(self, availWidth, availHeight):
+        header_height, row_height = self._measure()
+        end = min(self.start + int((availHeight - header_height) // row_height), len(self.rows))
+        while end > self.start:
+            table = self._table(end)
+            _, height = table.wrap(availWidth, availHeight)
+            if height <= availHeight:
+                break
+            end -= 1
+        if end <= self.start:
+            return []
+        if end == len(self.rows):
+            return [table]
+        return [table, _PagedTable(self.rows, self.col_widths, end)]
+
+    def draw(self):
+        table = self._table(len(self.rows))
+        _, height = table.wrapOn(self.canv, self.width, self.height)
+        table.drawOn(self.canv, 0, self.height - height)
+
+    def _table(self, end):
+        return _make_table([self.rows[0]] + self.rows[self.start:end], repeat_header=True,
+                           col_widths=self.col_widths)
+
+    def _measure(self):
+        # Header and body row heights, measured once on small sample tables.
+        if self._row_height is None:
+            header = self.rows[:1]
+            sample = self.rows[1:2]
+            _, header_height = _make_table(header, col_widths=self.col_widths).wrap(0, 0)
+            _, sample_height = _make_table(header + sample, col_widths=self.col_widths).wrap(0, 0)
+            self._header_height = header_height
+            self._row_height = (sample_height - header_height) or header_height
+        return self._header_height, self._row_height
+
+
 def _sanitize_filename(name):
     cleaned = "".join(char if char.isalnum() or char in "._-" else "_" for char in name.strip())
     return cleaned or "UNKNOWN"
@@ -238,11 +381,9 @@ def _header_cell(text, styles):
 
 
 def _format_time(value):
-    try:
-        parsed = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
-        return parsed.strftime("%d.%m.%Y %H:%M:%S")
-    except (TypeError, ValueError):
-        return value
+    if isinstance(value, datetime):
+        return value.strftime("%d.%m.%Y %H:%M:%S")
+    return value
 
 
 def _transaction_col_widths(total_width):
@@ -0,0 +1,66 @@
+# Flat records of a processed report, shared by the machine-readable writers.
+
+# (name, kind) of each column. kind is the column's type in the columnar
+# format: "f64" numbers, "i64" integers, "str" free text, "dict" text with
+# few distinct values.
+TRANSACTION_COLUMNS = [
+    ("currency", "dict"),
+    ("time", "str"),
+    ("epoch", "i64"),
+    ("year", "dict"),
+    ("type", "dict"),
+    ("fromCurrency", "dict"),
+    ("toCurrency", "dict"),
+    ("cryptoAmount", "f64"),
+    ("rate", "f64"),
+    ("eurAmount", "f64"),
+    ("fee", "f64"),
+    ("feeCurrency", "dict"),
+    ("source", "dict"),
+    ("remainingQuantity", "f64"),
+    ("costBasis", "f64"),
+    ("assumedCost", "f64"),
+    ("costBasisUsed", "f64"),
+    ("costBasisMethod", "dict"),
+    ("profitLoss", "f64"),
+]
+
+YEAR_COLUMNS = [
+    ("currency", "dict"),
+    ("year", "dict"),
+    ("fromTime", "dict"),
+    ("wins", "f64"),
+    ("losses", "f64"),
+    ("total", "f64"),
+]
+
+TRANSACTION_FIELDS = [name for name, _ in TRANSACTION_COLUMNS]
+YEAR_FIELDS = [name for name, _ in YEAR_COLUMNS]
+
+
+def iter_transaction_rows(objects):
+    """
+    Yields one value list per report transaction, in TRANSACTION_COLUMNS
+    order. Sells are the per-lot split rows; fields a row does not have
+    (e.g. costBasis of a buy) are None.
+    """
+    fields = TRANSACTION_FIELDS[1:]
+    for currency, data in objects.items():
+        for item in data.get("transactions", []):
+            yield [currency, *(item.get(name) for name in fields)]
+
+
+def iter_year_rows(objects):
+    """Yields one value list per currency and year, in YEAR_COLUMNS order."""
+    for currency, data in objects.items():
+        years = data.get("years", {})
+        for year in sorted(years):
+            summary = years[year]
+            yield [
+                currency,
+                year,
+                summary.get("fromTime"),
+                summary.get("wins", 0),
+                summary.get("losses", 0),
+                summary.get("total", 0),
+            ]
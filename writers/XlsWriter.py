@@ -1,9 +1,12 @@
-import openpyxl
 import os
 import re
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime
+from itertools import repeat
 
-from config import REPORT_VERSION
+from config import REPORT_VERSION, XLS_WORKERS
+from helpers.instrumentation import stage
+from writers.XlsxStream import XlsxSheetStream
 
 OUTPUT_HEADERS = [
     "Time",
@@ -33,67 +36,116 @@ YEAR_HEADERS = [
 ]
 
 
-def write_xls(objects):
+def write_xls(objects, output_folder="./output/", workers=None, streaming=True):
+    """
+    Writes one .xlsx file per currency into output_folder.
+    By default sheets are streamed to the file row by row (XlsxSheetStream)
+    instead of building an openpyxl workbook in memory; streaming=False
+    uses a regular openpyxl workbook. With more than one worker (default config.XLS_WORKERS) the currencies
+    are written in parallel in a process pool.
+    """
     if not objects:
         print("No objects to write")
         return
 
-    output_folder = "./output/"
     if not os.path.exists(output_folder):
         os.makedirs(output_folder)
 
     try:
-        for currency, data in objects.items():
-            wb = openpyxl.Workbook()
-            ws = wb.active
-            ws.title = currency
-
-            _write_report_header(ws)
-            _write_year_summary(ws, data.get("years", {}))
-
-            ws.append(OUTPUT_HEADERS)
-
-            for item in data.get("transactions", []):
-                ws.append(
-                    [
-                        _format_time(item["time"]),
-                        item["type"],
-                        item["cryptoAmount"],
-                        item["rate"],
-                        _format_eur(item["eurAmount"]),
-                        item["source"],
-                        item["fromCurrency"],
-                        item["toCurrency"],
-                        _format_eur(item["fee"]),
-                        item["feeCurrency"],
-                        _format_remaining_quantity(item.get("remainingQuantity", "")),
-                        _format_eur(item.get("costBasis", "")),
-                        _format_eur(item.get("assumedCost", "")),
-                        _format_eur(item.get("costBasisUsed", "")),
-                        item.get("costBasisMethod", ""),
-                        _format_eur(item.get("profitLoss", "")),
-                    ]
-                )
-
-            filename = f"{_sanitize_filename(currency)}.xlsx"
-            wb.save(os.path.join(output_folder, filename))
+        rows = sum(len(data.get("transactions", [])) for data in objects.values())
+        with stage("write_xls", rows=rows):
+            for _ in _write_workbooks(objects, output_folder, workers, streaming):
+                pass
 
     except Exception as e:
         print(f"Error writing XLSX file: {e}")
         return
 
 
+def _write_workbooks(objects, output_folder, workers=None, streaming=True):
+    """Yields the path of each currency's workbook in report order."""
+    workers = XLS_WORKERS if workers is None else workers
+    currencies = list(objects.keys())
+
+    if workers <= 1 or len(currencies) <= 1:
+        for currency in currencies:
+            yield _write_workbook(currency, objects[currency], output_folder, streaming)
+        return
+
+    with ProcessPoolExecutor(max_workers=min(workers, len(currencies))) as pool:
+        yield from pool.map(
+            _write_workbook,
+            currencies,
+            (objects[currency] for currency in currencies),
+            repeat(output_folder),
+            repeat(streaming),
+        )
+
+
+def _write_workbook(currency, data, output_folder, streaming=True):
+    path = os.path.join(output_folder, f"{_sanitize_filename(currency)}.xlsx")
+
+    with stage("write_xlsx_sheet", rows=len(data.get("transactions", [])), currency=currency):
+        _save_workbook(path, currency, data, streaming)
+    return path
+
+
+def _save_workbook(path, currency, data, streaming):
+    if streaming:
+        with XlsxSheetStream(path, currency) as ws:
+            _write_sheet(ws, data)
+        return
+
+    # Only the non-streaming path needs openpyxl, so it is imported here.
+    import openpyxl
+
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = currency
+    _write_sheet(ws, data)
+    wb.save(path)
+
+
+def _write_sheet(ws, data):
+    _write_report_header(ws)
+    _write_year_summary(ws, data.get("years", {}))
+
+    ws.append(OUTPUT_HEADERS)
+
+    for item in data.get("transactions", []):
+        ws.append(_transaction_row(item))
+
+
+def _transaction_row(item):
+    return [
+        _format_time(item.get("parsedTime", item["time"])),
+        item["type"],
+        item["cryptoAmount"],
+        item["rate"],
+        _format_eur(item["eurAmount"]),
+        item["source"],
+        item["fromCurrency"],
+        item["toCurrency"],
+        _format_eur(item["fee"]),
+        item["feeCurrency"],
+        _format_remaining_quantity(item.get("remainingQuantity", "")),
+        _format_eur(item.get("costBasis", "")),
+        _format_eur(item.get("assumedCost", "")),
+        _format_eur(item.get("costBasisUsed", "")),
+        item.get("costBasisMethod", ""),
+        _format_eur(item.get("profitLoss", "")),
+    ]
+
+
 def _sanitize_filename(name):
     cleaned = re.sub(r"[^A-Za-z0-9._-]+", "_", name.strip())
     return cleaned or "UNKNOWN"
 
 
 def _format_time(value):
-    try:
-        parsed = datetime.strptime(value, "%Y-%m-%dT%H:%M:%S%z")
-        return parsed.strftime("%d.%m.%Y %H:%M:%S")
-    except (TypeError, ValueError):
-        return value
+    if isinstance(value, datetime):
+        return value.strftime("%d.%m.%Y %H:%M:%S")
+    return value
 
 
 def _format_eur(value):
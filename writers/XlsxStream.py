@@ -0,0 +1,147 @@
+import zipfile
+from math import isfinite
+from xml.sax.saxutils import escape, quoteattr
+
+# Rows are serialized in batches to keep zip writes few and memory flat.
+FLUSH_ROWS = 1000
+
+_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/xl/workbook.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+    '<Override PartName="/xl/worksheets/sheet1.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+    '<Override PartName="/xl/styles.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+    '</Types>'
+)
+
+_ROOT_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="xl/workbook.xml"/>'
+    '</Relationships>'
+)
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name={title} sheetId="1" r:id="rId1"/></sheets>'
+    '</workbook>'
+)
+
+_WORKBOOK_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+    'Target="worksheets/sheet1.xml"/>'
+    '<Relationship Id="rId2" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" '
+    'Target="styles.xml"/>'
+    '</Relationships>'
+)
+
+_STYLES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+_SHEET_START = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+)
+
+_SHEET_END = '</sheetData></worksheet>'
+
+
+class XlsxSheetStream:
+    """
+    Writes a single-sheet .xlsx file row by row.
+    Rows go straight into the compressed sheet entry of the zip, so memory
+    does not grow with the sheet. Supports the value types the report
+    writer produces: strings, numbers and empty cells. Use as a context
+    manager, or call close() to finish the file.
+    """
+
+    def __init__(self, path, title):
+        self._archive = zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED)
+        self._archive.writestr("[Content_Types].xml", _CONTENT_TYPES)
+        self._archive.writestr("_rels/.rels", _ROOT_RELS)
+        self._archive.writestr("xl/workbook.xml", _WORKBOOK.format(title=quoteattr(title)))
+        self._archive.writestr("xl/_rels/workbook.xml.rels", _WORKBOOK_RELS)
+        self._archive.writestr("xl/styles.xml", _STYLES)
+        self._sheet = self._archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
+        self._sheet.write(_SHEET_START.encode("utf-8"))
+        self._pending = []
+        self._row = 0
+        self._columns = []
+
+    def append(self, values):
+        self._row += 1
+        row = self._row
+        columns = self._columns
+        while len(columns) < len(values):
+            columns.append(_column_letter(len(columns) + 1))
+
+        cells = []
+        for column, value in zip(columns, values):
+            if value is None or value == "":
+                continue
+            if isinstance(value, str):
+                cells.append(
+                    f'<c r="{column}{row}" t="inlineStr"><is><t xml:space="preserve">'
+                    f'{escape(value)}</t></is></c>'
+                )
+            elif isinstance(value, bool):
+                cells.append(f'<c r="{column}{row}" t="b"><v>{int(value)}</v></c>')
+            elif isfinite(value):
+                # Same number formatting as openpyxl.
+                cells.append(f'<c r="{column}{row}"><v>{value:.16g}</v></c>')
+        self._pending.append(f'<row r="{row}">{"".join(cells)}</row>')
+
+        if len(self._pending) >= FLUSH_ROWS:
+            self._flush()
+
+    def close(self):
+        if self._archive is None:
+            return
+        self._flush()
+        self._sheet.write(_SHEET_END.encode("utf-8"))
+        self._sheet.close()
+        self._archive.close()
+        self._archive = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _flush(self):
+        if self._pending:
+            self._sheet.write("".join(self._pending).encode("utf-8"))
+            self._pending = []
+
+
+def _column_letter(index):
+    # 1 -> A, 26 -> Z, 27 -> AA, as in openpyxl.utils.get_column_letter.
+    letters = ""
+    while index:
+        index, remainder = divmod(index - 1, 26)
+        letters = chr(65 + remainder) + letters
+    return letters
@@ -0,0 +1,38 @@
+from typing import Callable, NamedTuple
+
+from helpers.registry import LazyRegistry
+
+
+class ExportFormat(NamedTuple):
+    """A report format that can be streamed as a single file, e.g. as an API response."""
+
+    filename: str
+    media_type: str
+    # iter_chunks(report) yields the file as bytes chunks.
+    iter_chunks: Callable
+
+
+# Output formats; each is called as writer(report, output_folder).
+WRITERS = LazyRegistry("output", {
+    "pdf": "writers.PdfWriter:write_pdf_zip",
+    "xlsx": "writers.XlsWriter:write_xls",
+    "csv": "writers.CsvWriter:write_csv",
+    "jsonl": "writers.JsonlWriter:write_jsonl",
+    "columnar": "writers.ColumnarWriter:write_columnar",
+})
+
+# Formats that can be streamed as one file; each target is an ExportFormat.
+EXPORTS = LazyRegistry("export", {
+    "pdf": "writers.PdfWriter:PDF_ZIP_EXPORT",
+    "csv": "writers.CsvWriter:CSV_ZIP_EXPORT",
+    "jsonl": "writers.JsonlWriter:JSONL_EXPORT",
+    "columnar": "writers.ColumnarWriter:COLUMNAR_EXPORT",
+})
+
+
+def get_writer(name):
+    return WRITERS.get(name)
+
+
+def get_export(name):
+    return EXPORTS.get(name)